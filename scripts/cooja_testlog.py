@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Single-pass COOJA.testlog reader shared by the summary and validation tools.
+
+The log is read once in bytes mode (mmap'd when possible). Lines carrying a
+`CSV,<TYPE>,` record are decoded into typed events and handed to the
+consumers registered for that type; everything else is skipped unless a
+MARKER or raw-line consumer asks for it. Summarizing a run therefore costs
+one pass over the file no matter how many metrics are collected from it.
+
+  reader = TestlogReader()
+  reader.on("TX", lambda ev: ...)
+  reader.on("RX", lambda ev: ...)
+  reader.read("results/.../logs/COOJA.testlog")
+"""
+
+import mmap
+from collections import defaultdict, namedtuple
+
+
+# Every event carries the 1-based log line number first.
+Tx = namedtuple("Tx", "line node seq t0 joined")
+Rx = namedtuple("Rx", "line root_tagged src src_node seq t_recv t0 length")
+# delay is t_recv - t0 in clock ticks as printed by receiver_root.c (CSV,DELAY,<seq>,<ticks>).
+Delay = namedtuple("Delay", "line seq delay")
+Rtt = namedtuple("Rtt", "line seq t0 t_ack rtt_ticks length")
+Fwd = namedtuple("Fwd", "line node fwd_total udp_to_root dropped")
+FwdPkt = namedtuple("FwdPkt", "line node src seq")
+Parent = namedtuple("Parent", "line node parent parent_node")
+Routing = namedtuple("Routing", "line node joined parent parent_node rank")
+Trust = namedtuple("Trust", "line node seq missed trust")
+TrustIn = namedtuple("TrustIn", "line self_id node trust")
+Blacklist = namedtuple("Blacklist", "line node count")
+PktDrop = namedtuple("PktDrop", "line node")
+Marker = namedtuple("Marker", "line name")
+Generic = namedtuple("Generic", "line kind fields")
+
+# Plain-text lines the tools care about; checked in order, first match wins.
+MARKERS = (
+    (b"ROUTING_WAIT_TIMEOUT", "ROUTING_WAIT_TIMEOUT"),
+    (b"ROUTING_WAIT joined=0 reachable=0", "ROUTING_WAIT"),
+    (b"SIMULATION_FINISHED", "SIMULATION_FINISHED"),
+)
+
+READ_BUFFER = 1 << 20
+
+
+def parse_node_id(addr):
+    """Node id from an IPv6 address (last hex group) or a plain decimal id."""
+    if isinstance(addr, bytes):
+        addr = addr.decode("ascii", "ignore")
+    groups = [g for g in addr.split(":") if g]
+    if not groups:
+        return None
+    last = groups[-1]
+    if ":" in addr:
+        try:
+            return int(last, 16)
+        except ValueError:
+            return None
+    try:
+        return int(last)
+    except ValueError:
+        return None
+
+
+def _opt_int(fields, index):
+    if index < len(fields):
+        try:
+            return int(fields[index])
+        except ValueError:
+            return None
+    return None
+
+
+def _decode_tx(line, f):
+    return Tx(line, int(f[0]), int(f[1]), _opt_int(f, 2), _opt_int(f, 3))
+
+
+def _decode_rx(line, f):
+    # CSV,RX,node=1,<src_ip>,<seq>,<t_recv>,<t0>,<len>  or the untagged legacy form.
+    tagged = f[0] == b"node=1"
+    if tagged:
+        f = f[1:]
+    src = f[0].decode("ascii", "ignore")
+    return Rx(
+        line, tagged, src, parse_node_id(src), int(f[1]),
+        _opt_int(f, 2), _opt_int(f, 3), _opt_int(f, 4),
+    )
+
+
+def _decode_delay(line, f):
+    return Delay(line, int(f[0]), int(f[1]))
+
+
+def _decode_rtt(line, f):
+    return Rtt(line, int(f[0]), int(f[1]), int(f[2]), int(f[3]), _opt_int(f, 4))
+
+
+def _decode_fwd(line, f):
+    return Fwd(line, int(f[0]), int(f[1]), int(f[2]), int(f[3]))
+
+
+def _decode_fwd_pkt(line, f):
+    return FwdPkt(line, int(f[0]), int(f[1]), int(f[2]))
+
+
+def _decode_parent(line, f):
+    parent = f[1].decode("ascii", "ignore")
+    parent_node = None if parent in ("none", "unknown") else parse_node_id(parent)
+    return Parent(line, int(f[0]), parent, parent_node)
+
+
+def _decode_routing(line, f):
+    parent = f[2].decode("ascii", "ignore") if len(f) > 2 else "none"
+    parent_node = None if parent in ("none", "unknown") else parse_node_id(parent)
+    return Routing(line, int(f[0]), int(f[1]), parent, parent_node, _opt_int(f, 3))
+
+
+def _decode_trust(line, f):
+    return Trust(line, int(f[0]), int(f[1]), int(f[2]), int(f[3]))
+
+
+def _decode_trust_in(line, f):
+    return TrustIn(line, int(f[0]), int(f[1]), int(f[2]))
+
+
+def _decode_blacklist(line, f):
+    return Blacklist(line, int(f[0]), int(f[1]))
+
+
+def _decode_pkt_drop(line, f):
+    return PktDrop(line, int(f[0]))
+
+
+DECODERS = {
+    b"TX": _decode_tx,
+    b"RX": _decode_rx,
+    b"DELAY": _decode_delay,
+    b"RTT": _decode_rtt,
+    b"FWD": _decode_fwd,
+    b"FWD_PKT": _decode_fwd_pkt,
+    b"PARENT": _decode_parent,
+    b"ROUTING": _decode_routing,
+    b"TRUST": _decode_trust,
+    b"TRUST_IN": _decode_trust_in,
+    b"BLACKLIST_ADD": _decode_blacklist,
+    b"BLACKLIST_REMOVE": _decode_blacklist,
+    b"PKT_DROP_DEST": _decode_pkt_drop,
+    b"PKT_DROP_SRC": _decode_pkt_drop,
+}
+
+
+class TestlogReader:
+    """Dispatches decoded testlog events to registered consumers."""
+
+    def __init__(self):
+        self._consumers = defaultdict(list)
+        self._markers = []
+        self._raw = []
+        self.line_no = 0
+
+    def on(self, kind, callback):
+        """Register callback(event) for a CSV record type, or "MARKER"."""
+        if kind == "MARKER":
+            self._markers.append(callback)
+        else:
+            self._consumers[kind.encode()].append(callback)
+        return self
+
+    def on_line(self, callback):
+        """Register callback(line_no, raw_bytes) for every line (costs a call per line)."""
+        self._raw.append(callback)
+        return self
+
+    def kinds(self):
+        """Record types with at least one consumer ("MARKER" included)."""
+        kinds = {kind.decode() for kind, callbacks in self._consumers.items() if callbacks}
+        if self._markers:
+            kinds.add("MARKER")
+        return kinds
+
+    def needs_text(self):
+        """True when a raw-line consumer is registered and only the text log will do."""
+        return bool(self._raw)
+
+    def emit(self, kind, event):
+        """Hand an already decoded event to the consumers of kind."""
+        callbacks = self._markers if kind == "MARKER" else self._consumers.get(kind.encode(), ())
+        for callback in callbacks:
+            callback(event)
+
+    def feed(self, line):
+        """Dispatch one raw line (bytes); used directly when following a live log."""
+        self.line_no += 1
+        line_no = self.line_no
+        for callback in self._raw:
+            callback(line_no, line)
+        idx = line.find(b"CSV,")
+        if idx < 0:
+            if self._markers:
+                for needle, name in MARKERS:
+                    if needle in line:
+                        event = Marker(line_no, name)
+                        for callback in self._markers:
+                            callback(event)
+                        break
+            return
+        record = line[idx + 4:].rstrip()
+        comma = record.find(b",")
+        if comma < 0:
+            return
+        consumers = self._consumers.get(record[:comma])
+        if not consumers:
+            return
+        kind = record[:comma]
+        fields = record[comma + 1:].split(b",")
+        decoder = DECODERS.get(kind)
+        if decoder is None:
+            event = Generic(line_no, kind.decode("ascii", "ignore"), fields)
+        else:
+            try:
+                event = decoder(line_no, fields)
+            except (ValueError, IndexError):
+                return
+        for callback in consumers:
+            callback(event)
+
+    def read(self, path):
+        """Stream the whole file through the registered consumers."""
+        feed = self.feed
+        with open(path, "rb", buffering=READ_BUFFER) as handle:
+            try:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Empty files and pipes cannot be mapped.
+                for line in handle:
+                    feed(line)
+                return self
+            with mapped:
+                for line in iter(mapped.readline, b""):
+                    feed(line)
+        return self
+
+
+class RunLogStats:
+    """Per-run delivery counters used by the sweep summaries.
+
+    delays holds the DELAY ticks; the summaries report their mean as
+    avg_delay_ms, which assumes CLOCK_SECOND = 1000 (Cooja motes), so one
+    tick is one millisecond. The parsers before this reader averaged the
+    sequence-number field instead.
+    """
+
+    def __init__(self, reader):
+        self.tx = set()
+        self.rx = set()
+        self.delays = []
+        self.routing_timeout = False
+        self.routing_wait = False
+        reader.on("TX", self._on_tx)
+        reader.on("RX", self._on_rx)
+        reader.on("DELAY", self._on_delay)
+        reader.on("MARKER", self._on_marker)
+
+    def _on_tx(self, ev):
+        self.tx.add((ev.node, ev.seq))
+
+    def _on_rx(self, ev):
+        self.rx.add((ev.src_node, ev.seq))
+
+    def _on_delay(self, ev):
+        self.delays.append(ev.delay)
+
+    def _on_marker(self, ev):
+        if ev.name == "ROUTING_WAIT_TIMEOUT":
+            self.routing_timeout = True
+        elif ev.name == "ROUTING_WAIT":
+            self.routing_wait = True
+
+
+def read_run_stats(log_path):
+    reader = TestlogReader()
+    stats = RunLogStats(reader)
+    reader.read(log_path)
+    return stats
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Parse a Cooja .csc topology once, render per-run variants from the model.
+
+A template is split into literal text and a few typed slots: the
+<randomseed>, each motetype's <commands> (make DEFINES kept as an ordered
+dict), each <plugin> block and every @NAME@ placeholder. Rendering walks
+that list once, so per-run configs no longer go through a chain of regex,
+sed or awk rewrites, and DEFINES edits are plain dict operations applied
+per motetype (drop, then set-if-present, then add) instead of substitutions
+that can match each other's output.
+
+load() caches the parsed template per path and mtime, so a sweep parses
+each topology once however many runs it renders.
+
+  python3 scripts/csc_template.py render --template configs/topologies/GRID_S.csc \\
+      --out configs/temp_X.csc --seed 7 --placeholder SIM_TIME_MS=600000 \\
+      --set TRUST_ENABLED=1 --add TRUST_GAMMA=2 --drop PROJECT_CONF_PATH \\
+      --drop-plugin org.contikios.cooja.serialsocket.SerialSocketServer
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import firmware_cache
+from firmware_cache import COMMANDS_RE, DEFINES_RE, MOTETYPE_RE
+
+
+Motetype = namedtuple("Motetype", "identifier description source commands prefix defines suffix build")
+Plugin = namedtuple("Plugin", "name parts")
+Template = namedtuple("Template", "path parts motetypes plugins seed placeholders")
+
+SEED_RE = re.compile(r"<randomseed>(\d+)</randomseed>")
+# Whole lines, as the SerialSocketServer strip in the runners always did.
+PLUGIN_RE = re.compile(r"^[^\n]*<plugin>.*?</plugin>[^\n]*\n?", re.S | re.M)
+PLACEHOLDER_RE = re.compile(r"@([A-Z][A-Z0-9_]*)@")
+TAG_RE = {tag: re.compile(rf"<{tag}>(.*?)</{tag}>", re.S) for tag in ("identifier", "description", "source")}
+
+SERIAL_SOCKET_PLUGIN = "org.contikios.cooja.serialsocket.SerialSocketServer"
+
+
+def parse_defines(text):
+    """'A=1,B,C=x' -> {"A": "1", "B": None, "C": "x"} (order kept)."""
+    defines = {}
+    for item in text.split(","):
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        defines[key] = value if sep else None
+    return defines
+
+
+def format_defines(defines):
+    return ",".join(key if value is None else f"{key}={value}" for key, value in defines.items())
+
+
+def _text_parts(text):
+    """Literal text and ("placeholder", NAME) slots."""
+    parts = []
+    pos = 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        if match.start() > pos:
+            parts.append(("text", text[pos : match.start()]))
+        parts.append(("placeholder", match.group(1)))
+        pos = match.end()
+    if pos < len(text):
+        parts.append(("text", text[pos:]))
+    return parts
+
+
+def _motetype(block):
+    fields = {}
+    for tag, pattern in TAG_RE.items():
+        match = pattern.search(block)
+        fields[tag] = match.group(1).strip() if match else ""
+    commands = COMMANDS_RE.search(block).group(1)
+    defines = DEFINES_RE.search(commands)
+    if defines:
+        prefix, body, suffix = commands[: defines.start(1)], defines.group(1), commands[defines.end(1) :]
+    else:
+        prefix, body, suffix = commands, None, ""
+    return Motetype(
+        identifier=fields["identifier"],
+        description=fields["description"],
+        source=fields["source"],
+        commands=commands,
+        prefix=prefix,
+        defines=parse_defines(body) if body is not None else None,
+        suffix=suffix,
+        build=firmware_cache.parse_build(commands),
+    )
+
+
+def parse(text, path=""):
+    """Split .csc text into a Template."""
+    spans = []
+    seed = SEED_RE.search(text)
+    if seed:
+        spans.append((seed.start(1), seed.end(1), ("seed",)))
+    motetypes = []
+    for block in MOTETYPE_RE.finditer(text):
+        commands = COMMANDS_RE.search(block.group(0))
+        if not commands:
+            continue
+        spans.append((block.start() + commands.start(1), block.start() + commands.end(1), ("commands", len(motetypes))))
+        motetypes.append(_motetype(block.group(0)))
+    plugins = []
+    for block in PLUGIN_RE.finditer(text):
+        body = block.group(0)
+        after = body[body.index("<plugin>") + len("<plugin>") :].strip()
+        name = after.split(None, 1)[0] if after else ""
+        spans.append((block.start(), block.end(), ("plugin", len(plugins))))
+        plugins.append(Plugin(name=name, parts=_text_parts(body)))
+
+    parts = []
+    pos = 0
+    for start, end, slot in sorted(spans):
+        if start < pos:
+            raise ValueError(f"{path or 'template'}: overlapping {slot[0]} block at offset {start}")
+        parts.extend(_text_parts(text[pos:start]))
+        parts.append(slot)
+        pos = end
+    parts.extend(_text_parts(text[pos:]))
+    placeholders = sorted(
+        {p[1] for p in parts if p[0] == "placeholder"}
+        | {p[1] for plugin in plugins for p in plugin.parts if p[0] == "placeholder"}
+    )
+    return Template(
+        path=str(path),
+        parts=parts,
+        motetypes=motetypes,
+        plugins=plugins,
+        seed=int(seed.group(1)) if seed else None,
+        placeholders=placeholders,
+    )
+
+
+@lru_cache(maxsize=None)
+def _load(path, mtime_ns):
+    return parse(Path(path).read_text(), path)
+
+
+def load(path):
+    """Parsed Template for path, cached until the file changes."""
+    path = str(path)
+    return _load(path, os.stat(path).st_mtime_ns)
+
+
+def edit_defines(defines, set_defines=None, add_defines=None, drop_defines=()):
+    """New DEFINES dict: drop keys, overwrite the ones already present, add the rest."""
+    out = {key: value for key, value in defines.items() if key not in drop_defines}
+    for key, value in (set_defines or {}).items():
+        if key in out:
+            out[key] = str(value)
+    for key, value in (add_defines or {}).items():
+        out[key] = str(value)
+    return out
+
+
+def motetype_defines(template, set_defines=None, add_defines=None, drop_defines=()):
+    """{identifier: edited DEFINES dict} for the motetypes built with DEFINES."""
+    return {
+        m.identifier: edit_defines(m.defines, set_defines, add_defines, drop_defines)
+        for m in template.motetypes
+        if m.defines is not None
+    }
+
+
+def builds(template, set_defines=None, add_defines=None, drop_defines=()):
+    """{identifier: (makefile, target, defines)} as firmware_cache keys them, per rendered variant."""
+    edited = motetype_defines(template, set_defines, add_defines, drop_defines)
+    out = {}
+    for m in template.motetypes:
+        if m.build is None:
+            continue
+        makefile, target, _defines = m.build
+        defines = format_defines(edited[m.identifier]) if m.identifier in edited else ""
+        out[m.identifier] = (makefile, target, defines)
+    return out
+
+
+def render(
+    template,
+    seed=None,
+    placeholders=None,
+    set_defines=None,
+    add_defines=None,
+    drop_defines=(),
+    drop_plugins=(),
+    commands=None,
+):
+    """Serialize one run's .csc.
+
+    seed replaces <randomseed>; placeholders maps NAME -> value for @NAME@
+    (unknown names are left as they are); commands maps a motetype
+    identifier to a replacement for its whole <commands> (e.g. a cached
+    firmware no-op); plugins whose class is in drop_plugins are omitted.
+    """
+    placeholders = placeholders or {}
+    commands = commands or {}
+    edited = motetype_defines(template, set_defines, add_defines, drop_defines)
+
+    def text_of(parts, out):
+        for part in parts:
+            kind = part[0]
+            if kind == "text":
+                out.append(part[1])
+            elif kind == "placeholder":
+                name = part[1]
+                out.append(str(placeholders[name]) if name in placeholders else f"@{name}@")
+            elif kind == "seed":
+                out.append(str(template.seed if seed is None else seed))
+            elif kind == "commands":
+                m = template.motetypes[part[1]]
+                if m.identifier in commands:
+                    out.append(commands[m.identifier])
+                elif m.defines is None:
+                    out.append(m.commands)
+                else:
+                    out.append(m.prefix + format_defines(edited[m.identifier]) + m.suffix)
+            elif kind == "plugin":
+                plugin = template.plugins[part[1]]
+                if plugin.name not in drop_plugins:
+                    text_of(plugin.parts, out)
+
+    out = []
+    text_of(template.parts, out)
+    return "".join(out)
+
+
+def parse_assignments(items):
+    out = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected NAME=VALUE, got {item!r}")
+        out[key] = value
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render a per-run Cooja config from a .csc template.")
+    sub = ap.add_subparsers(dest="action", required=True)
+    render_ap = sub.add_parser("render")
+    render_ap.add_argument("--template", required=True, help="Topology .csc")
+    render_ap.add_argument("--out", required=True)
+    render_ap.add_argument("--seed", type=int)
+    render_ap.add_argument("--placeholder", action="append", default=[], metavar="NAME=VALUE")
+    render_ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                           help="Overwrite a DEFINES key where a motetype already has it")
+    render_ap.add_argument("--add", action="append", default=[], metavar="KEY=VALUE",
+                           help="Set a DEFINES key in every motetype, adding it where missing")
+    render_ap.add_argument("--drop", action="append", default=[], metavar="KEY", help="Remove a DEFINES key")
+    render_ap.add_argument("--drop-plugin", action="append", default=[], metavar="CLASS")
+    show_ap = sub.add_parser("show", help="Print the parsed model")
+    show_ap.add_argument("--template", required=True)
+    args = ap.parse_args()
+
+    template = load(args.template)
+    if args.action == "show":
+        print(f"seed {template.seed}; placeholders {', '.join(template.placeholders) or '-'}")
+        for m in template.motetypes:
+            print(f"motetype {m.identifier}: {format_defines(m.defines) if m.defines is not None else '(no DEFINES)'}")
+        for plugin in template.plugins:
+            print(f"plugin {plugin.name}")
+        return 0
+    try:
+        placeholders = parse_assignments(args.placeholder)
+        set_defines = parse_assignments(args.set)
+        add_defines = parse_assignments(args.add)
+    except ValueError as exc:
+        ap.error(str(exc))
+    contents = render(
+        template,
+        seed=args.seed,
+        placeholders=placeholders,
+        set_defines=set_defines,
+        add_defines=add_defines,
+        drop_defines=set(args.drop),
+        drop_plugins=set(args.drop_plugin),
+    )
+    Path(args.out).write_text(contents)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
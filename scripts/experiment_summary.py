@@ -2,15 +2,42 @@
 import argparse
 import csv
 import json
-import math
 import os
 import re
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
+from group_stats import fmt, group_moments, group_stats, write_moments
+from testlog_store import read_run_stats, store_path
+
+
+# Bump whenever extract_run_metrics() or the log parsers change what they report.
+PARSER_VERSION = 2
+CACHE_NAME = ".summary_cache.json"
+CACHE_INPUTS = (
+    os.path.join("logs", "COOJA.testlog"),
+    os.path.join("logs", "COOJA.events.npz"),
+    "exposure.csv",
+    "parent_switch.csv",
+    "stats.csv",
+)
+
+
+GROUP_DIMS = ("topology", "attack_rate", "trust", "lambda", "gamma", "point")
+# (metric, decimals) aggregated per group; GROUP_LABELS shortens column names.
+GROUP_METRICS = (("pdr", 2), ("e1", 4), ("parent_switch_rate", 4))
+GROUP_LABELS = {"parent_switch_rate": "parent_switch"}
+MOMENTS_NAME = "group_moments.csv"
+# Per-run stage timings written by run_trust_sweep.py, and the per-stage rollup.
+TIMINGS_NAME = "timings.csv"
+STAGE_TIMINGS_NAME = "stage_timings.csv"
+STAGE_FIELDS = ["stage", "runs", "total_s", "share", "mean_s", "p95_s", "max_s", "max_run"]
+# Sweep matrix statuses that the summary must not overwrite with "completed".
+UNFINISHED_STATUSES = ("timeout", "failed", "aborted")
 
 RUN_RE = re.compile(
     r"^(?P<topo>[^_]+)_(?P<scenario>[^_]+)_atk(?P<attack>\d+)_trust(?P<trust>[01])_"
-    r"lam(?P<lam>[^_]+)_gam(?P<gam>[^_]+)_s(?P<seed>\d+)$"
+    r"lam(?P<lam>[^_]+)_gam(?P<gam>[^_]+)(?:_pt(?P<point>\d+))?_s(?P<seed>\d+)$"
 )
 
 
@@ -24,6 +51,7 @@ def parse_run_name(name):
     seed = int(data["seed"])
     lam = None if data["lam"] == "NA" else int(data["lam"])
     gam = None if data["gam"] == "NA" else int(data["gam"])
+    point = None if data["point"] is None else int(data["point"])
     return {
         "topology": data["topo"],
         "scenario": data["scenario"],
@@ -31,60 +59,20 @@ def parse_run_name(name):
         "trust": trust,
         "lambda": lam,
         "gamma": gam,
+        "point": point,
         "seed": seed,
     }
 
 
 def parse_log(log_path):
-    tx = set()
-    rx = set()
-    delays = []
-    routing_timeout = False
-    routing_wait = False
-    with open(log_path, errors="ignore") as handle:
-        for line in handle:
-            line = line.strip()
-            if line.startswith("CSV,TX,"):
-                parts = line.split(",")
-                if len(parts) >= 4:
-                    try:
-                        node = int(parts[2])
-                        seq = int(parts[3])
-                        tx.add((node, seq))
-                    except ValueError:
-                        pass
-            elif line.startswith("CSV,RX,"):
-                parts = line.split(",")
-                if "node=1" in parts:
-                    try:
-                        node_index = parts.index("node=1")
-                        src = parts[node_index + 1]
-                        seq = parts[node_index + 2]
-                        rx.add((src, int(seq)))
-                    except (ValueError, IndexError):
-                        pass
-                elif len(parts) >= 4:
-                    # Fallback when node=1 is not explicitly logged.
-                    src = parts[2]
-                    try:
-                        seq = int(parts[3])
-                        rx.add((src, seq))
-                    except ValueError:
-                        pass
-            elif line.startswith("CSV,DELAY,"):
-                parts = line.split(",")
-                if len(parts) >= 3:
-                    try:
-                        delays.append(int(parts[2]))
-                    except ValueError:
-                        pass
-            elif "ROUTING_WAIT_TIMEOUT" in line:
-                routing_timeout = True
-            elif "ROUTING_WAIT joined=0 reachable=0" in line:
-                routing_wait = True
+    stats = read_run_stats(log_path)
+    tx, rx, delays = stats.tx, stats.rx, stats.delays
+    routing_timeout = stats.routing_timeout
+    routing_wait = stats.routing_wait
     tx_count = len(tx)
     rx_count = len(rx)
     pdr = (rx_count * 100 / tx_count) if tx_count > 0 else None
+    # Mean DELAY ticks; ticks are ms with Cooja's CLOCK_SECOND = 1000.
     avg_delay = (sum(delays) / len(delays)) if delays else None
     return {
         "tx": tx_count,
@@ -97,14 +85,22 @@ def parse_log(log_path):
 
 
 def read_last_row(csv_path):
+    """Last data row of a trust_engine CSV as a dict keyed by its header, or None."""
     last = None
     with open(csv_path, errors="ignore") as handle:
-        for row in csv.reader(handle):
-            if row and not row[0].startswith("#"):
+        for row in csv.DictReader(handle):
+            if row and not (row.get("line") or "").startswith("#"):
                 last = row
     return last
 
 
+def float_field(row, name):
+    try:
+        return float(row[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 def read_parent_switch_avg(csv_path):
     rates = []
     with open(csv_path, errors="ignore") as handle:
@@ -118,34 +114,168 @@ def read_parent_switch_avg(csv_path):
 
 
 def read_stats_last_switch(stats_path):
-    last = None
-    with open(stats_path, errors="ignore") as handle:
-        for row in csv.reader(handle):
-            if row and row[0] != "line":
-                last = row
-    if last and len(last) >= 8:
+    last = read_last_row(stats_path)
+    return float_field(last, "parent_switch_rate") if last else None
+
+
+def extract_run_metrics(run_dir):
+    """Per-run metrics from the testlog and trust_engine outputs; None if the log is missing."""
+    log_path = os.path.join(run_dir, "logs", "COOJA.testlog")
+    if not os.path.exists(log_path) and not store_path(log_path).exists():
+        return None
+
+    metrics = parse_log(log_path)
+    exposure_path = os.path.join(run_dir, "exposure.csv")
+    parent_path = os.path.join(run_dir, "parent_switch.csv")
+    stats_path = os.path.join(run_dir, "stats.csv")
+
+    e1 = None
+    e3 = None
+    if os.path.exists(exposure_path):
+        # By header name: the columns before e1/e3 are sample counts.
+        last = read_last_row(exposure_path)
+        if last:
+            e1 = float_field(last, "e1")
+            e3 = float_field(last, "e3")
+
+    parent_switch = None
+    if os.path.exists(parent_path):
+        parent_switch = read_parent_switch_avg(parent_path)
+    if parent_switch is None and os.path.exists(stats_path):
+        parent_switch = read_stats_last_switch(stats_path)
+
+    metrics.update({"e1": e1, "e3": e3, "parent_switch": parent_switch})
+    return metrics
+
+
+class MetricsCache:
+    """Per-results-dir cache of extract_run_metrics(), keyed by input size/mtime."""
+
+    def __init__(self, results_dir):
+        self.path = os.path.join(results_dir, CACHE_NAME)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
         try:
-            return float(last[7])
-        except ValueError:
-            return None
-    return None
+            with open(self.path) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == PARSER_VERSION:
+            self.entries = data.get("runs", {})
+
+    @staticmethod
+    def signature(run_dir):
+        sig = []
+        for rel in CACHE_INPUTS:
+            try:
+                stat = os.stat(os.path.join(run_dir, rel))
+            except FileNotFoundError:
+                sig.append(None)
+                continue
+            sig.append([stat.st_size, stat.st_mtime_ns])
+        return sig
+
+    def lookup(self, name, run_dir):
+        """Return (hit, metrics); a miss remembers the signature for put()."""
+        sig = self.signature(run_dir)
+        entry = self.entries.get(name)
+        if entry and entry["sig"] == sig:
+            self.hits += 1
+            return True, entry["metrics"]
+        self.misses += 1
+        self.entries[name] = {"sig": sig, "metrics": None}
+        return False, None
+
+    def put(self, name, metrics):
+        self.entries[name]["metrics"] = metrics
+
+    def save(self, keep):
+        runs = {name: self.entries[name] for name in sorted(keep) if name in self.entries}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({"version": PARSER_VERSION, "runs": runs}, handle)
+        os.replace(tmp_path, self.path)
+
+
+def collect_metrics(results_dir, names, cache=None, workers=1):
+    """Map run name -> extract_run_metrics(), fanning cache misses out over worker processes."""
+    metrics = {}
+    pending = []
+    for name in names:
+        if cache is not None:
+            hit, value = cache.lookup(name, os.path.join(results_dir, name))
+            if hit:
+                metrics[name] = value
+                continue
+        pending.append(name)
+
+    run_dirs = [os.path.join(results_dir, name) for name in pending]
+    if workers > 1 and len(run_dirs) > 1:
+        chunksize = max(1, len(run_dirs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(extract_run_metrics, run_dirs, chunksize=chunksize))
+    else:
+        results = [extract_run_metrics(run_dir) for run_dir in run_dirs]
+
+    # pool.map keeps submission order, so merging is the same as the serial path.
+    for name, value in zip(pending, results):
+        metrics[name] = value
+        if cache is not None:
+            cache.put(name, value)
+    return metrics
 
 
 def mean(values):
     return sum(values) / len(values) if values else None
 
 
-def stddev(values):
-    if len(values) < 2:
-        return 0.0
-    mu = mean(values)
-    return math.sqrt(sum((v - mu) ** 2 for v in values) / (len(values) - 1))
+def read_matrix(path):
+    """{run: row} from a sweep_matrix.csv, or {} when there is none."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, errors="ignore") as handle:
+        return {row["run"]: row for row in csv.DictReader(handle) if row.get("run")}
 
 
-def ci95(values):
-    if len(values) < 2:
-        return 0.0
-    return 1.96 * stddev(values) / math.sqrt(len(values))
+def stage_timings(timings_path):
+    """STAGE_FIELDS rows from a timings.csv, slowest stage (by total wall time) first."""
+    if not os.path.exists(timings_path):
+        return []
+    with open(timings_path, newline="", errors="ignore") as handle:
+        reader = csv.DictReader(handle)
+        stages = [f[:-2] for f in reader.fieldnames or () if f.endswith("_s") and f not in ("total_s", "sim_time_s")]
+        rows = list(reader)
+    durations = {stage: [] for stage in stages}
+    for row in rows:
+        for stage in stages:
+            try:
+                durations[stage].append((float(row[f"{stage}_s"]), row["run"]))
+            except (TypeError, ValueError):
+                continue
+    grand = sum(value for values in durations.values() for value, _run in values)
+    out = []
+    for stage, values in durations.items():
+        if not values:
+            continue
+        ordered = sorted(values)
+        total = sum(value for value, _run in ordered)
+        # Nearest-rank 95th percentile.
+        p95 = ordered[max(0, -(-95 * len(ordered) // 100) - 1)][0]
+        out.append(
+            {
+                "stage": stage,
+                "runs": len(ordered),
+                "total_s": f"{total:.1f}",
+                "share": f"{total / grand:.3f}" if grand else "",
+                "mean_s": f"{total / len(ordered):.3f}",
+                "p95_s": f"{p95:.3f}",
+                "max_s": f"{ordered[-1][0]:.3f}",
+                "max_run": ordered[-1][1],
+            }
+        )
+    out.sort(key=lambda r: -float(r["total_s"]))
+    return out
 
 
 def write_csv(path, fieldnames, rows):
@@ -156,57 +286,80 @@ def write_csv(path, fieldnames, rows):
             writer.writerow(row)
 
 
+def aggregate_fieldnames():
+    labels = [GROUP_LABELS.get(metric, metric) for metric, _ in GROUP_METRICS]
+    return (
+        list(GROUP_DIMS)
+        + ["n"]
+        + [f"{stat}_{label}" for label in labels for stat in ("mean", "std", "ci95")]
+        + [f"{stat}_{label}" for label in labels for stat in ("median", "iqr")]
+    )
+
+
+def format_aggregate_row(group):
+    """aggregate_by_group.csv row from group_stats() output (missing stats stay blank)."""
+    row = {dim: group.get(dim, "NA") for dim in GROUP_DIMS}
+    row["n"] = group["n"]
+    for metric, digits in GROUP_METRICS:
+        label = GROUP_LABELS.get(metric, metric)
+        for stat in ("mean", "std", "ci95", "median", "iqr"):
+            row[f"{stat}_{label}"] = fmt(group.get(f"{stat}_{metric}"), digits)
+    return row
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("results_dir", help="results/experiments-...")
     parser.add_argument("--matrix", help="Optional sweep_matrix.csv to update")
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help=f"Re-extract every run instead of reusing {CACHE_NAME}",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Extract per-run metrics in N worker processes (output is identical to serial)",
+    )
     args = parser.parse_args()
 
+    cache = MetricsCache(args.results_dir) if args.cache else None
+
     summary_rows = []
+    metric_rows = []
     invalid_rows = []
     run_entries = []
-    for name in os.listdir(args.results_dir):
-        run_dir = os.path.join(args.results_dir, name)
-        if not os.path.isdir(run_dir):
-            continue
+    for name in sorted(os.listdir(args.results_dir)):
+        if os.path.isdir(os.path.join(args.results_dir, name)) and parse_run_name(name):
+            run_entries.append(name)
+    run_metrics = collect_metrics(args.results_dir, run_entries, cache, args.workers)
+    matrix = read_matrix(args.matrix)
+
+    for name in run_entries:
         run_info = parse_run_name(name)
-        if not run_info:
-            continue
-        run_entries.append(name)
-        log_path = os.path.join(run_dir, "logs", "COOJA.testlog")
-        if not os.path.exists(log_path):
+        metrics = run_metrics[name]
+        if metrics is None:
             invalid_rows.append(
                 {
                     **run_info,
+                    "point": run_info["point"] if run_info["point"] is not None else "NA",
                     "run": name,
                     "reason": "missing_log",
                 }
             )
             continue
 
-        log_stats = parse_log(log_path)
-        exposure_path = os.path.join(run_dir, "exposure.csv")
-        parent_path = os.path.join(run_dir, "parent_switch.csv")
-        stats_path = os.path.join(run_dir, "stats.csv")
-
-        e1 = None
-        e3 = None
-        if os.path.exists(exposure_path):
-            last = read_last_row(exposure_path)
-            if last and len(last) >= 7:
-                try:
-                    e1 = float(last[5])
-                    e3 = float(last[6])
-                except ValueError:
-                    pass
-
-        parent_switch = None
-        if os.path.exists(parent_path):
-            parent_switch = read_parent_switch_avg(parent_path)
-        if parent_switch is None and os.path.exists(stats_path):
-            parent_switch = read_stats_last_switch(stats_path)
+        log_stats = metrics
+        e1 = metrics["e1"]
+        e3 = metrics["e3"]
+        parent_switch = metrics["parent_switch"]
 
         reasons = []
+        if matrix.get(name, {}).get("status") == "aborted":
+            # Watchdog-aborted runs only cover part of --sim-time.
+            reasons.append(f"aborted:{matrix[name].get('reason') or 'unknown'}")
         if log_stats["tx"] == 0:
             reasons.append("tx=0")
         if log_stats["rx"] == 0:
@@ -226,6 +379,7 @@ def main():
             invalid_rows.append(
                 {
                     **run_info,
+                    "point": run_info["point"] if run_info["point"] is not None else "NA",
                     "run": name,
                     "reason": ";".join(sorted(set(reasons))),
                 }
@@ -240,6 +394,7 @@ def main():
                 "trust": run_info["trust"],
                 "lambda": run_info["lambda"] if run_info["lambda"] is not None else "NA",
                 "gamma": run_info["gamma"] if run_info["gamma"] is not None else "NA",
+                "point": run_info["point"] if run_info["point"] is not None else "NA",
                 "seed": run_info["seed"],
                 "pdr": f"{log_stats['pdr']:.2f}",
                 "avg_delay_ms": f"{log_stats['avg_delay_ms']:.2f}",
@@ -251,6 +406,24 @@ def main():
                 "parent_switch_rate": f"{parent_switch:.4f}" if parent_switch is not None else "",
             }
         )
+        # Unrounded values for aggregation; the CSV above keeps its fixed precision.
+        metric_rows.append(
+            {
+                "topology": run_info["topology"],
+                "attack_rate": run_info["attack_rate"],
+                "trust": run_info["trust"],
+                "lambda": run_info["lambda"] if run_info["lambda"] is not None else "NA",
+                "gamma": run_info["gamma"] if run_info["gamma"] is not None else "NA",
+                "point": run_info["point"] if run_info["point"] is not None else "NA",
+                "pdr": log_stats["pdr"],
+                "e1": e1,
+                "parent_switch_rate": parent_switch,
+            }
+        )
+
+    if cache:
+        cache.save(run_entries)
+        print(f"[INFO] summary cache: {cache.hits} reused, {cache.misses} parsed")
 
     summary_rows_sorted = sorted(summary_rows, key=lambda r: r["run"])
     invalid_rows_sorted = sorted(invalid_rows, key=lambda r: r["run"])
@@ -266,6 +439,7 @@ def main():
             "trust",
             "lambda",
             "gamma",
+            "point",
             "seed",
             "pdr",
             "avg_delay_ms",
@@ -283,10 +457,12 @@ def main():
         [
             "run",
             "topology",
+            "scenario",
             "attack_rate",
             "trust",
             "lambda",
             "gamma",
+            "point",
             "seed",
             "reason",
         ],
@@ -299,7 +475,7 @@ def main():
             reader = csv.DictReader(handle)
             for row in reader:
                 status = row.get("status", "planned")
-                if row.get("run") in run_entries:
+                if row.get("run") in run_entries and status not in UNFINISHED_STATUSES:
                     status = "completed"
                 row["status"] = status
                 matrix_rows.append(row)
@@ -340,69 +516,29 @@ def main():
                 matrix_rows,
             )
 
-    grouped = defaultdict(list)
-    for row in summary_rows_sorted:
-        key = (
-            row["topology"],
-            int(row["attack_rate"]),
-            int(row["trust"]),
-            row["lambda"],
-            row["gamma"],
-        )
-        grouped[key].append(row)
-
-    aggregate_rows = []
-    for key, rows in sorted(grouped.items()):
-        pdr_values = [float(r["pdr"]) for r in rows]
-        e1_values = [float(r["e1"]) for r in rows if r["e1"] != ""]
-        ps_values = [
-            float(r["parent_switch_rate"])
-            for r in rows
-            if r["parent_switch_rate"] != ""
-        ]
-        aggregate_rows.append(
-            {
-                "topology": key[0],
-                "attack_rate": key[1],
-                "trust": key[2],
-                "lambda": key[3],
-                "gamma": key[4],
-                "n": len(rows),
-                "mean_pdr": f"{mean(pdr_values):.2f}" if pdr_values else "",
-                "std_pdr": f"{stddev(pdr_values):.2f}" if pdr_values else "",
-                "ci95_pdr": f"{ci95(pdr_values):.2f}" if pdr_values else "",
-                "mean_e1": f"{mean(e1_values):.4f}" if e1_values else "",
-                "std_e1": f"{stddev(e1_values):.4f}" if e1_values else "",
-                "ci95_e1": f"{ci95(e1_values):.4f}" if e1_values else "",
-                "mean_parent_switch": f"{mean(ps_values):.4f}" if ps_values else "",
-                "std_parent_switch": f"{stddev(ps_values):.4f}" if ps_values else "",
-                "ci95_parent_switch": f"{ci95(ps_values):.4f}" if ps_values else "",
-            }
-        )
+    metric_names = [m for m, _ in GROUP_METRICS]
+    aggregate_rows = [
+        format_aggregate_row(group)
+        for group in group_stats(metric_rows, GROUP_DIMS, metric_names)
+    ]
 
     aggregate_path = os.path.join(args.results_dir, "aggregate_by_group.csv")
     if aggregate_rows:
-        write_csv(
-            aggregate_path,
-            [
-                "topology",
-                "attack_rate",
-                "trust",
-                "lambda",
-                "gamma",
-                "n",
-                "mean_pdr",
-                "std_pdr",
-                "ci95_pdr",
-                "mean_e1",
-                "std_e1",
-                "ci95_e1",
-                "mean_parent_switch",
-                "std_parent_switch",
-                "ci95_parent_switch",
-            ],
-            aggregate_rows,
-        )
+        write_csv(aggregate_path, aggregate_fieldnames(), aggregate_rows)
+    # Sufficient statistics so merge_experiments.py can combine result dirs.
+    write_moments(
+        os.path.join(args.results_dir, MOMENTS_NAME),
+        GROUP_DIMS,
+        metric_names,
+        group_moments(metric_rows, GROUP_DIMS, metric_names),
+    )
+
+    stage_rows = stage_timings(os.path.join(args.results_dir, TIMINGS_NAME))
+    stage_path = os.path.join(args.results_dir, STAGE_TIMINGS_NAME)
+    if stage_rows:
+        write_csv(stage_path, STAGE_FIELDS, stage_rows)
+        slowest = ", ".join(f"{row['stage']} {float(row['share']) * 100:.1f}%" for row in stage_rows[:3] if row["share"])
+        print(f"[INFO] slowest stages: {slowest}")
 
     invalid_reasons = Counter(row["reason"] for row in invalid_rows_sorted)
     top_reasons = invalid_reasons.most_common(3)
@@ -422,6 +558,16 @@ def main():
             for reason, count in top_reasons:
                 handle.write(f"  - {reason}: {count}\n")
         handle.write("\n")
+        if stage_rows:
+            handle.write("## Where the Time Goes\n")
+            handle.write("| stage | total_s | share | mean_s | p95_s | max_s | slowest run |\n")
+            handle.write("|---|---|---|---|---|---|---|\n")
+            for row in stage_rows:
+                handle.write(
+                    f"| {row['stage']} | {row['total_s']} | {row['share']} | {row['mean_s']} | "
+                    f"{row['p95_s']} | {row['max_s']} | {row['max_run']} |\n"
+                )
+            handle.write("\n")
         handle.write("## Key Results (T3, attack=50)\n")
 
         t3_rows = [
@@ -496,8 +642,11 @@ def main():
         "summary": summary_path,
         "invalid": invalid_path,
         "aggregate": aggregate_path,
+        "moments": os.path.join(args.results_dir, MOMENTS_NAME),
         "report": report_path,
     }
+    if stage_rows:
+        summary_outputs["stage_timings"] = stage_path
     print(json.dumps(summary_outputs, indent=2))
 
 
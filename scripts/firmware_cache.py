@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for Cooja mote firmware.
+
+Each motetype build is keyed by the mote sources, project-conf.h, the
+contiki-ng-brpl commit and the exact make DEFINES string. A cached motetype
+gets its .cooja artifacts copied into the build directory and its
+<commands> replaced by a no-op, so Cooja loads the firmware without
+recompiling. Only builds that miss the cache trigger a clean rebuild.
+prebuild() fills the cache for every variant of a sweep up front.
+restore_builds()/store_builds() take the {motetype: build} map that
+csc_template.builds() derives from a parsed template, so the sweep runner
+never re-scans rendered XML; restore()/store() do the same for a rendered
+file and back the CLI.
+
+Usage from shell runners:
+  python3 scripts/firmware_cache.py restore --config configs/temp_X.csc
+  python3 scripts/firmware_cache.py store --config configs/temp_X.csc
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+CACHE_DIR = PROJECT_DIR / ".firmware_cache"
+CONTIKI_DIR = PROJECT_DIR / "contiki-ng-brpl"
+CACHED_COMMAND = "true"
+
+MOTETYPE_RE = re.compile(r"<motetype>.*?</motetype>", re.S)
+COMMANDS_RE = re.compile(r"<commands>(.*?)</commands>", re.S)
+MAKEFILE_RE = re.compile(r"-f\s+(\S+)")
+TARGET_RE = re.compile(r"(\w+)\.cooja\b")
+DEFINES_RE = re.compile(r"DEFINES=(\S*)")
+
+
+@lru_cache(maxsize=None)
+def source_digest(motes_dir=PROJECT_DIR / "motes"):
+    digest = hashlib.sha256()
+    sources = sorted(
+        path
+        for pattern in ("*.c", "*.h", "Makefile*")
+        for path in Path(motes_dir).glob(pattern)
+    )
+    sources.append(PROJECT_DIR / "project-conf.h")
+    for path in sources:
+        digest.update(path.name.encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def contiki_commit(contiki_dir=CONTIKI_DIR):
+    for cmd in (
+        ["git", "-C", str(contiki_dir), "rev-parse", "HEAD"],
+        ["git", "-C", str(PROJECT_DIR), "ls-tree", "HEAD", "contiki-ng-brpl"],
+    ):
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError):
+            continue
+        if out.strip():
+            return out.strip()
+    return "unknown"
+
+
+def parse_build(commands):
+    """Return (makefile, target, defines) for a mote make command, else None."""
+    makefile = MAKEFILE_RE.search(commands)
+    target = TARGET_RE.search(commands)
+    if not makefile or not target:
+        return None
+    defines = DEFINES_RE.search(commands)
+    return makefile.group(1), target.group(1), defines.group(1) if defines else ""
+
+
+def firmware_key(makefile, target, defines):
+    digest = hashlib.sha256()
+    for part in (source_digest(), contiki_commit(), makefile, target, defines):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def iter_builds(contents):
+    """Yield (commands_span, build, key) for each motetype built by make."""
+    for block in MOTETYPE_RE.finditer(contents):
+        commands = COMMANDS_RE.search(block.group(0))
+        if not commands:
+            continue
+        build = parse_build(commands.group(1))
+        if build is None:
+            continue
+        start = block.start() + commands.start(1)
+        end = block.start() + commands.end(1)
+        yield (start, end), build, firmware_key(*build)
+
+
+def artifact_paths(build_dir, target):
+    return sorted((Path(build_dir) / "cooja").glob(f"{target}.*"))
+
+
+def restore_builds(builds, build_dir, cache_dir=CACHE_DIR):
+    """Install cached firmware for {name: build}; returns (hit names, missed targets)."""
+    cache_dir = Path(cache_dir)
+    keys = {name: firmware_key(*build) for name, build in builds.items()}
+    hits = [name for name, key in keys.items() if (cache_dir / key).is_dir()]
+    misses = [builds[name][1] for name, key in keys.items() if not (cache_dir / key).is_dir()]
+    if misses:
+        # Contiki does not track DEFINES, so anything left in build/ may be stale.
+        shutil.rmtree(build_dir, ignore_errors=True)
+    out_dir = Path(build_dir) / "cooja"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in hits:
+        for artifact in (cache_dir / keys[name]).iterdir():
+            if artifact.name != "meta.json":
+                shutil.copy2(artifact, out_dir / artifact.name)
+    return hits, misses
+
+
+def restore(contents, build_dir, cache_dir=CACHE_DIR):
+    """Install cached firmware for hit motetypes; returns (contents, missed targets)."""
+    spans = {span: build for span, build, _key in iter_builds(contents)}
+    hits, misses = restore_builds(spans, build_dir, cache_dir)
+    for start, end in sorted(hits, reverse=True):
+        contents = contents[:start] + CACHED_COMMAND + contents[end:]
+    return contents, misses
+
+
+def commit_entry(cache_dir, key, build, artifacts):
+    """Atomically publish artifacts under cache_dir/key; False if it already exists."""
+    makefile, target, defines = build
+    staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir))
+    for artifact in artifacts:
+        shutil.copy2(artifact, staging / artifact.name)
+    with (staging / "meta.json").open("w") as handle:
+        json.dump(
+            {"makefile": makefile, "target": target, "defines": defines},
+            handle,
+            indent=2,
+        )
+    try:
+        staging.rename(cache_dir / key)
+        return True
+    except OSError:
+        # Another run stored the same key first.
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+
+def store_builds(builds, build_dir, cache_dir=CACHE_DIR):
+    """Copy freshly built artifacts of uncached {name: build} into the cache.
+
+    Only finished builds are stored: the linked {target}.cooja must exist, so
+    object files left by a build that was killed midway never get cached.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    stored = []
+    for build in builds.values():
+        key = firmware_key(*build)
+        artifacts = artifact_paths(build_dir, build[1])
+        if (cache_dir / key).is_dir() or not (Path(build_dir) / "cooja" / f"{build[1]}.cooja").is_file():
+            continue
+        if commit_entry(cache_dir, key, build, artifacts):
+            stored.append(build[1])
+    return stored
+
+
+def store(contents, build_dir, cache_dir=CACHE_DIR):
+    """Copy freshly built artifacts of uncached motetypes into the cache."""
+    return store_builds({span: build for span, build, _key in iter_builds(contents)}, build_dir, cache_dir)
+
+
+def build_variant(key, build, make_jobs, cache_dir=CACHE_DIR):
+    """Compile one variant into a private BUILD_DIR and publish it; returns (ok, output)."""
+    cache_dir = Path(cache_dir)
+    if (cache_dir / key).is_dir():
+        return True, ""
+    makefile, target, defines = build
+    build_dir = Path(tempfile.mkdtemp(prefix=f".build-{key}-", dir=cache_dir))
+    cmd = [
+        "make",
+        "-C",
+        str(PROJECT_DIR / "motes"),
+        "-f",
+        makefile,
+        f"-j{make_jobs}",
+        # Build the board artifact directly; the plain "<target>.cooja" goal
+        # also copies into motes/, which races between parallel variants.
+        f"{build_dir}/cooja/{target}.cooja",
+        "TARGET=cooja",
+        "WERROR=0",
+        f"DEFINES={defines}",
+        f"BUILD_DIR={build_dir}",
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        artifacts = artifact_paths(build_dir, target)
+        if proc.returncode != 0 or not artifacts:
+            return False, proc.stdout + proc.stderr
+        commit_entry(cache_dir, key, build, artifacts)
+        return True, ""
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def prebuild(variants, jobs, cache_dir=CACHE_DIR):
+    """Build {key: (makefile, target, defines)} variants concurrently; returns {key: (ok, output)}."""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    pending = {k: v for k, v in variants.items() if not (cache_dir / k).is_dir()}
+    results = {k: (True, "") for k in variants if k not in pending}
+    if not pending:
+        return results
+    workers = max(1, min(jobs, len(pending)))
+    make_jobs = max(1, (os.cpu_count() or 1) // workers)
+    # Each variant is an independent make process, so threads are enough here.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(build_variant, key, build, make_jobs, cache_dir): key
+            for key, build in pending.items()
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("action", choices=["restore", "store"])
+    ap.add_argument("--config", required=True, help="Rendered .csc (rewritten in place on restore)")
+    ap.add_argument("--build-dir", default=str(PROJECT_DIR / "motes" / "build"))
+    ap.add_argument("--cache-dir", default=str(CACHE_DIR))
+    args = ap.parse_args()
+
+    config = Path(args.config)
+    contents = config.read_text()
+    if args.action == "restore":
+        contents, misses = restore(contents, args.build_dir, args.cache_dir)
+        config.write_text(contents)
+        if misses:
+            print(f"firmware cache miss: {','.join(misses)} (clean rebuild)")
+        else:
+            print("firmware cache hit: all motetypes")
+    else:
+        stored = store(contents, args.build_dir, args.cache_dir)
+        if stored:
+            print(f"firmware cached: {','.join(stored)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,46 @@
 """
 Generate a random Cooja .csc topology with 1 root, 1 attacker, N-2 senders.
 Ensures each non-root node is within TX range of at least one earlier node.
+Candidates are drawn uniformly over the area; spatial grids keep the
+min-dist and connectivity checks to a few cells, so thousands of nodes
+take well under a second.
+
+Hop depth, node degree and the attacker's hop and subtree share can be
+targeted: --max-depth/--max-degree are enforced per candidate during
+placement, --min-depth/--min-degree steer the growth (deepest nodes first,
+under-connected nodes topped up), and the attacker's hop and subtree share
+are checked on the finished layout. A layout that still misses the spec is
+redrawn from a derived seed, up to --retries times, in milliseconds instead
+of after a simulation:
+
+  gen_random_topology.py --nodes 40 --max-depth 4 --min-depth 4 --attacker-hop 2 \\
+      --attacker-subtree 0.2:0.5 --min-degree 2 --outfile T2_d4.csc
+
+Batch mode builds an ensemble in a process pool and writes one manifest:
+
+  gen_random_topology.py --seed-range 1:201 --sizes 15 31 --outdir configs/topologies/ensemble
 """
 
 import argparse
+import csv
+import hashlib
+import math
+import os
 import random
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import topology_exposure
 
 
 def parse_args():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--outfile", required=True, help="Output .csc path")
+    ap.add_argument("--outfile", help="Output .csc path (single topology)")
+    ap.add_argument("--seed-range", help="Batch mode: seeds START:END (END exclusive)")
+    ap.add_argument("--sizes", type=int, nargs="+", help="Batch mode: node counts (default: --nodes)")
+    ap.add_argument("--outdir", help="Batch mode: directory for the .csc files and manifest.csv")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Batch mode: worker processes")
     ap.add_argument("--mode", choices=["brpl"], default="brpl")
     ap.add_argument("--nodes", type=int, default=31, help="Total nodes (>=3)")
     ap.add_argument("--seed", type=int, default=123456)
@@ -29,7 +59,66 @@ def parse_args():
     ap.add_argument("--attack-drop", type=int, default=50)
     ap.add_argument("--attacker-x", type=float, default=None)
     ap.add_argument("--attacker-y", type=float, default=None)
-    return ap.parse_args()
+    ap.add_argument(
+        "--attacker-placement",
+        choices=ATTACKER_PLACEMENTS,
+        default="random",
+        help="Pick the attacker node by betweenness towards the root (random keeps --attacker-id's spot)",
+    )
+    ap.add_argument("--attacker-percentile", type=float, default=50.0,
+                    help="Betweenness percentile for --attacker-placement percentile")
+    ap.add_argument("--attacker-exposure", type=float, default=None,
+                    help="Target exposure (0-1) for --attacker-placement exposure")
+    ap.add_argument("--max-depth", type=int, default=None, help="Max hop depth to the root (enforced while placing)")
+    ap.add_argument("--min-depth", type=int, default=None, help="Deepest node must be at least this many hops")
+    ap.add_argument("--max-degree", type=int, default=None, help="Max neighbours within TX range (enforced while placing)")
+    ap.add_argument("--min-degree", type=int, default=None, help="Min neighbours within TX range for every node")
+    ap.add_argument("--attacker-hop", type=int, default=None, help="Put the attacker on a node at this hop depth")
+    ap.add_argument(
+        "--attacker-subtree",
+        default=None,
+        metavar="LO:HI",
+        help="Attacker's subtree share (expected fraction of senders routed through it), e.g. 0.2:0.4",
+    )
+    ap.add_argument("--retries", type=int, default=200,
+                    help="Layouts to draw per seed before rejecting it when constraints are set")
+    args = ap.parse_args()
+    if args.attacker_placement != "random" and args.attacker_x is not None:
+        ap.error("--attacker-placement cannot be combined with --attacker-x/--attacker-y")
+    if args.attacker_subtree is not None:
+        try:
+            lo, hi = (float(v) for v in args.attacker_subtree.split(":"))
+        except ValueError:
+            ap.error("--attacker-subtree must be LO:HI")
+        if not 0.0 <= lo <= hi <= 1.0:
+            ap.error("--attacker-subtree needs 0 <= LO <= HI <= 1")
+        args.attacker_subtree = (lo, hi)
+    if (args.attacker_hop is not None or args.attacker_subtree is not None) and args.attacker_x is not None:
+        ap.error("--attacker-hop/--attacker-subtree cannot be combined with --attacker-x/--attacker-y")
+    if args.min_depth and args.max_depth and args.min_depth > args.max_depth:
+        ap.error("--min-depth is larger than --max-depth")
+    if args.min_degree and args.max_degree and args.min_degree > args.max_degree:
+        ap.error("--min-degree is larger than --max-degree")
+    if args.attacker_hop is not None and (args.attacker_hop < 1 or (args.max_depth and args.attacker_hop > args.max_depth)):
+        ap.error("--attacker-hop must be between 1 and --max-depth")
+    if args.attacker_placement == "exposure" and args.attacker_exposure is None:
+        ap.error("--attacker-placement exposure needs --attacker-exposure")
+    if args.seed_range:
+        if not args.outdir:
+            ap.error("--seed-range needs --outdir")
+        try:
+            start, end = (int(v) for v in args.seed_range.split(":"))
+        except ValueError:
+            ap.error("--seed-range must be START:END")
+        args.seed_list = list(range(start, end))
+    elif not args.outfile:
+        ap.error("--outfile is required (or use --seed-range/--outdir for a batch)")
+    return args
+
+
+ATTACKER_PLACEMENTS = ("random", "max", "median", "percentile", "exposure")
+# Upper bound on candidate draws per node (uniform), or around one node (steered).
+MAX_DRAWS = 2000
 
 
 def dist2(a, b):
@@ -38,35 +127,221 @@ def dist2(a, b):
     return dx * dx + dy * dy
 
 
-def place_nodes(n, rng, area, root_pos, tx_range, min_dist, fixed_positions, connect_ratio):
+def place_nodes(
+    n,
+    rng,
+    area,
+    root_pos,
+    tx_range,
+    min_dist,
+    fixed_positions,
+    connect_ratio,
+    attempts=30,
+    max_depth=None,
+    max_degree=None,
+    min_depth=None,
+    min_degree=None,
+):
+    """Random placement with grid-indexed checks.
+
+    Each new node is drawn uniformly over the area (up to MAX_DRAWS tries)
+    and accepted when it keeps min_dist from every placed node and lies
+    within connect_ratio * tx_range of at least one, so it is connected to an
+    earlier node by construction. Cell grids (min_dist/sqrt(2) for spacing,
+    connect range for links) make both checks a few cell lookups, and the
+    draws are the same as a scan over all placed nodes would make, so a seed
+    gives the same layout either way. Returns {node_id: (x, y)}, or None
+    when a node cannot be placed.
+
+    max_depth / max_degree are enforced per candidate: hop depth to the root
+    and neighbour counts (within tx_range) are kept up to date as nodes are
+    added, so a candidate that would sit deeper than max_depth, or push
+    itself or a neighbour past max_degree, is just another failed draw.
+    Adding a node can only shorten other nodes' depths, which an incremental
+    BFS from the new node propagates.
+
+    min_depth / min_degree steer the growth instead of being left to chance,
+    so they change the layout distribution on purpose: until the layout is
+    min_depth hops deep, nodes are drawn in the annulus [min_dist,
+    connect_ratio * tx_range] around the deepest nodes (one hop further
+    each); once min_depth is set, no candidate may shortcut an existing
+    depth. With min_degree, a node with too few neighbours is topped up (a
+    candidate in its annulus that has min_degree neighbours itself, `attempts`
+    tries) before uniform placement continues, and later nodes need
+    min_degree neighbours too.
+    """
+    reach = tx_range * connect_ratio
+    if min_dist > reach:
+        return None
+    reach2 = reach * reach
+    min2 = min_dist * min_dist
+    cell = min_dist / math.sqrt(2) if min_dist > 0 else reach
+    span = int(math.ceil(min_dist / cell))
+    half = area / 2.0
+    x_lo, x_hi = root_pos[0] - half, root_pos[0] + half
+    y_lo, y_hi = root_pos[1] - half, root_pos[1] + half
+    grid = {}
+    reach_grid = {}
+    # Link bookkeeping (tx_range cells), only needed for depth/degree limits.
+    track = bool(max_depth or max_degree or min_depth or min_degree)
+    tx2 = tx_range * tx_range
+    link_grid = {}
+    adj = {}
+    depth = {}
+    # Deepest finite depth; growth tips for min_depth; nodes below min_degree,
+    # and those that could not be topped up.
+    state = {"deepest": 0}
+    tips = []
+    low = set()
+    stuck = set()
+
+    def fits(p):
+        cx, cy = int(math.floor(p[0] / cell)), int(math.floor(p[1] / cell))
+        for gx in range(cx - span, cx + span + 1):
+            for gy in range(cy - span, cy + span + 1):
+                for q in grid.get((gx, gy), ()):
+                    if dist2(p, q) < min2:
+                        return False
+        return True
+
+    def connected(p):
+        cx, cy = int(math.floor(p[0] / reach)), int(math.floor(p[1] / reach))
+        return any(
+            dist2(p, q) <= reach2
+            for gx in (cx - 1, cx, cx + 1)
+            for gy in (cy - 1, cy, cy + 1)
+            for q in reach_grid.get((gx, gy), ())
+        )
+
+    def linked(p):
+        cx, cy = int(math.floor(p[0] / tx_range)), int(math.floor(p[1] / tx_range))
+        return [
+            other
+            for gx in (cx - 1, cx, cx + 1)
+            for gy in (cy - 1, cy, cy + 1)
+            for other in link_grid.get((gx, gy), ())
+            if dist2(p, positions[other]) <= tx2
+        ]
+
+    def admissible(p, mode):
+        """(ok, neighbours, depth) for a candidate under the depth / degree limits."""
+        neighbours = linked(p)
+        d = 1 + min((depth[m] for m in neighbours), default=math.inf)
+        if max_depth and d > max_depth:
+            return False, neighbours, d
+        if max_degree and (len(neighbours) > max_degree or any(len(adj[m]) >= max_degree for m in neighbours)):
+            return False, neighbours, d
+        if min_depth:
+            if mode == "deep" and d != state["deepest"] + 1:
+                return False, neighbours, d
+            if any(d + 1 < depth[m] < math.inf for m in neighbours):
+                return False, neighbours, d
+        if min_degree and mode != "deep" and len(neighbours) < min(min_degree, len(positions)):
+            return False, neighbours, d
+        return True, neighbours, d
+
+    def link(node_id, p, neighbours, d):
+        link_grid.setdefault((int(math.floor(p[0] / tx_range)), int(math.floor(p[1] / tx_range))), []).append(node_id)
+        adj[node_id] = list(neighbours)
+        for m in [node_id] + adj[node_id]:
+            if node_id != m:
+                adj[m].append(node_id)
+            if min_degree and len(adj[m]) < min_degree:
+                low.add(m)
+            else:
+                low.discard(m)
+        depth[node_id] = d
+        queue = deque([node_id])
+        while queue:
+            u = queue.popleft()
+            if depth[u] < math.inf:
+                state["deepest"] = max(state["deepest"], depth[u])
+            for w in adj[u]:
+                if depth[u] + 1 < depth[w]:
+                    depth[w] = depth[u] + 1
+                    queue.append(w)
+
+    def add(node_id, p):
+        grid.setdefault((int(math.floor(p[0] / cell)), int(math.floor(p[1] / cell))), []).append(p)
+        reach_grid.setdefault((int(math.floor(p[0] / reach)), int(math.floor(p[1] / reach))), []).append(p)
+        tips.append(node_id)
+
+    def pick():
+        """(mode, base node id or None) to place the next node from."""
+        if min_depth and state["deepest"] < min_depth:
+            deepest = [i for i, m in enumerate(tips) if depth[m] == state["deepest"]]
+            if deepest:
+                return "deep", rng.choice(deepest)
+        if low - stuck:
+            return "topup", min(low - stuck, key=lambda m: (len(adj[m]), m))
+        return "uniform", None
+
+    def draw_uniform():
+        """First valid uniform candidate in MAX_DRAWS draws, or None."""
+        for _ in range(MAX_DRAWS):
+            cand = (root_pos[0] + rng.uniform(-half, half), root_pos[1] + rng.uniform(-half, half))
+            if not fits(cand) or not connected(cand):
+                continue
+            if not track:
+                return cand, None, None
+            ok, neighbours, d = admissible(cand, "uniform")
+            if ok:
+                return cand, neighbours, d
+        return None
+
+    def draw_around(base, mode):
+        """First valid candidate around base in `attempts` in-area draws, or None."""
+        tries = draws = 0
+        while tries < attempts and draws < MAX_DRAWS:
+            draws += 1
+            # Uniform over the annulus area, not its radius.
+            r = math.sqrt(rng.uniform(min2, reach2))
+            theta = rng.uniform(0.0, 2.0 * math.pi)
+            cand = (base[0] + r * math.cos(theta), base[1] + r * math.sin(theta))
+            # Draws outside the area do not count, so small areas still fill.
+            if not (x_lo <= cand[0] <= x_hi and y_lo <= cand[1] <= y_hi):
+                continue
+            tries += 1
+            if fits(cand):
+                ok, neighbours, d = admissible(cand, mode)
+                if ok:
+                    return cand, neighbours, d
+        return None
+
     positions = {1: root_pos}
     if fixed_positions:
         positions.update(fixed_positions)
-    tx2 = tx_range * tx_range
-    connect2 = (tx_range * connect_ratio) ** 2
-    min2 = min_dist * min_dist
-    half = area / 2.0
+    for node_id, pos in positions.items():
+        add(node_id, pos)
+        if track:
+            link(node_id, pos, linked(pos), 0 if node_id == 1 else math.inf)
 
     for node_id in range(2, n + 1):
         if node_id in positions:
             continue
-        placed = False
-        for _ in range(2000):
-            x = root_pos[0] + rng.uniform(-half, half)
-            y = root_pos[1] + rng.uniform(-half, half)
-            cand = (x, y)
-
-            # Keep min distance from all nodes
-            if any(dist2(cand, p) < min2 for p in positions.values()):
-                continue
-
-            # Ensure connectivity to at least one existing node (stricter than TX)
-            if any(dist2(cand, p) <= connect2 for p in positions.values()):
-                positions[node_id] = cand
-                placed = True
-                break
-        if not placed:
-            return None
+        while True:
+            mode, index = pick()
+            if mode == "uniform":
+                found = draw_uniform()
+                if found is None:
+                    return None
+            else:
+                base = tips[index] if mode == "deep" else index
+                found = draw_around(positions[base], mode)
+                if found is None:
+                    if mode == "topup":
+                        stuck.add(base)
+                    else:
+                        # An exhausted growth tip.
+                        tips[index] = tips[-1]
+                        tips.pop()
+                    continue
+            cand, neighbours, d = found
+            positions[node_id] = cand
+            add(node_id, cand)
+            if track:
+                link(node_id, cand, neighbours, d)
+            break
     return positions
 
 
@@ -321,6 +596,275 @@ while(true) {{
         f.write(out)
 
 
+MANIFEST_FIELDS = [
+    "file",
+    "status",
+    "seed",
+    "nodes",
+    "attacker_id",
+    "attacker_x",
+    "attacker_y",
+    "attacker_root_dist",
+    "attacker_exposure",
+    "max_depth",
+    "attacker_hop",
+    "degree_min",
+    "degree_mean",
+    "degree_max",
+    "layout_hash",
+    "duplicate_of",
+    "attempts",
+    "reason",
+]
+
+
+def degrees(positions, tx_range):
+    """Per-node neighbour counts within tx_range, via a tx_range cell grid."""
+    grid = {}
+    for node_id, (x, y) in positions.items():
+        grid.setdefault((int(math.floor(x / tx_range)), int(math.floor(y / tx_range))), []).append(node_id)
+    tx2 = tx_range * tx_range
+    out = {}
+    for node_id, pos in positions.items():
+        cx, cy = int(math.floor(pos[0] / tx_range)), int(math.floor(pos[1] / tx_range))
+        count = 0
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for other in grid.get((gx, gy), ()):
+                    if other != node_id and dist2(pos, positions[other]) <= tx2:
+                        count += 1
+        out[node_id] = count
+    return out
+
+
+def layout_hash(positions):
+    """Digest of the coordinates as written to the .csc (2 decimals)."""
+    text = ";".join(f"{i}:{positions[i][0]:.2f},{positions[i][1]:.2f}" for i in sorted(positions))
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def node_exposures(positions, tx_range):
+    """{node: exposure an attacker there would have}, from root betweenness (one BFS)."""
+    adj = topology_exposure.unit_disk_graph(positions, tx_range)
+    delta = topology_exposure.root_betweenness(adj)
+    # Senders other than the attacker itself.
+    others = max(1, len(delta) - 1)
+    return {node: value / others for node, value in delta.items()}
+
+
+def choose_attacker(exposures, placement, percentile=50.0, target=None):
+    """Node whose exposure is the max, the median/percentile or closest to target."""
+    ranked = sorted(exposures, key=lambda node: (exposures[node], node))
+    if placement == "max":
+        return ranked[-1]
+    if placement == "exposure":
+        return min(ranked, key=lambda node: (abs(exposures[node] - target), node))
+    q = 50.0 if placement == "median" else percentile
+    index = int(round(min(max(q, 0.0), 100.0) / 100.0 * (len(ranked) - 1)))
+    return ranked[index]
+
+
+def assign_attacker(positions, args):
+    """Move --attacker-id onto the node chosen by --attacker-placement (swapping positions)."""
+    exposures = node_exposures(positions, args.tx_range)
+    if args.attacker_placement == "random" or not exposures:
+        return positions, exposures
+    node = choose_attacker(exposures, args.attacker_placement, args.attacker_percentile, args.attacker_exposure)
+    positions = dict(positions)
+    positions[node], positions[args.attacker_id] = positions[args.attacker_id], positions[node]
+    exposures[node], exposures[args.attacker_id] = exposures[args.attacker_id], exposures[node]
+    return positions, exposures
+
+
+def constrained(args):
+    return any(
+        value is not None
+        for value in (
+            args.max_depth,
+            args.min_depth,
+            args.max_degree,
+            args.min_degree,
+            args.attacker_hop,
+            args.attacker_subtree,
+        )
+    )
+
+
+def constrained_attacker(exposures, depth, args):
+    """Node for the attacker under --attacker-hop / --attacker-subtree, or None.
+
+    Candidates are ranked by --attacker-placement; random picks one with the
+    layout seed.
+    """
+    lo, hi = args.attacker_subtree or (0.0, 1.0)
+    candidates = {
+        node: value
+        for node, value in exposures.items()
+        if (args.attacker_hop is None or depth.get(node) == args.attacker_hop) and lo <= value <= hi
+    }
+    if not candidates:
+        return None
+    if args.attacker_placement == "random":
+        return random.Random(args.seed).choice(sorted(candidates))
+    return choose_attacker(candidates, args.attacker_placement, args.attacker_percentile, args.attacker_exposure)
+
+
+def check_constraints(positions, args):
+    """Apply the whole-layout constraints; returns (positions, reason), reason "" when met.
+
+    Depths and degrees only change monotonically while nodes are added (depths
+    shrink, degrees grow), so the max limits are enforced during placement and
+    the min limits are steered there; this final pass, O(V + E), confirms
+    them and picks the attacker under --attacker-hop / --attacker-subtree.
+    The subtree share is the attacker's exposure: the expected fraction of
+    senders routed through it.
+    """
+    adj = topology_exposure.unit_disk_graph(positions, args.tx_range)
+    depth, _sigma, _order = topology_exposure.bfs_paths(adj, 1)
+    if len(depth) < len(positions):
+        return positions, f"{len(positions) - len(depth)} nodes unreachable"
+    deepest = max(depth.values())
+    if args.min_depth and deepest < args.min_depth:
+        return positions, f"max depth {deepest} < --min-depth {args.min_depth}"
+    if args.max_depth and deepest > args.max_depth:
+        return positions, f"max depth {deepest} > --max-depth {args.max_depth}"
+    low = min(len(neighbours) for neighbours in adj.values())
+    high = max(len(neighbours) for neighbours in adj.values())
+    if args.min_degree and low < args.min_degree:
+        return positions, f"min degree {low} < --min-degree {args.min_degree}"
+    if args.max_degree and high > args.max_degree:
+        return positions, f"max degree {high} > --max-degree {args.max_degree}"
+    if args.attacker_hop is None and args.attacker_subtree is None:
+        return positions, ""
+
+    delta = topology_exposure.root_betweenness(adj)
+    others = max(1, len(delta) - 1)
+    exposures = {node: value / others for node, value in delta.items()}
+    node = constrained_attacker(exposures, depth, args)
+    if node is None:
+        hop = f"at hop {args.attacker_hop}" if args.attacker_hop is not None else "anywhere"
+        span = "" if args.attacker_subtree is None else " with subtree share in {:g}:{:g}".format(*args.attacker_subtree)
+        return positions, f"no attacker node {hop}{span}"
+    positions = dict(positions)
+    positions[node], positions[args.attacker_id] = positions[args.attacker_id], positions[node]
+    return positions, ""
+
+
+def place_for(args):
+    """Place one topology for args.seed/args.nodes.
+
+    Returns (args, positions or None, reason, attempts). With constraints set,
+    a layout that misses them is redrawn from a seed derived from args.seed
+    (attempt 0 uses args.seed itself), up to --retries draws; reason is the
+    last miss when none of them fits.
+    """
+    fixed_positions = {}
+    if args.attacker_x is not None and args.attacker_y is not None:
+        fixed_positions[args.attacker_id] = (args.attacker_x, args.attacker_y)
+    tries = max(1, args.retries) if constrained(args) else 1
+    reason = ""
+    for attempt in range(tries):
+        positions = place_nodes(
+            args.nodes,
+            random.Random(args.seed if attempt == 0 else f"{args.seed}/{attempt}"),
+            args.area,
+            (args.root_x, args.root_y),
+            args.tx_range,
+            args.min_dist,
+            fixed_positions,
+            args.connect_ratio,
+            max_depth=args.max_depth,
+            max_degree=args.max_degree,
+            min_depth=args.min_depth,
+            min_degree=args.min_degree,
+        )
+        if positions is None:
+            reason = "placement exhausted"
+            continue
+        if constrained(args):
+            positions, reason = check_constraints(positions, args)
+            if reason:
+                continue
+            if args.attacker_hop is not None or args.attacker_subtree is not None:
+                return args, positions, "", attempt + 1
+        if args.attacker_placement != "random":
+            positions, _exposures = assign_attacker(positions, args)
+        return args, positions, "", attempt + 1
+    return args, None, reason, tries
+
+
+def run_batch(args):
+    jobs = []
+    for nodes in args.sizes or [args.nodes]:
+        if nodes < 3 or args.attacker_id > nodes:
+            print(f"skipping --sizes {nodes}: needs >= 3 nodes and attacker-id <= nodes", file=sys.stderr)
+            continue
+        for seed in args.seed_list:
+            job = argparse.Namespace(**vars(args))
+            job.nodes, job.seed = nodes, seed
+            job.outfile = os.path.join(args.outdir, f"T2_random_{nodes}_seed{seed}.csc")
+            jobs.append(job)
+    os.makedirs(args.outdir, exist_ok=True)
+
+    rows = []
+    seen = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        chunk = max(1, len(jobs) // (4 * max(1, args.jobs)))
+        for job, positions, reason, attempts in pool.map(place_for, jobs, chunksize=chunk):
+            row = dict.fromkeys(MANIFEST_FIELDS, "")
+            row.update(seed=job.seed, nodes=job.nodes, attacker_id=job.attacker_id, attempts=attempts)
+            if positions is None:
+                row["status"] = "rejected" if constrained(job) and reason != "placement exhausted" else "failed"
+                row["reason"] = reason
+                rows.append(row)
+                continue
+            digest = layout_hash(positions)
+            deg = degrees(positions, job.tx_range)
+            ax, ay = positions[job.attacker_id]
+            depth, _sigma, _order = topology_exposure.bfs_paths(
+                topology_exposure.unit_disk_graph(positions, job.tx_range), 1
+            )
+            row.update(
+                layout_hash=digest,
+                attacker_x=f"{ax:.2f}",
+                attacker_y=f"{ay:.2f}",
+                attacker_root_dist=f"{math.sqrt(dist2((ax, ay), (job.root_x, job.root_y))):.2f}",
+                attacker_exposure=f"{node_exposures(positions, job.tx_range).get(job.attacker_id, 0.0):.4f}",
+                max_depth=max(depth.values()),
+                attacker_hop=depth.get(job.attacker_id, ""),
+                degree_min=min(deg.values()),
+                degree_mean=f"{sum(deg.values()) / len(deg):.2f}",
+                degree_max=max(deg.values()),
+            )
+            if digest in seen:
+                row["status"] = "duplicate"
+                row["duplicate_of"] = seen[digest]
+            else:
+                seen[digest] = os.path.basename(job.outfile)
+                row["status"] = "ok"
+                row["file"] = seen[digest]
+                write_csc(job, positions)
+            rows.append(row)
+
+    manifest = os.path.join(args.outdir, "manifest.csv")
+    with open(manifest, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    counts = {
+        status: sum(1 for r in rows if r["status"] == status) for status in ("ok", "duplicate", "rejected", "failed")
+    }
+    print(
+        f"{manifest}: ok={counts['ok']} duplicate={counts['duplicate']} "
+        f"rejected={counts['rejected']} failed={counts['failed']}"
+    )
+    if constrained(args):
+        drawn = sum(r["attempts"] for r in rows)
+        placed = counts["ok"] + counts["duplicate"]
+        print(f"constraint acceptance: {placed} of {drawn} layouts drawn ({100.0 * placed / max(1, drawn):.1f}%)")
+    return 1 if counts["failed"] else 0
+
+
 def main():
     args = parse_args()
     if args.nodes < 3:
@@ -330,33 +874,37 @@ def main():
         print("attacker-id must be between 2 and nodes", file=sys.stderr)
         sys.exit(1)
 
-    rng = random.Random(args.seed)
-    fixed_positions = {}
     if args.attacker_x is not None and args.attacker_y is not None:
         ax, ay = args.attacker_x, args.attacker_y
         if dist2((ax, ay), (args.root_x, args.root_y)) < (args.min_dist * args.min_dist):
             print("attacker too close to root (min-dist violation)", file=sys.stderr)
             sys.exit(1)
-        fixed_positions[args.attacker_id] = (ax, ay)
         # Ensure attacker is within range of at least one existing node (root)
         if dist2((ax, ay), (args.root_x, args.root_y)) > (args.tx_range * args.tx_range):
             print("attacker is out of TX range from root; may create disconnected topology", file=sys.stderr)
             sys.exit(1)
 
-    positions = place_nodes(
-        args.nodes,
-        rng,
-        args.area,
-        (args.root_x, args.root_y),
-        args.tx_range,
-        args.min_dist,
-        fixed_positions,
-        args.connect_ratio,
-    )
+    if args.seed_range:
+        sys.exit(run_batch(args))
+
+    _args, positions, reason, attempts = place_for(args)
     if positions is None:
-        print("Failed to place nodes with given constraints. Try larger area or smaller min-dist.", file=sys.stderr)
+        if reason != "placement exhausted":
+            print(f"Layout rejected after {attempts} draws: {reason}", file=sys.stderr)
+            sys.exit(1)
+        hint = " or relax --max-depth/--max-degree" if args.max_depth or args.max_degree else ""
+        print(
+            f"Failed to place nodes with given constraints. Try larger area or smaller min-dist{hint}.",
+            file=sys.stderr,
+        )
         sys.exit(1)
 
+    if constrained(args):
+        print(f"constraints met on draw {attempts} of up to {args.retries}")
+    if args.attacker_placement != "random" or args.attacker_hop is not None or args.attacker_subtree is not None:
+        exposure = node_exposures(positions, args.tx_range).get(args.attacker_id, 0.0)
+        print(f"attacker {args.attacker_id} at ({positions[args.attacker_id][0]:.2f}, "
+              f"{positions[args.attacker_id][1]:.2f}), predicted exposure {exposure:.4f}")
     write_csc(args, positions)
 
 
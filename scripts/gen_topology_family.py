@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Generate GRID / RING / CLUSTER / CORRIDOR topologies at any node count.
+
+The shapes follow the hand-made S/M/L files in configs/topologies (root at
+the centre, attacker as the highest node id) but are computed from a few
+parameters, so XL/XXL members need no hand placement. Both outputs are
+written side by side:
+
+  NAME.csv  node_id,x,y,role   (read by get_attacker_id_from_csv in run_experiments.sh)
+  NAME.csc  via gen_topology.write_csc
+
+  python3 scripts/gen_topology_family.py grid --nodes 200 --outdir configs/topologies
+  python3 scripts/gen_topology_family.py ring --nodes 120 --arms 3 --attacker max
+
+With the defaults every family reaches the root at any --nodes: a ring
+beyond --tx-range gets relay spokes, and each cluster's nearest node sits
+within --tx-range of the root.
+
+Attacker rules: near-root adds the attacker at --attacker-offset from the
+root (as in the shipped files). max / median pick the generated node with
+that betweenness towards the root. farthest picks the deepest node.
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import gen_topology
+import topology_exposure
+
+
+FAMILIES = ("grid", "ring", "cluster", "corridor")
+ATTACKER_RULES = ("near-root", "max", "median", "farthest")
+GOLDEN_ANGLE = math.pi * (3.0 - math.sqrt(5.0))
+# Spokes a ring gets by default once its radius is beyond --tx-range.
+DEFAULT_RING_ARMS = 4
+# Links the generator lays out itself are kept this far inside --tx-range.
+LINK_MARGIN = 0.9
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Parametric GRID/RING/CLUSTER/CORRIDOR topology generator.")
+    ap.add_argument("family", choices=FAMILIES)
+    ap.add_argument("--nodes", type=int, required=True, help="Total nodes including root and attacker")
+    ap.add_argument("--name", help="Output base name (default: FAMILY_NODES, e.g. GRID_200)")
+    ap.add_argument("--outdir", default="configs/topologies")
+    ap.add_argument("--root-x", type=float, default=100.0)
+    ap.add_argument("--root-y", type=float, default=100.0)
+    ap.add_argument("--spacing", type=float, default=None,
+                    help="Neighbour spacing (m); default 40 grid, 25 ring, 12 corridor, 10 cluster")
+    ap.add_argument("--arms", type=int, default=None,
+                    help=f"Ring: spokes of relays from the root to the ring (default 0 while the "
+                         f"ring is within --tx-range of the root, else {DEFAULT_RING_ARMS}). "
+                         "Corridor: arms leaving the root (default 2)")
+    ap.add_argument("--clusters", type=int, default=2, help="Cluster: number of clusters")
+    ap.add_argument("--cluster-radius", type=float, default=None,
+                    help="Cluster: radius of each cluster (default grows with its size)")
+    ap.add_argument("--cluster-distance", type=float, default=45.0,
+                    help="Cluster: distance from the root to the nearest node of each cluster "
+                         "(kept within --tx-range)")
+    ap.add_argument("--ring-radius", type=float, default=None,
+                    help="Ring: radius (default from --spacing and node count, at least 60)")
+    ap.add_argument("--width", type=int, default=1, help="Corridor: node rows across each arm")
+    ap.add_argument("--attacker", choices=ATTACKER_RULES, default="near-root")
+    ap.add_argument("--attacker-offset", type=float, default=20.0, help="near-root: distance from the root")
+    ap.add_argument("--tx-range", type=float, default=50.0)
+    ap.add_argument("--int-range", type=float, default=60.0)
+    ap.add_argument("--send-interval", type=int, default=30)
+    ap.add_argument("--warmup", type=int, default=120)
+    ap.add_argument("--attack-drop", type=int, default=50)
+    ap.add_argument("--motes-relpath", default="../motes")
+    return ap.parse_args()
+
+
+def grid_points(count, spacing, cx, cy):
+    """count points on a square lattice centred on (cx, cy), skipping the centre."""
+    side = 1
+    while side * side - 1 < count:
+        side += 1
+    offset = (side - 1) / 2.0
+    cells = []
+    for i in range(side):
+        for j in range(side):
+            x, y = (i - offset) * spacing, (j - offset) * spacing
+            if abs(x) < 1e-9 and abs(y) < 1e-9:
+                continue
+            cells.append((x * x + y * y, i, j, cx + x, cy + y))
+    # Inner cells first, so partial lattices stay compact around the root.
+    cells.sort()
+    return sorted(((x, y) for _d, i, j, x, y in cells[:count]), key=lambda p: (p[0], p[1]))
+
+
+def ring_points(count, spacing, arms, ring_radius, tx_range, cx, cy):
+    """count points on a ring around (cx, cy), plus relay spokes when arms is set.
+
+    arms=None derives the spokes: none while the ring is within tx_range of
+    the root, DEFAULT_RING_ARMS otherwise. Spoke relays are at most one link
+    (spacing, capped below tx_range) apart.
+    """
+    reach = LINK_MARGIN * tx_range
+
+    def radius_for(n):
+        if ring_radius:
+            return ring_radius
+        radius = max(60.0, n * spacing / (2 * math.pi))
+        # Few nodes on the minimum radius: pull them in so ring neighbours stay linked.
+        if n == 1:
+            return min(radius, reach)
+        return min(radius, reach / (2 * math.sin(math.pi / n)))
+
+    if arms is None:
+        arms = 0 if radius_for(count) <= reach else DEFAULT_RING_ARMS
+    spoke_len = 0
+    if arms:
+        # Relays along each spoke, at most `hop` metres apart, short of the ring.
+        hop = min(spacing, reach)
+        spoke_len = max(0, math.ceil(radius_for(count) / hop) - 1)
+        while arms * spoke_len > count // 2:
+            spoke_len -= 1
+    ring_count = count - arms * spoke_len
+    radius = radius_for(ring_count)
+    if not spoke_len and not ring_radius:
+        radius = min(radius, reach)
+    points = []
+    for k in range(ring_count):
+        theta = 2 * math.pi * k / ring_count
+        points.append((cx + radius * math.cos(theta), cy + radius * math.sin(theta)))
+    for a in range(arms):
+        theta = 2 * math.pi * a / arms
+        step = radius / (spoke_len + 1) if spoke_len else 0.0
+        for k in range(1, spoke_len + 1):
+            points.append((cx + k * step * math.cos(theta), cy + k * step * math.sin(theta)))
+    return points
+
+
+def cluster_points(count, clusters, spacing, cluster_radius, distance, tx_range, cx, cy):
+    """Sunflower-packed clusters around (cx, cy).
+
+    Each centre is placed so the cluster's nearest node is `distance` from
+    the root (capped below tx_range), not its nominal edge: sunflower points
+    need not reach the edge facing the root.
+    """
+    edge = min(distance, LINK_MARGIN * tx_range)
+    points = []
+    sizes = [count // clusters + (1 if c < count % clusters else 0) for c in range(clusters)]
+    for c, size in enumerate(sizes):
+        if not size:
+            continue
+        # Sunflower packing keeps neighbours about `spacing` apart for any size.
+        radius = cluster_radius or spacing * math.sqrt(size) / 1.8
+        offsets = []
+        for k in range(size):
+            r = radius * math.sqrt((k + 0.5) / size)
+            phi = k * GOLDEN_ANGLE
+            offsets.append((r * math.cos(phi), r * math.sin(phi)))
+        theta = math.pi + 2 * math.pi * c / clusters
+        ux, uy = math.cos(theta), math.sin(theta)
+        # Slide the centre along its bearing until the nearest node sits at `edge`.
+        centre_dist = edge + radius
+        for _ in range(8):
+            nearest = min(math.hypot(centre_dist * ux + ox, centre_dist * uy + oy) for ox, oy in offsets)
+            if abs(nearest - edge) < 1e-6:
+                break
+            centre_dist += edge - nearest
+        centre = (cx + centre_dist * ux, cy + centre_dist * uy)
+        points.extend((centre[0] + ox, centre[1] + oy) for ox, oy in offsets)
+    return points
+
+
+def corridor_points(count, spacing, arms, width, cx, cy):
+    points = []
+    per_arm = [count // arms + (1 if a < count % arms else 0) for a in range(arms)]
+    for a, size in enumerate(per_arm):
+        theta = math.pi + 2 * math.pi * a / arms
+        ux, uy = math.cos(theta), math.sin(theta)
+        for k in range(size):
+            step, lane = divmod(k, width)
+            along = (step + 1) * spacing
+            across = (lane - (width - 1) / 2.0) * spacing
+            points.append((cx + along * ux - across * uy, cy + along * uy + across * ux))
+    return points
+
+
+def family_points(args, count):
+    cx, cy = args.root_x, args.root_y
+    if args.family == "grid":
+        return grid_points(count, args.spacing or 40.0, cx, cy)
+    if args.family == "ring":
+        return ring_points(count, args.spacing or 25.0, args.arms, args.ring_radius, args.tx_range, cx, cy)
+    if args.family == "cluster":
+        return cluster_points(
+            count,
+            max(1, args.clusters),
+            args.spacing or 10.0,
+            args.cluster_radius,
+            args.cluster_distance,
+            args.tx_range,
+            cx,
+            cy,
+        )
+    arms = args.arms if args.arms is not None else 2
+    return corridor_points(count, args.spacing or 12.0, max(1, arms), max(1, args.width), cx, cy)
+
+
+def build_nodes(args):
+    """{node_id: (x, y, role)} with the root as 1 and the attacker as the last id."""
+    root = (args.root_x, args.root_y)
+    near_root = args.attacker == "near-root"
+    points = family_points(args, args.nodes - (2 if near_root else 1))
+    positions = {1: root}
+    for index, point in enumerate(points, start=2):
+        positions[index] = point
+    attacker_id = args.nodes
+    if near_root:
+        positions[attacker_id] = (root[0], root[1] + args.attacker_offset)
+    else:
+        adj = topology_exposure.unit_disk_graph(positions, args.tx_range)
+        if args.attacker == "farthest":
+            depth, _sigma, _order = topology_exposure.bfs_paths(adj, 1)
+            score = {n: depth[n] for n in depth if n != 1}
+        else:
+            score = topology_exposure.root_betweenness(adj)
+        ranked = sorted(score, key=lambda n: (score[n], n))
+        chosen = ranked[-1] if args.attacker in ("max", "farthest") else ranked[(len(ranked) - 1) // 2]
+        positions[chosen], positions[attacker_id] = positions[attacker_id], positions[chosen]
+    return {
+        node_id: (x, y, "root" if node_id == 1 else "attacker" if node_id == attacker_id else "sender")
+        for node_id, (x, y) in positions.items()
+    }
+
+
+def write_positions(path, nodes):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("node_id,x,y,role\n")
+        for node_id in sorted(nodes):
+            x, y, role = nodes[node_id]
+            f.write(f"{node_id},{x:.2f},{y:.2f},{role}\n")
+
+
+def main():
+    args = parse_args()
+    if args.nodes < 3:
+        print("nodes must be >= 3", file=sys.stderr)
+        sys.exit(1)
+    name = args.name or f"{args.family.upper()}_{args.nodes}"
+    nodes = build_nodes(args)
+
+    positions = {node_id: (x, y) for node_id, (x, y, _role) in nodes.items()}
+    adj = topology_exposure.unit_disk_graph(positions, args.tx_range)
+    depth, _sigma, _order = topology_exposure.bfs_paths(adj, 1)
+    if len(depth) < len(positions):
+        print(
+            f"{len(positions) - len(depth)} nodes cannot reach the root at tx-range {args.tx_range}; "
+            "reduce --spacing or add --arms",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    os.makedirs(args.outdir, exist_ok=True)
+    csv_path = os.path.join(args.outdir, f"{name}.csv")
+    csc_path = os.path.join(args.outdir, f"{name}.csc")
+    write_positions(csv_path, nodes)
+    csc_args = argparse.Namespace(
+        outfile=csc_path,
+        tx_range=args.tx_range,
+        int_range=args.int_range,
+        send_interval=args.send_interval,
+        warmup=args.warmup,
+        attack_drop=args.attack_drop,
+        title=f"{args.family.upper()} Topology {args.nodes}",
+        motes_relpath=args.motes_relpath,
+    )
+    gen_topology.write_csc(csc_args, nodes)
+
+    attacker_id = args.nodes
+    fractions = topology_exposure.path_fractions(adj, attacker_id)
+    exposure = sum(fractions.values()) / len(fractions) if fractions else 0.0
+    print(f"{csc_path}: {len(nodes)} nodes, max depth {max(depth.values())}, "
+          f"attacker {attacker_id} at hop {depth[attacker_id]}, predicted exposure {exposure:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Group-by statistics over summary rows.
+
+group_stats(rows, dims, metrics) groups rows on any combination of columns
+(topology, attack_rate, trust, lambda, gamma, attack_mode, sink_delta,
+trust_alpha, ...). For every metric it returns n, mean, sample std, ci95,
+median, q1, q3 and iqr per group. Missing or non-numeric values only
+reduce that metric's n; the row still counts toward the other metrics.
+
+When numpy is available the statistics are computed with bincount and one
+lexsort per metric. Otherwise a pure-Python path computes the same values.
+"""
+
+import csv
+import math
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+
+STATS = ("n", "mean", "std", "ci95", "median", "q1", "q3", "iqr")
+
+
+def to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        out = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(out) else out
+
+
+def group_keys(rows, dims):
+    """Return (sorted unique keys, per-row group index)."""
+    index = {}
+    codes = []
+    for row in rows:
+        key = tuple(row.get(dim, "") for dim in dims)
+        codes.append(index.setdefault(key, len(index)))
+    keys = list(index)
+    order = sorted(range(len(keys)), key=lambda i: sort_key(keys[i]))
+    remap = [0] * len(keys)
+    for new, old in enumerate(order):
+        remap[old] = new
+    return [keys[i] for i in order], [remap[c] for c in codes]
+
+
+def sort_key(key):
+    """Order group keys numerically where possible, so 10 sorts after 9."""
+    out = []
+    for value in key:
+        num = to_float(value)
+        out.append((0, num, "") if num is not None else (1, 0.0, str(value)))
+    return tuple(out)
+
+
+def _quantile_sorted(values, q):
+    # Linear interpolation between closest ranks (numpy's default method).
+    pos = q * (len(values) - 1)
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def _stats_python(codes, values, groups):
+    buckets = [[] for _ in range(groups)]
+    for code, value in zip(codes, values):
+        if value is not None:
+            buckets[code].append(value)
+    out = []
+    for bucket in buckets:
+        n = len(bucket)
+        if n == 0:
+            out.append(dict.fromkeys(STATS[1:], None) | {"n": 0})
+            continue
+        bucket.sort()
+        mu = sum(bucket) / n
+        std = math.sqrt(sum((v - mu) ** 2 for v in bucket) / (n - 1)) if n > 1 else 0.0
+        q1 = _quantile_sorted(bucket, 0.25)
+        q3 = _quantile_sorted(bucket, 0.75)
+        out.append(
+            {
+                "n": n,
+                "mean": mu,
+                "std": std,
+                "ci95": 1.96 * std / math.sqrt(n) if n > 1 else 0.0,
+                "median": _quantile_sorted(bucket, 0.5),
+                "q1": q1,
+                "q3": q3,
+                "iqr": q3 - q1,
+            }
+        )
+    return out
+
+
+def _stats_numpy(codes, values, groups):
+    codes = np.asarray(codes, dtype=np.int64)
+    vals = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    mask = ~np.isnan(vals)
+    codes, vals = codes[mask], vals[mask]
+    n = np.bincount(codes, minlength=groups)
+    safe_n = np.maximum(n, 1)
+    mu = np.bincount(codes, weights=vals, minlength=groups) / safe_n
+    sq = np.bincount(codes, weights=(vals - mu[codes]) ** 2, minlength=groups)
+    std = np.where(n > 1, np.sqrt(sq / np.maximum(n - 1, 1)), 0.0)
+    ci95 = np.where(n > 1, 1.96 * std / np.sqrt(safe_n), 0.0)
+
+    # Sort by (group, value) once; each group is then a contiguous slice.
+    order = np.lexsort((vals, codes))
+    ordered = vals[order]
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))
+
+    def quantile(q):
+        pos = q * np.maximum(n - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+        if ordered.size == 0:
+            return np.zeros(groups)
+        lo_idx = np.minimum(starts + lo, ordered.size - 1)
+        hi_idx = np.minimum(starts + hi, ordered.size - 1)
+        return ordered[lo_idx] + (ordered[hi_idx] - ordered[lo_idx]) * (pos - lo)
+
+    median, q1, q3 = quantile(0.5), quantile(0.25), quantile(0.75)
+    out = []
+    for g in range(groups):
+        if n[g] == 0:
+            out.append(dict.fromkeys(STATS[1:], None) | {"n": 0})
+            continue
+        out.append(
+            {
+                "n": int(n[g]),
+                "mean": float(mu[g]),
+                "std": float(std[g]),
+                "ci95": float(ci95[g]),
+                "median": float(median[g]),
+                "q1": float(q1[g]),
+                "q3": float(q3[g]),
+                "iqr": float(q3[g] - q1[g]),
+            }
+        )
+    return out
+
+
+def group_stats(rows, dims, metrics):
+    """Return one dict per group: dims, "n" (rows) and {stat}_{metric} for every metric."""
+    keys, codes = group_keys(rows, dims)
+    compute = _stats_numpy if np is not None else _stats_python
+    per_metric = {
+        metric: compute(codes, [to_float(row.get(metric)) for row in rows], len(keys))
+        for metric in metrics
+    }
+    sizes = [0] * len(keys)
+    for code in codes:
+        sizes[code] += 1
+    out = []
+    for g, key in enumerate(keys):
+        entry = dict(zip(dims, key))
+        entry["n"] = sizes[g]
+        for metric in metrics:
+            for stat, value in per_metric[metric][g].items():
+                entry[f"{stat}_{metric}"] = value
+        out.append(entry)
+    return out
+
+
+def fmt(value, digits):
+    return "" if value is None else f"{value:.{digits}f}"
+
+
+# Mergeable per-group moments (count, mean, M2, min, max). Two sets of moments
+# combine exactly (Chan et al.), so experiment directories can be merged
+# without re-reading their runs.
+MOMENT_FIELDS = ("count", "mean", "m2", "min", "max")
+
+
+def empty_moments():
+    return {"count": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None}
+
+
+def add_value(m, value):
+    """Welford update of moments m with one value."""
+    m["count"] += 1
+    delta = value - m["mean"]
+    m["mean"] += delta / m["count"]
+    m["m2"] += delta * (value - m["mean"])
+    m["min"] = value if m["min"] is None else min(m["min"], value)
+    m["max"] = value if m["max"] is None else max(m["max"], value)
+
+
+def merge_moments(a, b):
+    if b["count"] == 0:
+        return dict(a)
+    if a["count"] == 0:
+        return dict(b)
+    count = a["count"] + b["count"]
+    delta = b["mean"] - a["mean"]
+    return {
+        "count": count,
+        "mean": a["mean"] + delta * b["count"] / count,
+        "m2": a["m2"] + b["m2"] + delta * delta * a["count"] * b["count"] / count,
+        "min": min(a["min"], b["min"]),
+        "max": max(a["max"], b["max"]),
+    }
+
+
+def moment_stats(m):
+    """mean/std/ci95 from moments, matching group_stats() conventions."""
+    n = m["count"]
+    if n == 0:
+        return {"n": 0, "mean": None, "std": None, "ci95": None, "min": None, "max": None}
+    std = math.sqrt(m["m2"] / (n - 1)) if n > 1 else 0.0
+    return {
+        "n": n,
+        "mean": m["mean"],
+        "std": std,
+        "ci95": 1.96 * std / math.sqrt(n) if n > 1 else 0.0,
+        "min": m["min"],
+        "max": m["max"],
+    }
+
+
+def group_moments(rows, dims, metrics):
+    """Return {key: {"n": rows, metric: moments}} in one pass over rows."""
+    groups = {}
+    for row in rows:
+        key = tuple(row.get(dim, "") for dim in dims)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"n": 0, **{metric: empty_moments() for metric in metrics}}
+        group["n"] += 1
+        for metric in metrics:
+            value = to_float(row.get(metric))
+            if value is not None:
+                add_value(group[metric], value)
+    return groups
+
+
+def moment_fieldnames(dims, metrics):
+    return list(dims) + ["n"] + [f"{metric}_{field}" for metric in metrics for field in MOMENT_FIELDS]
+
+
+def write_moments(path, dims, metrics, groups):
+    """Write group moments as CSV; floats use repr so they round-trip exactly."""
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(moment_fieldnames(dims, metrics))
+        for key in sorted(groups, key=sort_key):
+            group = groups[key]
+            row = list(key) + [group["n"]]
+            for metric in metrics:
+                m = group[metric]
+                row += [m["count"], repr(m["mean"]), repr(m["m2"])]
+                row += ["" if m["min"] is None else repr(m["min"]), "" if m["max"] is None else repr(m["max"])]
+            writer.writerow(row)
+
+
+def read_moments(path):
+    """Return (dims, metrics, groups) from a file written by write_moments()."""
+    with open(path, newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        split = header.index("n")
+        dims = header[:split]
+        metrics = [name[: -len("_count")] for name in header[split + 1:] if name.endswith("_count")]
+        groups = {}
+        for row in reader:
+            if not row:
+                continue
+            record = dict(zip(header, row))
+            group = {"n": int(record["n"])}
+            for metric in metrics:
+                group[metric] = {
+                    "count": int(record[f"{metric}_count"]),
+                    "mean": float(record[f"{metric}_mean"]),
+                    "m2": float(record[f"{metric}_m2"]),
+                    "min": to_float(record[f"{metric}_min"]),
+                    "max": to_float(record[f"{metric}_max"]),
+                }
+            groups[tuple(row[:split])] = group
+    return dims, metrics, groups
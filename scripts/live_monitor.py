@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Follow a growing COOJA.testlog and publish running metrics while a run is in flight.
+
+New data is picked up through inotify (ctypes, Linux). Where inotify is
+unavailable the monitor falls back to polling. Every line costs O(1):
+PDR, E1 exposure, delay and parent-switch counters are updated
+incrementally with the same definitions and units (PDR and E1 in
+percent) as experiment_summary.py and trust_engine. Every --interval
+simulated seconds the monitor rewrites live_snapshot.json atomically and
+appends a row to live_progress.csv, so rx=0 / routing_not_ready runs
+show up minutes into the simulation. With --stop-on-converge it exits as
+soon as PDR and E1 have settled, which run_trust_sweep --early-stop uses
+to end Cooja ahead of --sim-time. --abort-on-failure likewise exits,
+after the grace period, on tx=0 or routing_not_ready (a routing wait or
+ROUTING_WAIT_TIMEOUT with tx=0 or rx=0, as experiment_summary.py counts
+it), with the reason in "failure"; one slow mote's ROUTING_WAIT_TIMEOUT
+alone does not end the run. Simulated time comes from the mote clock
+fields of TX/RX records (Cooja's CLOCK_SECOND is 1000). Before any TX,
+snapshots and the grace period run on ROUTING_WAIT polls instead (one
+per waiting mote every ROUTING_POLL_INT); "elapsed_s" is whichever clock
+is ahead, so a run whose DODAG never forms is still published and
+caught.
+
+  python3 scripts/live_monitor.py results/.../run_dir --interval 30
+"""
+
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from cooja_testlog import READ_BUFFER, TestlogReader
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+
+SNAPSHOT_NAME = "live_snapshot.json"
+PROGRESS_NAME = "live_progress.csv"
+# Warnings that make a run worthless; --abort-on-failure stops on the first one.
+FATAL_WARNINGS = ("routing_not_ready", "tx=0")
+PROGRESS_FIELDS = [
+    "sim_time_s",
+    "elapsed_s",
+    "lines",
+    "tx",
+    "rx",
+    "pdr",
+    "avg_delay_ms",
+    "e1",
+    "parent_switch_rate",
+    "warnings",
+]
+
+
+class FileWatcher:
+    """Blocks until path (or its directory, before the file exists) changes."""
+
+    def __init__(self, path, poll_ms=500):
+        self.path = Path(path)
+        self.poll_s = poll_ms / 1000.0
+        self.fd = None
+        self.watching_file = False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            fd = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd >= 0:
+            self.fd = fd
+            self._rewatch()
+
+    @property
+    def mode(self):
+        return "inotify" if self.fd is not None else "poll"
+
+    def _rewatch(self):
+        if self.path.exists():
+            target, mask = self.path, IN_MODIFY | IN_CLOSE_WRITE
+            self.watching_file = True
+        else:
+            target, mask = self.path.parent, IN_CREATE
+        if self._add_watch(self.fd, os.fsencode(str(target)), mask) < 0:
+            os.close(self.fd)
+            self.fd = None
+
+    def wait(self, timeout):
+        """Return after a change notification, or after timeout seconds at most."""
+        if self.fd is None:
+            time.sleep(min(timeout, self.poll_s))
+            return
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            os.read(self.fd, 64 * 1024)  # drain; the event details are not needed
+        if not self.watching_file and self.path.exists():
+            self._rewatch()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class LiveStats:
+    """Incremental run counters fed by a TestlogReader."""
+
+    def __init__(self, reader, attacker_id=2, ticks_per_second=1000, routing_poll_s=2.0):
+        self.attacker_id = attacker_id
+        self.ticks_per_second = ticks_per_second
+        self.routing_poll_s = routing_poll_s
+        self.clock = 0
+        self.motes = set()
+        self.routing_polls = 0
+        self.tx = set()
+        self.rx = set()
+        self.delivered = set()
+        self.passed_attacker = set()
+        self.e1_num = 0
+        self.delay_sum = 0
+        self.delay_count = 0
+        self.parents = {}
+        self.parent_samples = 0
+        self.parent_changes = 0
+        self.switch_rate_sum = 0.0
+        self.routing_wait = False
+        self.routing_timeout = False
+        self.finished = False
+        reader.on("TX", self._on_tx)
+        reader.on("RX", self._on_rx)
+        reader.on("DELAY", self._on_delay)
+        reader.on("FWD_PKT", self._on_fwd_pkt)
+        reader.on("PARENT", self._on_parent)
+        reader.on("MARKER", self._on_marker)
+        reader.on("LLADDR", self._on_lladdr)
+
+    @property
+    def sim_time_s(self):
+        return self.clock / self.ticks_per_second
+
+    @property
+    def routing_clock_s(self):
+        """Simulated time implied by ROUTING_WAIT polls, which need no TX.
+
+        Each mote still waiting for a route prints one poll every
+        ROUTING_POLL_INT (routing_poll_s); spread over the motes that have
+        booted (CSV,LLADDR) that is a lower bound on the elapsed time.
+        """
+        return self.routing_polls * self.routing_poll_s / max(1, len(self.motes))
+
+    @property
+    def elapsed_s(self):
+        """Simulated seconds so far from whichever clock is ahead."""
+        return max(self.sim_time_s, self.routing_clock_s)
+
+    def _on_tx(self, ev):
+        self.tx.add((ev.node, ev.seq))
+        if ev.t0 is not None and ev.t0 > self.clock:
+            self.clock = ev.t0
+
+    def _on_rx(self, ev):
+        self.rx.add((ev.src_node, ev.seq))
+        if ev.t_recv is not None and ev.t_recv > self.clock:
+            self.clock = ev.t_recv
+        if not ev.root_tagged or ev.src_node is None:
+            return
+        # E1 as in trust_engine: delivered packets that also crossed the attacker.
+        key = (ev.src_node << 32) | (ev.seq & 0xFFFFFFFF)
+        if key not in self.delivered:
+            self.delivered.add(key)
+            if key in self.passed_attacker:
+                self.e1_num += 1
+
+    def _on_fwd_pkt(self, ev):
+        if ev.node != self.attacker_id:
+            return
+        key = (ev.src << 32) | (ev.seq & 0xFFFFFFFF)
+        if key not in self.passed_attacker:
+            self.passed_attacker.add(key)
+            if key in self.delivered:
+                self.e1_num += 1
+
+    def _on_delay(self, ev):
+        self.delay_sum += ev.delay
+        self.delay_count += 1
+
+    def _on_parent(self, ev):
+        # Per-node switch rate = changes / (samples - 1), averaged over nodes.
+        state = self.parents.get(ev.node)
+        if state is None:
+            self.parents[ev.node] = [1, 0, ev.parent]
+            self.parent_samples += 1
+            return
+        old_rate = state[1] / (state[0] - 1) if state[0] > 1 else 0.0
+        state[0] += 1
+        if ev.parent != state[2]:
+            state[1] += 1
+            self.parent_changes += 1
+        state[2] = ev.parent
+        self.parent_samples += 1
+        self.switch_rate_sum += state[1] / (state[0] - 1) - old_rate
+
+    def _on_lladdr(self, ev):
+        if ev.fields:
+            self.motes.add(ev.fields[0])
+
+    def _on_marker(self, ev):
+        if ev.name == "ROUTING_WAIT_TIMEOUT":
+            self.routing_timeout = True
+        elif ev.name == "ROUTING_WAIT":
+            self.routing_wait = True
+            self.routing_polls += 1
+        elif ev.name == "SIMULATION_FINISHED":
+            self.finished = True
+
+    def warnings(self, grace_s):
+        """experiment_summary-style invalid reasons, once grace_s has passed.
+
+        The grace period runs on elapsed_s, so a run that never transmits
+        (DODAG never formed) is still flagged once its motes have polled
+        for a route past grace_s.
+        """
+        if self.elapsed_s < grace_s and not self.finished:
+            return []
+        reasons = []
+        if not self.tx:
+            reasons.append("tx=0")
+        if not self.rx:
+            reasons.append("rx=0")
+        if (not self.tx or not self.rx) and (self.routing_timeout or self.routing_wait):
+            reasons.append("routing_not_ready")
+        return reasons
+
+    def snapshot(self, line_no, grace_s):
+        tx, rx = len(self.tx), len(self.rx)
+        e1_den = len(self.delivered)
+        return {
+            "sim_time_s": round(self.sim_time_s, 3),
+            "elapsed_s": round(self.elapsed_s, 3),
+            "lines": line_no,
+            "tx": tx,
+            "rx": rx,
+            "pdr": round(rx * 100 / tx, 2) if tx else None,
+            "avg_delay_ms": round(self.delay_sum / self.delay_count, 2) if self.delay_count else None,
+            # Percent, as trust_engine's exposure.csv and the summaries report it.
+            "e1": round(self.e1_num * 100 / e1_den, 4) if e1_den else None,
+            "e1_num": self.e1_num,
+            "e1_den": e1_den,
+            "parent_samples": self.parent_samples,
+            "parent_changes": self.parent_changes,
+            "parent_switch_rate": (
+                round(self.switch_rate_sum / len(self.parents), 4) if self.parents else None
+            ),
+            "routing_wait": self.routing_wait,
+            "routing_timeout": self.routing_timeout,
+            "finished": self.finished,
+            "warnings": self.warnings(grace_s),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+
+class ConvergenceTracker:
+    """True once PDR and E1 stayed within tolerance over the last `windows` snapshots."""
+
+    def __init__(self, windows=3, pdr_tol=1.0, e1_tol=1.0, after_s=0.0):
+        self.history = deque(maxlen=windows + 1)
+        self.pdr_tol = pdr_tol
+        self.e1_tol = e1_tol
+        self.after_s = after_s
+
+    def update(self, snap):
+        if snap["sim_time_s"] < self.after_s or snap["warnings"] or snap["pdr"] is None:
+            self.history.clear()
+            return False
+        self.history.append((snap["pdr"], snap["e1"]))
+        if len(self.history) < self.history.maxlen:
+            return False
+        pdrs = [p for p, _ in self.history]
+        if max(pdrs) - min(pdrs) > self.pdr_tol:
+            return False
+        e1s = [e for _, e in self.history]
+        if all(e is None for e in e1s):
+            return True
+        if any(e is None for e in e1s):
+            return False
+        return max(e1s) - min(e1s) <= self.e1_tol
+
+
+def publish(out_dir, snapshot):
+    tmp_path = out_dir / (SNAPSHOT_NAME + ".tmp")
+    tmp_path.write_text(json.dumps(snapshot, indent=2) + "\n")
+    os.replace(tmp_path, out_dir / SNAPSHOT_NAME)
+    progress = out_dir / PROGRESS_NAME
+    new = not progress.exists()
+    with progress.open("a", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=PROGRESS_FIELDS, extrasaction="ignore")
+        if new:
+            writer.writeheader()
+        writer.writerow({**snapshot, "warnings": ";".join(snapshot["warnings"])})
+
+
+def follow(log_path, out_dir, interval_s, grace_s, attacker_id=2, poll_ms=500, idle_timeout=0.0,
+           on_snapshot=None, convergence=None, abort_on_failure=False, routing_poll_s=2.0):
+    """Follow log_path until SIMULATION_FINISHED, convergence, a fatal condition or
+    idle_timeout; returns the last snapshot."""
+    reader = TestlogReader()
+    stats = LiveStats(reader, attacker_id=attacker_id, routing_poll_s=routing_poll_s)
+    watcher = FileWatcher(log_path, poll_ms=poll_ms)
+    next_publish = interval_s
+    warned = set()
+    last_growth = time.monotonic()
+    state = {"converged": False, "failure": None, "last": None}
+
+    def done():
+        return stats.finished or state["converged"] or state["failure"] is not None
+
+    def emit():
+        snap = stats.snapshot(reader.line_no, grace_s)
+        if convergence is not None and not state["converged"]:
+            state["converged"] = convergence.update(snap)
+        if abort_on_failure and state["failure"] is None:
+            fatal = [reason for reason in FATAL_WARNINGS if reason in snap["warnings"]]
+            if fatal:
+                state["failure"] = fatal[0]
+        snap["converged"] = state["converged"]
+        snap["failure"] = state["failure"]
+        publish(out_dir, snap)
+        for reason in snap["warnings"]:
+            if reason not in warned:
+                warned.add(reason)
+                print(f"[WARN] {out_dir.name}: {reason} at t={round(stats.elapsed_s, 1)}s", file=sys.stderr)
+        if on_snapshot:
+            on_snapshot(snap)
+        state["last"] = snap
+        return snap
+
+    try:
+        while not Path(log_path).exists():
+            watcher.wait(1.0)
+        with open(log_path, "rb") as handle:
+            pending = b""
+            while not done():
+                chunk = handle.read(READ_BUFFER)
+                if not chunk:
+                    if idle_timeout and time.monotonic() - last_growth > idle_timeout:
+                        break
+                    watcher.wait(1.0)
+                    continue
+                last_growth = time.monotonic()
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    reader.feed(line)
+                    if stats.elapsed_s >= next_publish:
+                        # elapsed_s also moves on ROUTING_WAIT polls, so a run
+                        # that has not transmitted yet still publishes.
+                        emit()
+                        while next_publish <= stats.elapsed_s:
+                            next_publish += interval_s
+                    elif (
+                        abort_on_failure
+                        and state["failure"] is None
+                        and stats.elapsed_s >= grace_s
+                        and (not stats.tx or (stats.routing_timeout and not stats.rx))
+                    ):
+                        # Nothing sent, or a mote gave up on routing with nothing
+                        # delivered: check the fatal warnings now. A ROUTING_WAIT_TIMEOUT
+                        # alone is not fatal; sender.c keeps transmitting after it.
+                        emit()
+                    if done():
+                        break
+    finally:
+        watcher.close()
+    if state["last"] is not None and (state["converged"] or state["failure"]):
+        return state["last"]
+    return emit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Live metrics for an in-flight Cooja run.")
+    ap.add_argument("run_dir", help="Run directory (expects logs/COOJA.testlog) or a testlog path")
+    ap.add_argument("--interval", type=float, default=30.0, help="Snapshot period in simulated seconds")
+    ap.add_argument("--grace", type=float, default=120.0, help="Simulated seconds before rx=0/tx=0 is flagged")
+    ap.add_argument("--attacker-id", type=int, default=2)
+    ap.add_argument(
+        "--routing-poll",
+        type=float,
+        default=2.0,
+        help="ROUTING_POLL_INT of sender.c in seconds; paces the clock while no TX is logged",
+    )
+    ap.add_argument("--poll-ms", type=int, default=500, help="Polling period when inotify is unavailable")
+    ap.add_argument("--idle-timeout", type=float, default=0.0, help="Stop after N wall seconds without growth (0=never)")
+    ap.add_argument(
+        "--stop-on-converge",
+        action="store_true",
+        help="Exit once PDR/E1 are stable; the snapshot then carries converged=true",
+    )
+    ap.add_argument(
+        "--abort-on-failure",
+        action="store_true",
+        help="Exit with status 2 on routing_not_ready (routing wait/timeout with tx=0 or rx=0) "
+        "or tx=0 after --grace",
+    )
+    ap.add_argument("--converge-windows", type=int, default=3, help="Consecutive stable snapshots required")
+    ap.add_argument("--converge-pdr-tol", type=float, default=1.0, help="Max PDR spread (percentage points)")
+    ap.add_argument("--converge-e1-tol", type=float, default=1.0, help="Max E1 spread (percentage points)")
+    args = ap.parse_args()
+
+    path = Path(args.run_dir)
+    if path.is_dir():
+        out_dir, log_path = path, path / "logs" / "COOJA.testlog"
+    else:
+        log_path = path
+        out_dir = path.parent.parent if path.parent.name == "logs" else path.parent
+    snap = follow(
+        log_path,
+        out_dir,
+        args.interval,
+        args.grace,
+        attacker_id=args.attacker_id,
+        poll_ms=args.poll_ms,
+        idle_timeout=args.idle_timeout,
+        convergence=(
+            ConvergenceTracker(args.converge_windows, args.converge_pdr_tol, args.converge_e1_tol, args.grace)
+            if args.stop_on_converge
+            else None
+        ),
+        abort_on_failure=args.abort_on_failure,
+        routing_poll_s=args.routing_poll,
+    )
+    print(json.dumps(snap, indent=2))
+    if snap["failure"]:
+        return 2
+    return 1 if snap["warnings"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Merge several results/experiments-* directories from their group_moments.csv.
+
+Only the per-group sufficient statistics are read, so the cost scales with
+the number of groups, not runs. Output is a merged group_moments.csv (which
+can be merged again) plus aggregate_by_group.csv with mean/std/ci95.
+Median/IQR need the raw values and are left blank.
+
+  python3 scripts/merge_experiments.py results/merged results/experiments-A results/experiments-B
+"""
+
+import argparse
+import os
+import sys
+
+from experiment_summary import MOMENTS_NAME, aggregate_fieldnames, format_aggregate_row, write_csv
+from group_stats import merge_moments, moment_stats, read_moments, sort_key, write_moments
+
+
+def merge_dirs(dirs):
+    dims = metrics = None
+    merged = {}
+    for results_dir in dirs:
+        path = os.path.join(results_dir, MOMENTS_NAME)
+        if not os.path.exists(path):
+            raise SystemExit(f"{path} not found; run experiment_summary.py on {results_dir} first")
+        these_dims, these_metrics, groups = read_moments(path)
+        if dims is None:
+            dims, metrics = these_dims, these_metrics
+        elif (these_dims, these_metrics) != (dims, metrics):
+            raise SystemExit(f"{path}: columns differ from {dirs[0]}")
+        for key, group in groups.items():
+            if key not in merged:
+                merged[key] = group
+                continue
+            current = merged[key]
+            current["n"] += group["n"]
+            for metric in metrics:
+                current[metric] = merge_moments(current[metric], group[metric])
+    return dims, metrics, merged
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Merge experiment dirs via their group moments.")
+    ap.add_argument("out_dir", help="Directory for the merged outputs")
+    ap.add_argument("results_dirs", nargs="+", help="results/experiments-... directories")
+    args = ap.parse_args()
+
+    dims, metrics, merged = merge_dirs(args.results_dirs)
+    os.makedirs(args.out_dir, exist_ok=True)
+    write_moments(os.path.join(args.out_dir, MOMENTS_NAME), dims, metrics, merged)
+
+    rows = []
+    for key in sorted(merged, key=sort_key):
+        group = dict(zip(dims, key))
+        group["n"] = merged[key]["n"]
+        for metric in metrics:
+            for stat, value in moment_stats(merged[key][metric]).items():
+                group[f"{stat}_{metric}"] = value
+        rows.append(format_aggregate_row(group))
+    aggregate_path = os.path.join(args.out_dir, "aggregate_by_group.csv")
+    write_csv(aggregate_path, aggregate_fieldnames(), rows)
+    print(aggregate_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
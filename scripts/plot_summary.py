@@ -4,6 +4,13 @@ import csv
 import os
 from collections import defaultdict
 
+from group_stats import fmt, group_stats, sort_key, to_float
+
+
+DEFAULT_DIMS = ("topology", "attack_rate", "trust")
+METRICS = ("pdr", "e1", "e3", "parent_switch_rate")
+EXTRA_STATS = ("n", "std", "ci95", "median", "iqr")
+
 
 def try_import_matplotlib():
     try:
@@ -24,71 +31,49 @@ def load_rows(path):
     return rows
 
 
-def to_float(x):
-    try:
-        return float(x)
-    except Exception:
-        return None
-
-
-def aggregate(rows):
-    groups = defaultdict(lambda: {"n": 0, "pdr": 0.0, "e1": 0.0, "e3": 0.0, "switch": 0.0})
-    for r in rows:
-        key = (r["topology"], r["attack_rate"], r["trust"])
-        pdr = to_float(r.get("pdr", ""))
-        e1 = to_float(r.get("e1", ""))
-        e3 = to_float(r.get("e3", ""))
-        sw = to_float(r.get("parent_switch_rate", ""))
-        if pdr is None or e1 is None or e3 is None:
-            continue
-        groups[key]["n"] += 1
-        groups[key]["pdr"] += pdr
-        groups[key]["e1"] += e1
-        groups[key]["e3"] += e3
-        groups[key]["switch"] += sw if sw is not None else 0.0
+def aggregate(rows, dims=DEFAULT_DIMS, metrics=METRICS):
+    """Group rows on dims; the plain metric column holds the group mean."""
     out = []
-    for (topo, attack, trust), v in groups.items():
-        n = v["n"]
-        if n == 0:
-            continue
-        out.append(
-            {
-                "topology": topo,
-                "attack_rate": attack,
-                "trust": trust,
-                "n": n,
-                "pdr": v["pdr"] / n,
-                "e1": v["e1"] / n,
-                "e3": v["e3"] / n,
-                "parent_switch_rate": v["switch"] / n,
-            }
-        )
+    for group in group_stats(rows, dims, metrics):
+        row = {dim: group[dim] for dim in dims}
+        row["n"] = group["n"]
+        for metric in metrics:
+            row[metric] = group[f"mean_{metric}"]
+            for stat in EXTRA_STATS:
+                row[f"{stat}_{metric}"] = group[f"{stat}_{metric}"]
+        out.append(row)
     return out
 
 
-def write_csv(rows, path):
+def write_csv(rows, path, dims=DEFAULT_DIMS, metrics=METRICS):
     with open(path, "w", newline="") as f:
-        fieldnames = ["topology", "attack_rate", "trust", "n", "pdr", "e1", "e3", "parent_switch_rate"]
+        fieldnames = list(dims) + ["n"] + list(metrics)
+        fieldnames += [f"{stat}_{metric}" for metric in metrics for stat in EXTRA_STATS]
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
-        for r in sorted(rows, key=lambda x: (x["topology"], int(x["attack_rate"]), int(x["trust"]))):
-            w.writerow(r)
+        for r in rows:
+            w.writerow({k: fmt(v, 4) if isinstance(v, float) else v for k, v in r.items()})
 
 
-def plot_series(plt, rows, metric, out_path):
+def plot_series(plt, rows, metric, out_path, dims=DEFAULT_DIMS):
+    x_dim = "attack_rate" if "attack_rate" in dims else dims[0]
+    series_dims = [d for d in dims if d != x_dim]
     series = defaultdict(list)
     for r in rows:
-        series[(r["topology"], r["trust"])].append((int(r["attack_rate"]), r[metric]))
+        if r[metric] is None:
+            continue
+        series[tuple(r[d] for d in series_dims)].append((to_float(r[x_dim]), r[metric]))
     plt.figure(figsize=(6, 4))
-    for (topo, trust), points in series.items():
+    for key, points in sorted(series.items(), key=lambda item: sort_key(item[0])):
         points = sorted(points, key=lambda x: x[0])
         xs = [p[0] for p in points]
         ys = [p[1] for p in points]
-        label = f"{topo} trust={trust}"
+        label = " ".join(f"{d}={v}" for d, v in zip(series_dims, key))
         plt.plot(xs, ys, marker="o", label=label)
-    plt.xlabel("Attack rate (%)")
+    x_label = "attack rate" if x_dim == "attack_rate" else x_dim
+    plt.xlabel("Attack rate (%)" if x_dim == "attack_rate" else x_dim)
     plt.ylabel(metric.upper())
-    plt.title(f"{metric.upper()} vs attack rate")
+    plt.title(f"{metric.upper()} vs {x_label}")
     plt.legend(fontsize=8)
     plt.tight_layout()
     plt.savefig(out_path)
@@ -100,13 +85,19 @@ def main():
     ap.add_argument("results_dir", help="results/experiments-...")
     ap.add_argument("--summary", default="summary_from_trust_engine.csv")
     ap.add_argument("--out", default="summary_agg.csv")
+    ap.add_argument(
+        "--by",
+        default=",".join(DEFAULT_DIMS),
+        help="Comma-separated grouping columns, e.g. topology,attack_mode,sink_delta,trust_alpha,lambda,gamma",
+    )
     args = ap.parse_args()
+    dims = tuple(d for d in args.by.split(",") if d)
 
     summary_path = os.path.join(args.results_dir, args.summary)
     rows = load_rows(summary_path)
-    agg = aggregate(rows)
+    agg = aggregate(rows, dims)
     out_csv = os.path.join(args.results_dir, args.out)
-    write_csv(agg, out_csv)
+    write_csv(agg, out_csv, dims)
 
     plt = try_import_matplotlib()
     if plt is None:
@@ -116,8 +107,8 @@ def main():
 
     plot_dir = os.path.join(args.results_dir, "plots")
     os.makedirs(plot_dir, exist_ok=True)
-    for metric in ("pdr", "e1", "e3", "parent_switch_rate"):
-        plot_series(plt, agg, metric, os.path.join(plot_dir, f"{metric}.png"))
+    for metric in METRICS:
+        plot_series(plt, agg, metric, os.path.join(plot_dir, f"{metric}.png"), dims)
 
     print(out_csv)
 
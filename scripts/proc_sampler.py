@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Sample RSS, CPU% and I/O of a run's child processes from /proc.
+
+A ResourceSampler thread reads /proc/<pid>/stat, /proc/<pid>/io for each
+registered process (the Cooja JVM and trust_engine) every `interval`
+seconds and appends one row per process to resources.csv:
+
+  t_s,proc,rss_mb,cpu_pct,read_mb,write_mb
+
+summary() reduces the series to peak/mean values for the sweep matrix. On
+hosts without /proc the sampler records nothing and the summary is empty.
+
+  python3 scripts/proc_sampler.py results/.../RUN/resources.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+
+RESOURCES_NAME = "resources.csv"
+FIELDS = ["t_s", "proc", "rss_mb", "cpu_pct", "read_mb", "write_mb"]
+MB = 1024.0 * 1024.0
+
+try:
+    CLK_TCK = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    CLK_TCK = PAGE_SIZE = None
+
+
+def available():
+    return CLK_TCK is not None and os.path.isdir("/proc/self")
+
+
+def read_proc(pid):
+    """{"cpu_s", "rss_bytes", "read_bytes", "write_bytes"} for pid, or None once it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as handle:
+            stat = handle.read()
+    except OSError:
+        return None
+    # comm may contain spaces or parentheses; the fields start after the last ')'.
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    if fields[0] == b"Z":
+        return None
+    sample = {
+        "cpu_s": (int(fields[11]) + int(fields[12])) / CLK_TCK,
+        "rss_bytes": int(fields[21]) * PAGE_SIZE,
+        "read_bytes": None,
+        "write_bytes": None,
+    }
+    try:
+        with open(f"/proc/{pid}/io") as handle:
+            for line in handle:
+                key, _sep, value = line.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    sample[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return sample
+
+
+class ResourceSampler(threading.Thread):
+    """Background /proc sampler; add() processes, stop() when the run ends."""
+
+    def __init__(self, out_path, interval=2.0):
+        super().__init__(daemon=True)
+        self.out_path = out_path
+        self.interval = interval
+        self.procs = {}
+        self.last = {}
+        self.series = {}
+        self.started = time.monotonic()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def add(self, name, pid):
+        with self._lock:
+            self.procs[name] = pid
+            self.series.setdefault(name, [])
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def sample_once(self, writer):
+        now = time.monotonic()
+        with self._lock:
+            procs = list(self.procs.items())
+        for name, pid in procs:
+            sample = read_proc(pid)
+            if sample is None:
+                continue
+            prev = self.last.get(name)
+            cpu_pct = None
+            if prev is not None and now > prev[0]:
+                cpu_pct = 100.0 * (sample["cpu_s"] - prev[1]["cpu_s"]) / (now - prev[0])
+            self.last[name] = (now, sample)
+            row = {
+                "t_s": round(now - self.started, 1),
+                "proc": name,
+                "rss_mb": round(sample["rss_bytes"] / MB, 1),
+                "cpu_pct": "" if cpu_pct is None else round(cpu_pct, 1),
+                "read_mb": "" if sample["read_bytes"] is None else round(sample["read_bytes"] / MB, 2),
+                "write_mb": "" if sample["write_bytes"] is None else round(sample["write_bytes"] / MB, 2),
+            }
+            self.series[name].append(row)
+            writer.writerow(row)
+
+    def run(self):
+        if not available():
+            return
+        with open(self.out_path, "w", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+            while True:
+                self.sample_once(writer)
+                handle.flush()
+                if self._stop_event.wait(self.interval):
+                    break
+
+    def summary(self):
+        return summarize(self.series)
+
+
+def summarize(series):
+    """{proc: {rss_peak_mb, rss_mean_mb, cpu_peak_pct, cpu_mean_pct, read_mb, write_mb}} from rows."""
+    out = {}
+    for name, rows in series.items():
+        if not rows:
+            continue
+        rss = [float(r["rss_mb"]) for r in rows]
+        cpu = [float(r["cpu_pct"]) for r in rows if r["cpu_pct"] != ""]
+        last = rows[-1]
+        out[name] = {
+            "rss_peak_mb": round(max(rss), 1),
+            "rss_mean_mb": round(sum(rss) / len(rss), 1),
+            "cpu_peak_pct": round(max(cpu), 1) if cpu else None,
+            "cpu_mean_pct": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            # /proc/<pid>/io counters are cumulative, so the last sample is the total.
+            "read_mb": float(last["read_mb"]) if last["read_mb"] != "" else None,
+            "write_mb": float(last["write_mb"]) if last["write_mb"] != "" else None,
+        }
+    return out
+
+
+def read_series(path):
+    series = {}
+    with open(path, newline="") as handle:
+        for row in csv.DictReader(handle):
+            series.setdefault(row["proc"], []).append(row)
+    return series
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize a run's resources.csv")
+    ap.add_argument("resources", help="resources.csv written by run_trust_sweep.py")
+    args = ap.parse_args()
+    print(json.dumps(summarize(read_series(args.resources)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,6 +35,7 @@ SINK_KAPPA=${SINK_KAPPA:-0}
 SINK_W1=${SINK_W1:-0.5}
 SINK_W2=${SINK_W2:-0.5}
 TRUST_ALPHA=${TRUST_ALPHA:-0.5}
+LIVE_INTERVAL=${LIVE_INTERVAL:-30}  # live_monitor snapshot period in sim seconds (0 = off)
 
 # Topology list (override with TOPOLOGIES env var)
 # Example: TOPOLOGIES="configs/topologies/T1_S.csc configs/topologies/T3.csc" ./scripts/run_experiments.sh
@@ -121,6 +122,11 @@ summarize_run() {
         log_warn "Missing COOJA.testlog in $log_dir"
     fi
 
+    if [ -f "$run_dir/live_snapshot.json" ]; then
+        echo ""
+        echo "Live snapshot:"
+        cat "$run_dir/live_snapshot.json" || true
+    fi
     if [ -f "$exposure" ]; then
         echo ""
         echo "Exposure (last row):"
@@ -223,71 +229,36 @@ run_one() {
             ATTACKER_NODE_ID=${ATTACKER_NODE_ID:-2}
             SINKHOLE_RANK_DELTA=${SINKHOLE_RANK_DELTA:-1}
             TRUST_ALPHA=${TRUST_ALPHA:-0.5}
-            sed -e "s/<randomseed>[0-9]*<\/randomseed>/<randomseed>$seed<\/randomseed>/g" \
-                -e "s/@SIM_TIME_MS@/${SIM_TIME_MS}/g" \
-                -e "s/@SIM_TIME_SEC@/${SIM_TIME}/g" \
-                -e "s/@TRUST_POLL_MS@/${TRUST_POLL_MS}/g" \
-                -e "s|@TRUST_FEEDBACK_PATH@|${TRUST_FEEDBACK_FILE}|g" \
-                -e "s/BRPL_MODE=[0-9]/BRPL_MODE=${BRPL_MODE}/g" \
-                -e "s/TRUST_ENABLED=[0-9]/TRUST_ENABLED=${trust}/g" \
-                -e "s/TRUST_LAMBDA=[0-9][0-9]*/TRUST_LAMBDA=${TRUST_LAMBDA}/g" \
-                -e "s/TRUST_PENALTY_GAMMA=[0-9][0-9]*/TRUST_PENALTY_GAMMA=${TRUST_PENALTY_GAMMA:-1}/g" \
-                -e "s/TRUST_LAMBDA_CONF=[0-9][0-9]*/TRUST_LAMBDA_CONF=${TRUST_LAMBDA}/g" \
-                -e "s/TRUST_PENALTY_GAMMA_CONF=[0-9][0-9]*/TRUST_PENALTY_GAMMA_CONF=${TRUST_PENALTY_GAMMA:-1}/g" \
-                -e "s/,PROJECT_CONF_PATH=[^,< ]*//g" \
-                -e "s/,PROJECT_CONF_PATH=\\\"[^\\\"]*\\\"//g" \
-                -e "s/TRUST_GAMMA=[0-9][0-9]*/TRUST_GAMMA=${TRUST_GAMMA}/g" \
-                -e "/TRUST_GAMMA=/! s/TRUST_LAMBDA=${TRUST_LAMBDA}/TRUST_LAMBDA=${TRUST_LAMBDA},TRUST_GAMMA=${TRUST_GAMMA}/g" \
-                -e "s/ATTACK_MODE=[0-9][0-9]*/ATTACK_MODE=${ATTACK_MODE}/g" \
-                -e "s/ATTACKER_NODE_ID=[0-9][0-9]*/ATTACKER_NODE_ID=${ATTACKER_NODE_ID}/g" \
-                -e "s/SINKHOLE_RANK_DELTA=[0-9][0-9]*/SINKHOLE_RANK_DELTA=${SINKHOLE_RANK_DELTA}/g" \
-                -e "s/ATTACK_DROP_PCT=[0-9][0-9]*/ATTACK_DROP_PCT=${attack_rate}/g" \
-                -e "/ATTACK_MODE=/! s/ATTACK_DROP_PCT=${attack_rate}/ATTACK_DROP_PCT=${attack_rate},ATTACK_MODE=${ATTACK_MODE}/g" \
-                -e "s/SEND_INTERVAL_SECONDS=[0-9][0-9]*/SEND_INTERVAL_SECONDS=${SEND_INTERVAL_SECONDS}/g" \
-                -e "s/WARMUP_SECONDS=[0-9][0-9]*/WARMUP_SECONDS=${WARMUP_SECONDS}/g" \
-                "$PROJECT_DIR/$BASE_CONFIG" > "$TEMP_CONFIG"
-            python3 - <<PY
-import re
-from pathlib import Path
-
-path = Path("$TEMP_CONFIG")
-text = path.read_text()
-
-def fix_defines(match):
-    defines = match.group(2)
-    if "ATTACK_MODE=" not in defines:
-        defines += f",ATTACK_MODE=${ATTACK_MODE}"
-    if "ATTACKER_NODE_ID=" not in defines:
-        defines += f",ATTACKER_NODE_ID=${ATTACKER_NODE_ID}"
-    return match.group(1) + defines
-
-pattern = re.compile(r'(DEFINES=)([^"<]*)')
-lines = []
-for line in text.splitlines():
-    if "DEFINES=" in line:
-        line = pattern.sub(fix_defines, line, count=1)
-    lines.append(line)
-path.write_text("\\n".join(lines) + "\\n")
-PY
-
-            # Disable SerialSocketServer for headless runs (sandbox/network restrictions)
-            awk '
-              $0 ~ /<plugin>/ { in_plugin = 1; plugin_buf = $0; next }
-              in_plugin && $0 ~ /org.contikios.cooja.serialsocket.SerialSocketServer/ { skip = 1 }
-              in_plugin {
-                plugin_buf = plugin_buf "\n" $0
-                if($0 ~ /<\/plugin>/) {
-                  if(!skip) { print plugin_buf }
-                  in_plugin = 0; skip = 0; plugin_buf = ""
-                }
-                next
-              }
-              { print }
-            ' "$TEMP_CONFIG" > "${TEMP_CONFIG}.tmp" && mv "${TEMP_CONFIG}.tmp" "$TEMP_CONFIG"
+            # Render the run config from the parsed template in one pass; DEFINES
+            # edits are per-motetype dict updates (--set only touches keys a
+            # motetype already has, --add also inserts them). SerialSocketServer
+            # is dropped for headless runs (sandbox/network restrictions).
+            python3 scripts/csc_template.py render \
+                --template "$PROJECT_DIR/$BASE_CONFIG" --out "$TEMP_CONFIG" --seed "$seed" \
+                --placeholder "SIM_TIME_MS=${SIM_TIME_MS}" \
+                --placeholder "SIM_TIME_SEC=${SIM_TIME}" \
+                --placeholder "TRUST_POLL_MS=${TRUST_POLL_MS}" \
+                --placeholder "TRUST_FEEDBACK_PATH=${TRUST_FEEDBACK_FILE}" \
+                --set "BRPL_MODE=${BRPL_MODE}" \
+                --set "TRUST_ENABLED=${trust}" \
+                --set "TRUST_LAMBDA=${TRUST_LAMBDA}" \
+                --set "TRUST_PENALTY_GAMMA=${TRUST_PENALTY_GAMMA:-1}" \
+                --set "TRUST_LAMBDA_CONF=${TRUST_LAMBDA}" \
+                --set "TRUST_PENALTY_GAMMA_CONF=${TRUST_PENALTY_GAMMA:-1}" \
+                --set "SINKHOLE_RANK_DELTA=${SINKHOLE_RANK_DELTA}" \
+                --set "ATTACK_DROP_PCT=${attack_rate}" \
+                --set "SEND_INTERVAL_SECONDS=${SEND_INTERVAL_SECONDS}" \
+                --set "WARMUP_SECONDS=${WARMUP_SECONDS}" \
+                --add "TRUST_GAMMA=${TRUST_GAMMA}" \
+                --add "ATTACK_MODE=${ATTACK_MODE}" \
+                --add "ATTACKER_NODE_ID=${ATTACKER_NODE_ID}" \
+                --drop PROJECT_CONF_PATH \
+                --drop-plugin org.contikios.cooja.serialsocket.SerialSocketServer
             
-            # CRITICAL: Delete entire build directory to force full recompilation
-            log_info "  Deleting build directory for clean slate..."
-            rm -rf motes/build 2>/dev/null || true
+            # Reuse cached firmware for unchanged DEFINES; any miss forces a clean rebuild
+            log_info "  Restoring firmware from cache..."
+            python3 scripts/firmware_cache.py restore --config "$TEMP_CONFIG" --build-dir motes/build \
+                || rm -rf motes/build 2>/dev/null || true
             
             # Run simulation
             LOG_DIR="$PROJECT_DIR/$RUN_DIR/logs"
@@ -326,6 +297,13 @@ PY
                 --attacker-id "$ATTACKER_NODE_ID" \
                 --follow > "$PROJECT_DIR/$RUN_DIR/trust_engine.log" 2>&1 &
             TRUST_ENGINE_PID=$!
+            LIVE_PID=""
+            if [ "$LIVE_INTERVAL" != "0" ]; then
+                python3 scripts/live_monitor.py "$PROJECT_DIR/$RUN_DIR" \
+                    --interval "$LIVE_INTERVAL" \
+                    --attacker-id "$ATTACKER_NODE_ID" > /dev/null &
+                LIVE_PID=$!
+            fi
             sleep 2
             
             timeout 800 java --enable-preview ${JAVA_OPTS} \
@@ -340,6 +318,7 @@ PY
             if [ $COOJA_EXIT -ne 0 ]; then
                 log_error "Simulation failed for $RUN_NAME (exit code: $COOJA_EXIT)"
                 [ -n "$TRUST_ENGINE_PID" ] && kill -9 $TRUST_ENGINE_PID 2>/dev/null || true
+                [ -n "$LIVE_PID" ] && kill $LIVE_PID 2>/dev/null || true
                 rm -f "$TEMP_CONFIG"
                 return
             fi
@@ -362,7 +341,16 @@ PY
                 wait $TRUST_ENGINE_PID 2>/dev/null || true
                 log_info "  Trust engine stopped"
             fi
+            if [ -n "$LIVE_PID" ]; then
+                # live_monitor exits by itself on SIMULATION_FINISHED
+                sleep 1
+                kill $LIVE_PID 2>/dev/null || true
+                wait $LIVE_PID 2>/dev/null || true
+            fi
             
+            # Keep freshly compiled firmware for later runs with the same DEFINES
+            python3 scripts/firmware_cache.py store --config "$TEMP_CONFIG" --build-dir motes/build || true
+
             # Clean up temp config
             rm -f "$TEMP_CONFIG"
             
@@ -2,84 +2,215 @@
 import argparse
 import csv
 import json
+import math
+import multiprocessing
 import os
-import re
 import shutil
 import subprocess
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import csc_template
+import firmware_cache
+import live_monitor
+import proc_sampler
+import sink_design
+import testlog_store
+import topology_exposure
+
 
 PROJECT_DIR = Path(__file__).resolve().parents[1]
+JOURNAL_NAME = "sweep_journal.jsonl"
+SEED_ALLOCATION_NAME = "seed_allocation.csv"
+SEED_ALLOCATION_FIELDS = [
+    "topology",
+    "attack_rate",
+    "trust",
+    "lambda",
+    "gamma",
+    "point",
+    "seeds",
+    "n",
+    "ci95_pdr",
+    "ci95_e1",
+    "state",
+]
+HALVING_NAME = "halving.csv"
+HALVING_FIELDS = [
+    "rung",
+    "sim_time",
+    "seeds",
+    "topology",
+    "attack_rate",
+    "lambda",
+    "gamma",
+    "point",
+    "runs",
+    "pdr",
+    "e1",
+    "rank",
+    "promoted",
+]
+MATRIX_FIELDS = [
+    "run",
+    "topology",
+    "scenario",
+    "attack_rate",
+    "trust",
+    "lambda",
+    "gamma",
+    "seed",
+    "status",
+    "reason",
+    "sim_speed",
+    "java_rss_peak_mb",
+    "java_rss_mean_mb",
+    "java_cpu_mean_pct",
+    "trust_rss_peak_mb",
+    "trust_cpu_mean_pct",
+    "io_read_mb",
+    "io_write_mb",
+]
+# Matrix column -> (sampled process, proc_sampler.summarize() key).
+RESOURCE_COLUMNS = {
+    "java_rss_peak_mb": ("java", "rss_peak_mb"),
+    "java_rss_mean_mb": ("java", "rss_mean_mb"),
+    "java_cpu_mean_pct": ("java", "cpu_mean_pct"),
+    "trust_rss_peak_mb": ("trust_engine", "rss_peak_mb"),
+    "trust_cpu_mean_pct": ("trust_engine", "cpu_mean_pct"),
+}
+TIMINGS_NAME = "timings.csv"
+# Per-run wall-clock stages (monotonic seconds) in run order.
+TIMING_STAGES = (
+    "render",
+    "firmware_cache",
+    "firmware_build",
+    "jvm_start",
+    "simulation",
+    "trust_shutdown",
+    "monitor_shutdown",
+    "summary",
+)
+TIMING_FIELDS = ["run", "topology", "status"] + [f"{stage}_s" for stage in TIMING_STAGES] + ["total_s", "sim_time_s"]
 
+# Set once per pool worker by init_worker(); None in serial mode.
+_WORKER_WORKSPACE = None
 
-def remove_serial_socket_plugin(contents):
-    output_lines = []
-    in_plugin = False
-    plugin_lines = []
-    skip_plugin = False
-    for line in contents.splitlines(keepends=True):
-        if "<plugin>" in line:
-            in_plugin = True
-            plugin_lines = [line]
-            skip_plugin = False
-            continue
-        if in_plugin:
-            plugin_lines.append(line)
-            if "org.contikios.cooja.serialsocket.SerialSocketServer" in line:
-                skip_plugin = True
-            if "</plugin>" in line:
-                if not skip_plugin:
-                    output_lines.extend(plugin_lines)
-                in_plugin = False
-                plugin_lines = []
+
+def build_run_name(topo_name, scenario, attack_rate, trust, lam, gam, seed, point=None):
+    lam_str = "NA" if lam is None else str(lam)
+    gam_str = "NA" if gam is None else str(gam)
+    # Sink-parameter design runs carry their design point index.
+    point_str = "" if point is None else f"_pt{point:03d}"
+    return (
+        f"{topo_name}_{scenario}_atk{attack_rate:02d}_trust{trust}_"
+        f"lam{lam_str}_gam{gam_str}{point_str}_s{seed}"
+    )
+
+
+def write_csv_atomic(path, fieldnames, rows):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def prepare_workspace(results_dir, slot, contiki_path):
+    """Private motes/configs tree so concurrent Cooja builds never share motes/build."""
+    workspace = results_dir / "workspaces" / f"worker{slot:02d}"
+    motes_dir = workspace / "motes"
+    motes_dir.mkdir(parents=True, exist_ok=True)
+    (workspace / "configs").mkdir(exist_ok=True)
+    (workspace / "tmp").mkdir(exist_ok=True)
+    for source in (PROJECT_DIR / "motes").iterdir():
+        if source.name == "build":
             continue
-        output_lines.append(line)
-    if in_plugin and not skip_plugin:
-        output_lines.extend(plugin_lines)
-    return "".join(output_lines)
+        link = motes_dir / source.name
+        if not link.is_symlink():
+            link.symlink_to(source)
+    links = {
+        workspace / "project-conf.h": PROJECT_DIR / "project-conf.h",
+        workspace / "contiki-ng-brpl": Path(contiki_path).resolve(),
+    }
+    for link, target in links.items():
+        if not link.is_symlink():
+            link.symlink_to(target)
+    return workspace
 
 
-def apply_replacements(contents, replacements):
-    for pattern, repl in replacements:
-        contents = re.sub(pattern, repl, contents)
-    return contents
+def init_worker(results_dir, contiki_path, slot_counter):
+    global _WORKER_WORKSPACE
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    _WORKER_WORKSPACE = prepare_workspace(results_dir, slot, contiki_path)
 
 
-def update_trust_defines(contents, trust_lambda, trust_gamma):
-    if "TRUST_GAMMA=" in contents:
-        contents = re.sub(r"TRUST_GAMMA=\d+", f"TRUST_GAMMA={trust_gamma}", contents)
-    else:
-        contents = re.sub(
-            r"TRUST_LAMBDA=(\d+)",
-            f"TRUST_LAMBDA={trust_lambda},TRUST_GAMMA={trust_gamma}",
-            contents,
-        )
-    contents = re.sub(r"TRUST_LAMBDA=\d+", f"TRUST_LAMBDA={trust_lambda}", contents)
-    contents = re.sub(
-        r"TRUST_PENALTY_GAMMA=\d+", f"TRUST_PENALTY_GAMMA={trust_gamma}", contents
-    )
-    contents = re.sub(
-        r"TRUST_LAMBDA_CONF=\d+", f"TRUST_LAMBDA_CONF={trust_lambda}", contents
-    )
-    contents = re.sub(
-        r"TRUST_PENALTY_GAMMA_CONF=\d+",
-        f"TRUST_PENALTY_GAMMA_CONF={trust_gamma}",
-        contents,
-    )
-    return contents
+def run_in_worker(args, combo, results_dir):
+    return run_simulation(args, combo, results_dir, workspace=_WORKER_WORKSPACE)
 
 
-def build_run_name(topo_name, scenario, attack_rate, trust, lam, gam, seed):
-    lam_str = "NA" if lam is None else str(lam)
-    gam_str = "NA" if gam is None else str(gam)
-    return (
-        f"{topo_name}_{scenario}_atk{attack_rate:02d}_trust{trust}_"
-        f"lam{lam_str}_gam{gam_str}_s{seed}"
+def combo_run_name(combo):
+    return build_run_name(
+        Path(combo["topology"]).stem,
+        combo["scenario"],
+        combo["attack_rate"],
+        combo["trust"],
+        combo["lambda"],
+        combo["gamma"],
+        combo["seed"],
+        combo.get("point"),
     )
 
 
+def append_journal(results_dir, record):
+    """Append one event to the sweep journal and force it to disk."""
+    record = {**record, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with (results_dir / JOURNAL_NAME).open("a") as handle:
+        handle.write(json.dumps(record) + "\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def load_journal(results_dir, reasons=None):
+    """Last known status per run; runs that started but never finished are 'interrupted'.
+
+    reasons, if given, is filled with the reason of each run's last finish record.
+    """
+    statuses = {}
+    journal_path = results_dir / JOURNAL_NAME
+    if not journal_path.exists():
+        return statuses
+    with journal_path.open(errors="ignore") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a torn last line.
+                continue
+            if record.get("event") == "start":
+                statuses[record["run"]] = "interrupted"
+            elif record.get("event") == "finish":
+                statuses[record["run"]] = record.get("status", "failed")
+                if reasons is not None:
+                    reasons[record["run"]] = record.get("reason", "")
+    return statuses
+
+
+def run_outputs_valid(run_dir):
+    testlog = run_dir / "logs" / "COOJA.testlog"
+    exposure = run_dir / "exposure.csv"
+    if not testlog.exists() or testlog.stat().st_size == 0 or not exposure.exists():
+        return False
+    with exposure.open(errors="ignore") as handle:
+        # Header plus at least one data row.
+        return sum(1 for line in handle if line.strip()) >= 2
+
+
 def write_run_meta(log_dir, meta):
     log_dir.mkdir(parents=True, exist_ok=True)
     meta_path = log_dir / "run_meta.json"
@@ -87,21 +218,225 @@ def write_run_meta(log_dir, meta):
         json.dump(meta, handle, indent=2)
 
 
-def run_simulation(args, combo, results_dir):
-    topo_path = Path(combo["topology"])
-    topo_name = topo_path.stem
-    trust_poll_ms = int(os.environ.get("TRUST_POLL_MS", "1000"))
-    run_name = build_run_name(
-        topo_name,
-        combo["scenario"],
-        combo["attack_rate"],
-        combo["trust"],
-        combo["lambda"],
-        combo["gamma"],
-        combo["seed"],
+def lap(timings, stage, since):
+    """Add the seconds since `since` to timings[stage]; returns now (monotonic)."""
+    now = time.monotonic()
+    timings[stage] = timings.get(stage, 0.0) + (now - since)
+    return now
+
+
+def firmware_build_time(build_dir, targets, launched_wall, startup_s):
+    """Seconds Cooja spent compiling targets, from their artifacts' mtimes.
+
+    Cooja runs the motetype make commands after the JVM is up and before the
+    simulation logs anything, so the newest artifact written since launch
+    bounds the build; the rest of the startup is JVM and simulation load.
+    """
+    newest = None
+    for target in targets:
+        for artifact in firmware_cache.artifact_paths(build_dir, target):
+            try:
+                mtime = artifact.stat().st_mtime
+            except OSError:
+                continue
+            if mtime >= launched_wall and (newest is None or mtime > newest):
+                newest = mtime
+    if newest is None:
+        return 0.0
+    return min(startup_s, newest - launched_wall)
+
+
+def reached_sim_time(run_dir, meta):
+    """Simulated seconds the run got through: the full or early-stop time, else the last live snapshot."""
+    if meta["status"] == "completed":
+        return meta["stop_sim_time_s"]
+    try:
+        return json.loads((run_dir / live_monitor.SNAPSHOT_NAME).read_text()).get("sim_time_s")
+    except (OSError, ValueError):
+        return None
+
+
+def read_run_meta(run_dir):
+    try:
+        return json.loads((run_dir / "logs" / "run_meta.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def timing_row(run_dir):
+    """TIMING_FIELDS row from a finished run's run_meta.json, or None."""
+    meta = read_run_meta(run_dir)
+    if "timings" not in meta:
+        return None
+    row = {"run": meta["run"], "topology": meta["topology"], "status": meta.get("status", "")}
+    for field in TIMING_FIELDS[3:]:
+        value = meta["timings"].get(field)
+        row[field] = "" if value is None else value
+    return row
+
+
+def resource_columns(run_dir):
+    """Sweep-matrix resource columns (speed, peak/mean RSS and CPU, I/O) from run_meta.json."""
+    meta = read_run_meta(run_dir)
+    resources = meta.get("resources") or {}
+    row = {"sim_speed": meta.get("sim_speed")}
+    for column, (proc, key) in RESOURCE_COLUMNS.items():
+        row[column] = resources.get(proc, {}).get(key)
+    for column, key in (("io_read_mb", "read_mb"), ("io_write_mb", "write_mb")):
+        values = [stats[key] for stats in resources.values() if stats.get(key) is not None]
+        row[column] = round(sum(values), 2) if values else None
+    return {column: "" if value is None else value for column, value in row.items()}
+
+
+def stop_process(proc, grace=10):
+    proc.terminate()
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def supervise_cooja(cooja_proc, timeout, live_proc, run_dir, stall_timeout=0, progress=None, startup_timeout=0):
+    """Wait for Cooja; end it early on convergence or when the run is doomed.
+
+    live_proc is the live_monitor following the run; when it exits, its
+    snapshot decides: converged=true stops the run as an early stop,
+    failure=<reason> aborts it. With stall_timeout > 0 a testlog that stops
+    growing for that many wall seconds (once it has started) aborts the run
+    as "stalled". With startup_timeout > 0 a testlog that has not grown at
+    all that many wall seconds after launch (JVM or firmware build hung)
+    aborts it as "startup_stalled". Returns None when Cooja exits by itself, otherwise
+    {"action": "early_stop", "snapshot": ...} or {"action": "abort",
+    "reason": ...}. Raises subprocess.TimeoutExpired (after killing Cooja)
+    past timeout. progress, if given, gets "first_log": the monotonic time
+    the testlog first grew (the simulation started logging).
+    """
+    launched = time.monotonic()
+    deadline = launched + timeout
+    testlog = run_dir / "logs" / "COOJA.testlog"
+    last_size = 0
+    last_growth = None
+    while True:
+        try:
+            cooja_proc.wait(timeout=1.0)
+            return None
+        except subprocess.TimeoutExpired:
+            pass
+        now = time.monotonic()
+        if now > deadline:
+            stop_process(cooja_proc)
+            raise subprocess.TimeoutExpired(cooja_proc.args, timeout)
+        if stall_timeout > 0 or ((progress is not None or startup_timeout > 0) and last_growth is None):
+            try:
+                size = testlog.stat().st_size
+            except OSError:
+                size = 0
+            if size != last_size:
+                if last_growth is None and progress is not None:
+                    progress["first_log"] = now
+                last_size, last_growth = size, now
+            elif stall_timeout > 0 and last_growth is not None and now - last_growth > stall_timeout:
+                stop_process(cooja_proc)
+                return {"action": "abort", "reason": "stalled"}
+            elif startup_timeout > 0 and last_growth is None and now - launched > startup_timeout:
+                stop_process(cooja_proc)
+                return {"action": "abort", "reason": "startup_stalled"}
+        if live_proc is None or live_proc.poll() is None:
+            continue
+        try:
+            snapshot = json.loads((run_dir / live_monitor.SNAPSHOT_NAME).read_text())
+        except (OSError, ValueError):
+            snapshot = {}
+        if snapshot.get("failure"):
+            stop_process(cooja_proc)
+            return {"action": "abort", "reason": snapshot["failure"], "snapshot": snapshot}
+        if snapshot.get("converged"):
+            stop_process(cooja_proc)
+            return {"action": "early_stop", "snapshot": snapshot}
+        # Monitor ended without a verdict; let the simulation run out.
+        live_proc = None
+
+
+def run_defines(args, combo):
+    """DEFINES edits for one run, as csc_template set/add/drop keyword arguments."""
+    trust_lambda = combo["lambda"] if combo["lambda"] is not None else 0
+    trust_gamma = combo["gamma"] if combo["gamma"] is not None else 1
+    return {
+        "set_defines": {
+            "BRPL_MODE": 1,
+            "TRUST_ENABLED": combo["trust"],
+            "ATTACK_DROP_PCT": combo["attack_rate"],
+            "SEND_INTERVAL_SECONDS": args.send_interval,
+            "WARMUP_SECONDS": args.warmup,
+            "TRUST_LAMBDA": trust_lambda,
+            "TRUST_PENALTY_GAMMA": trust_gamma,
+            "TRUST_LAMBDA_CONF": trust_lambda,
+            "TRUST_PENALTY_GAMMA_CONF": trust_gamma,
+        },
+        "add_defines": {"TRUST_GAMMA": trust_gamma},
+        "drop_defines": ("PROJECT_CONF_PATH",),
+    }
+
+
+def config_builds(args, combo):
+    """{motetype: (makefile, target, defines)} the run's config will build."""
+    return csc_template.builds(csc_template.load(combo["topology"]), **run_defines(args, combo))
+
+
+def render_config(args, combo, trust_feedback, commands=None):
+    template = csc_template.load(combo["topology"])
+    return csc_template.render(
+        template,
+        seed=combo["seed"],
+        placeholders={
+            "SIM_TIME_MS": int(args.sim_time * 1000),
+            "SIM_TIME_SEC": args.sim_time,
+            "TRUST_POLL_MS": int(os.environ.get("TRUST_POLL_MS", "1000")),
+            "TRUST_FEEDBACK_PATH": trust_feedback,
+        },
+        drop_plugins={csc_template.SERIAL_SOCKET_PLUGIN},
+        commands=commands,
+        **run_defines(args, combo),
     )
+
+
+def firmware_variants(args, combos):
+    """Distinct (makefile, target, DEFINES) builds implied by the sweep, keyed by cache key."""
+    variants = {}
+    for combo in combos:
+        for build in config_builds(args, combo).values():
+            variants.setdefault(firmware_cache.firmware_key(*build), build)
+    return variants
+
+
+def prebuild_firmware(args, combos, results_dir):
+    variants = firmware_variants(args, combos)
+    log_dir = results_dir / "prebuild_logs"
+    print(f"Prebuilding {len(variants)} firmware variants...")
+    results = firmware_cache.prebuild(variants, args.jobs)
+    failures = []
+    for key, (ok, output) in sorted(results.items()):
+        if ok:
+            continue
+        makefile, target, defines = variants[key]
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = log_dir / f"{target}-{key}.log"
+        log_path.write_text(f"DEFINES={defines}\n\n{output}")
+        failures.append(log_path)
+    return failures
+
+
+def run_simulation(args, combo, results_dir, workspace=None):
+    topo_name = Path(combo["topology"]).stem
+    run_name = combo_run_name(combo)
     run_dir = results_dir / run_name
     log_dir = run_dir / "logs"
+    if not args.dry_run and run_dir.exists():
+        # A rerun (--resume, later adaptive rounds) starts clean: trust_engine
+        # follows from the end of the log, live_monitor reads it from byte 0,
+        # and the watchdog and timings key off its first growth.
+        shutil.rmtree(run_dir)
     log_dir.mkdir(parents=True, exist_ok=True)
 
     meta = {
@@ -115,48 +450,42 @@ def run_simulation(args, combo, results_dir):
         "seed": combo["seed"],
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
     }
+    if combo.get("sink"):
+        meta["point"] = combo["point"]
+        meta["sink"] = combo["sink"]
     write_run_meta(log_dir, meta)
 
     if args.dry_run:
-        return run_name, "planned"
+        return run_name, "planned", ""
 
     trust_engine = PROJECT_DIR / "tools" / "trust_engine" / "target" / "release" / "trust_engine"
     if not trust_engine.exists():
         raise RuntimeError("trust_engine binary missing; build it in tools/trust_engine first.")
 
-    temp_config = PROJECT_DIR / "configs" / f"temp_{run_name}.csc"
-    sim_time_ms = int(args.sim_time * 1000)
-    trust_feedback = run_dir / "trust_feedback.txt"
+    append_journal(results_dir, {"event": "start", "run": run_name})
+    timings = {}
+    mark = time.monotonic()
 
-    contents = topo_path.read_text()
-    contents = apply_replacements(
-        contents,
-        [
-            (r"<randomseed>\d+</randomseed>", f"<randomseed>{combo['seed']}</randomseed>"),
-            (r"@SIM_TIME_MS@", str(sim_time_ms)),
-            (r"@SIM_TIME_SEC@", str(args.sim_time)),
-            (r"@TRUST_POLL_MS@", str(trust_poll_ms)),
-            (r"@TRUST_FEEDBACK_PATH@", str(trust_feedback)),
-            (r"BRPL_MODE=\d", "BRPL_MODE=1"),
-            (r"TRUST_ENABLED=\d", f"TRUST_ENABLED={combo['trust']}"),
-            (r"ATTACK_DROP_PCT=\d+", f"ATTACK_DROP_PCT={combo['attack_rate']}"),
-            (r"SEND_INTERVAL_SECONDS=\d+", f"SEND_INTERVAL_SECONDS={args.send_interval}"),
-            (r"WARMUP_SECONDS=\d+", f"WARMUP_SECONDS={args.warmup}"),
-            (r",PROJECT_CONF_PATH=[^,< ]+", ""),
-            (r",PROJECT_CONF_PATH=\"[^\"]+\"", ""),
-        ],
-    )
-    trust_lambda = combo["lambda"] if combo["lambda"] is not None else 0
-    trust_gamma = combo["gamma"] if combo["gamma"] is not None else 1
-    contents = update_trust_defines(contents, trust_lambda, trust_gamma)
-    contents = remove_serial_socket_plugin(contents)
-    temp_config.write_text(contents)
+    # Without a workspace the run uses the shared checkout (serial mode).
+    root_dir = workspace if workspace is not None else PROJECT_DIR
+    temp_config = root_dir / "configs" / f"temp_{run_name}.csc"
+    trust_feedback = run_dir / "trust_feedback.txt"
 
+    builds = config_builds(args, combo)
+    mark = lap(timings, "render", mark)
+    cached = {}
+    build_dir = root_dir / "motes" / "build"
     if args.clean_build:
-        shutil.rmtree(PROJECT_DIR / "motes" / "build", ignore_errors=True)
+        shutil.rmtree(build_dir, ignore_errors=True)
+    elif args.firmware_cache:
+        hits, _misses = firmware_cache.restore_builds(builds, build_dir)
+        cached = dict.fromkeys(hits, firmware_cache.CACHED_COMMAND)
+    mark = lap(timings, "firmware_cache", mark)
+    temp_config.write_text(render_config(args, combo, trust_feedback, cached))
+    mark = lap(timings, "render", mark)
 
-    trust_feedback.touch(exist_ok=True)
-    (log_dir / "COOJA.testlog").touch(exist_ok=True)
+    trust_feedback.touch()
+    (log_dir / "COOJA.testlog").touch()
 
     trust_engine_cmd = [
         str(trust_engine),
@@ -191,19 +520,58 @@ def run_simulation(args, combo, results_dir):
         "2",
         "--follow",
     ]
+    if combo.get("sink"):
+        trust_engine_cmd += sink_design.engine_args(combo["sink"])
     trust_engine_log = (run_dir / "trust_engine.log").open("w")
     trust_proc = subprocess.Popen(trust_engine_cmd, stdout=trust_engine_log, stderr=subprocess.STDOUT)
+    sampler = None
+    if args.resource_interval > 0:
+        sampler = proc_sampler.ResourceSampler(run_dir / proc_sampler.RESOURCES_NAME, args.resource_interval)
+        sampler.add("trust_engine", trust_proc.pid)
+        sampler.start()
+
+    live_proc = None
+    if args.live_interval > 0:
+        live_cmd = [
+            sys.executable,
+            str(PROJECT_DIR / "scripts" / "live_monitor.py"),
+            str(run_dir),
+            "--interval",
+            str(args.live_interval),
+            "--grace",
+            str(args.warmup),
+            "--attacker-id",
+            "2",
+        ]
+        if args.watchdog:
+            live_cmd.append("--abort-on-failure")
+        if args.early_stop:
+            live_cmd += [
+                "--stop-on-converge",
+                "--converge-windows",
+                str(args.early_stop_windows),
+                "--converge-pdr-tol",
+                str(args.early_stop_pdr_tol),
+                "--converge-e1-tol",
+                str(args.early_stop_e1_tol),
+            ]
+        live_proc = subprocess.Popen(live_cmd, stdout=subprocess.DEVNULL)
+
+    java_opts = args.java_opts.split()
+    if workspace is not None:
+        # Cooja unpacks mote libraries into java.io.tmpdir; keep workers apart.
+        java_opts.append(f"-Djava.io.tmpdir={workspace / 'tmp'}")
 
     env = os.environ.copy()
     env["CONTIKI_NG_PATH"] = str(args.contiki_path)
     env["COOJA_PATH"] = str(args.cooja_path)
     env["SERIAL_SOCKET_DISABLE"] = "1"
-    env["JAVA_OPTS"] = args.java_opts
+    env["JAVA_OPTS"] = " ".join(java_opts)
 
     cooja_cmd = [
         "java",
         "--enable-preview",
-        *args.java_opts.split(),
+        *java_opts,
         "-jar",
         str(Path(args.cooja_path) / "tools" / "cooja" / "build" / "libs" / "cooja.jar"),
         "--no-gui",
@@ -214,30 +582,90 @@ def run_simulation(args, combo, results_dir):
     ]
 
     status = "completed"
+    reason = ""
+    outcome = None
+    progress = {}
+    started = time.monotonic()
+    launched_wall = time.time()
     try:
         with (run_dir / "cooja_output.log").open("w") as handle:
-            subprocess.run(
-                cooja_cmd,
-                stdout=handle,
-                stderr=subprocess.STDOUT,
-                env=env,
-                timeout=args.timeout,
-                check=True,
+            cooja_proc = subprocess.Popen(cooja_cmd, stdout=handle, stderr=subprocess.STDOUT, env=env)
+            if sampler is not None:
+                sampler.add("java", cooja_proc.pid)
+            outcome = supervise_cooja(
+                cooja_proc,
+                args.timeout,
+                live_proc if args.early_stop or args.watchdog else None,
+                run_dir,
+                stall_timeout=args.stall_timeout if args.watchdog else 0,
+                progress=progress,
+                startup_timeout=args.startup_timeout if args.watchdog else 0,
             )
+        if outcome is None and cooja_proc.returncode != 0:
+            raise subprocess.CalledProcessError(cooja_proc.returncode, cooja_cmd)
     except subprocess.TimeoutExpired:
         status = "timeout"
-    except subprocess.CalledProcessError:
+        reason = "cooja_timeout"
+    except subprocess.CalledProcessError as exc:
         status = "failed"
+        reason = f"cooja_exit={exc.returncode}"
+    else:
+        if outcome is not None and outcome["action"] == "abort":
+            status = "aborted"
+            reason = outcome["reason"]
+            print(f"[WATCHDOG] {run_name}: aborted ({reason})", file=sys.stderr)
     finally:
+        cooja_end = time.monotonic()
+        if sampler is not None:
+            sampler.stop()
+        startup = progress.get("first_log", cooja_end) - started
+        compiled = [build[1] for name, build in builds.items() if name not in cached]
+        timings["firmware_build"] = firmware_build_time(build_dir, compiled, launched_wall, startup)
+        timings["jvm_start"] = startup - timings["firmware_build"]
+        timings["simulation"] = cooja_end - started - startup
+        mark = cooja_end
         trust_proc.terminate()
         try:
             trust_proc.wait(timeout=5)
         except subprocess.TimeoutExpired:
             trust_proc.kill()
         trust_engine_log.close()
+        mark = lap(timings, "trust_shutdown", mark)
+        if live_proc is not None:
+            # Give it a moment to see SIMULATION_FINISHED and publish the final snapshot.
+            try:
+                live_proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                live_proc.terminate()
+                live_proc.wait()
+        mark = lap(timings, "monitor_shutdown", mark)
         temp_config.unlink(missing_ok=True)
 
-    return run_name, status
+    # A startup_stalled abort may have killed Cooja mid-compile; keep its build out of the cache.
+    if status not in ("timeout", "failed") and reason != "startup_stalled" and args.firmware_cache:
+        firmware_cache.store_builds({name: b for name, b in builds.items() if name not in cached}, build_dir)
+        mark = lap(timings, "firmware_cache", mark)
+    meta["wall_time_s"] = round(time.monotonic() - started, 1)
+    early_stop = outcome is not None and outcome["action"] == "early_stop"
+    meta["early_stop"] = early_stop
+    meta["stop_sim_time_s"] = outcome["snapshot"]["sim_time_s"] if early_stop else args.sim_time
+    meta["status"] = status
+    meta["reason"] = reason
+
+    if status == "completed":
+        # Columnar copy of the log so re-analysis skips text parsing.
+        testlog_store.convert(log_dir / "COOJA.testlog")
+    lap(timings, "summary", mark)
+    meta["timings"] = {f"{stage}_s": round(timings.get(stage, 0.0), 3) for stage in TIMING_STAGES}
+    meta["timings"]["total_s"] = round(sum(timings.values()), 3)
+    meta["timings"]["sim_time_s"] = reached_sim_time(run_dir, meta)
+    # Simulated seconds per wall second of the simulation stage.
+    if meta["timings"]["sim_time_s"] and timings["simulation"] > 0:
+        meta["sim_speed"] = round(meta["timings"]["sim_time_s"] / timings["simulation"], 3)
+    if sampler is not None:
+        meta["resources"] = sampler.summary()
+    write_run_meta(log_dir, meta)
+    return run_name, status, reason
 
 
 def generate_combos(args, topologies):
@@ -302,108 +730,589 @@ def generate_combos(args, topologies):
     return combos
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--dry-run", action="store_true", help="Only create sweep matrix")
-    parser.add_argument("--include-attack-extremes", action="store_true", help="Add 0/70 attack rates")
-    parser.add_argument("--include-control-topology", action="store_true", help="Include T2_random_15_seed1")
-    parser.add_argument("--include-normal-sanity", action="store_true", help="Run trust-on sanity for attack=0")
-    parser.add_argument("--seeds", nargs="+", type=int, default=[111111, 222222, 333333, 444444, 555555])
-    parser.add_argument("--sim-time", type=int, default=600)
-    parser.add_argument("--timeout", type=int, default=900)
-    parser.add_argument("--send-interval", type=int, default=30)
-    parser.add_argument("--warmup", type=int, default=120)
-    parser.add_argument("--clean-build", action="store_true")
-    parser.add_argument("--contiki-path", default=str(PROJECT_DIR / "contiki-ng-brpl"))
-    parser.add_argument("--cooja-path", default="/home/dev/contiki-ng")
-    parser.add_argument("--java-opts", default="-Xmx4G -Xms2G")
-    args = parser.parse_args()
+def screen_topologies(args, topologies, combos):
+    """Drop (or cut to one seed) combos on topologies whose static exposure is below --min-exposure.
 
-    topologies = [
-        str(PROJECT_DIR / "configs" / "topologies" / "T3.csc"),
-        str(PROJECT_DIR / "configs" / "topologies" / "T1_S.csc"),
-    ]
-    if args.include_control_topology:
-        topologies.append(str(PROJECT_DIR / "configs" / "topologies" / "T2_random_15_seed1.csc"))
+    Returns (combos, topology_exposure rows). Topologies that cannot be
+    analysed are kept.
+    """
+    rows = []
+    low = set()
+    for topo in topologies:
+        try:
+            row = topology_exposure.analyze(topo)
+        except (OSError, ValueError, topology_exposure.ET.ParseError) as exc:
+            print(f"[WARN] exposure analysis skipped for {topo}: {exc}", file=sys.stderr)
+            continue
+        row["action"] = ""
+        if float(row["exposure"]) < args.min_exposure:
+            low.add(topo)
+            row["action"] = args.low_exposure
+            print(f"Low predicted exposure {row['exposure']} for {Path(topo).stem}: {args.low_exposure}")
+        rows.append(row)
+    if args.low_exposure == "skip":
+        combos = [c for c in combos if c["topology"] not in low]
+    else:
+        first_seed = args.seeds[0]
+        combos = [c for c in combos if c["topology"] not in low or c["seed"] == first_seed]
+    return combos, rows
+
+
+def expand_design(args, combos, points):
+    """Replace the trust lambda/gamma grid with one run per sink design point.
+
+    Attack-scenario trust runs collapse to (--design-lambda, --design-gamma)
+    and are repeated for every point; baselines are left as they are.
+    """
+    expanded = []
+    seen = set()
+    for combo in combos:
+        if combo["trust"] != 1 or combo["scenario"] != "attack":
+            expanded.append(combo)
+            continue
+        key = (combo["topology"], combo["attack_rate"], combo["seed"])
+        if key in seen:
+            continue
+        seen.add(key)
+        for index, point in enumerate(points):
+            expanded.append(
+                {
+                    **combo,
+                    "lambda": args.design_lambda,
+                    "gamma": args.design_gamma,
+                    "point": index,
+                    "sink": point,
+                }
+            )
+    return expanded
 
-    combos = generate_combos(args, topologies)
 
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
-    results_dir = PROJECT_DIR / "results" / f"experiments-{timestamp}"
-    results_dir.mkdir(parents=True, exist_ok=True)
+def run_batch(args, combos, results_dir, retry_failed=True):
+    """Run combos into results_dir: sweep matrix, journal, simulations and summary.
 
+    With args.resume, runs the journal records as completed are skipped, and
+    so are failed/timed-out/aborted ones unless retry_failed.
+    """
+    reasons = {}
+    journal = load_journal(results_dir, reasons) if args.resume else {}
     matrix_path = results_dir / "sweep_matrix.csv"
     matrix_rows = []
+    pending = []
     for combo in combos:
-        topo_name = Path(combo["topology"]).stem
-        run_name = build_run_name(
-            topo_name,
-            combo["scenario"],
-            combo["attack_rate"],
-            combo["trust"],
-            combo["lambda"],
-            combo["gamma"],
-            combo["seed"],
-        )
+        run_name = combo_run_name(combo)
+        status = "planned"
+        reason = ""
+        if journal.get(run_name) == "completed" and run_outputs_valid(results_dir / run_name):
+            status = "completed"
+        elif not retry_failed and journal.get(run_name) in ("failed", "timeout", "aborted"):
+            status = journal[run_name]
+            # Journals written before finish records carried a reason fall back to run_meta.json.
+            reason = reasons.get(run_name) or read_run_meta(results_dir / run_name).get("reason", "")
+        else:
+            pending.append(combo)
         matrix_rows.append(
             {
                 "run": run_name,
-                "topology": topo_name,
+                "topology": Path(combo["topology"]).stem,
                 "scenario": combo["scenario"],
                 "attack_rate": combo["attack_rate"],
                 "trust": combo["trust"],
                 "lambda": combo["lambda"] if combo["lambda"] is not None else "NA",
                 "gamma": combo["gamma"] if combo["gamma"] is not None else "NA",
                 "seed": combo["seed"],
-                "status": "planned",
+                "status": status,
+                "reason": reason,
+                **(resource_columns(results_dir / run_name) if status == "completed" else {}),
             }
         )
-    with matrix_path.open("w", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            [
-                "run",
-                "topology",
-                "scenario",
-                "attack_rate",
-                "trust",
-                "lambda",
-                "gamma",
-                "seed",
-                "status",
-            ],
-        )
-        writer.writeheader()
-        writer.writerows(matrix_rows)
+    write_csv_atomic(matrix_path, MATRIX_FIELDS, matrix_rows)
+    matrix_index = {row["run"]: row for row in matrix_rows}
+    if args.resume:
+        print(f"Resuming {results_dir}: {len(combos) - len(pending)} completed, {len(pending)} to run")
+    timings_path = results_dir / TIMINGS_NAME
+    timing_rows = {}
+    if timings_path.exists():
+        with timings_path.open(newline="") as handle:
+            timing_rows = {row["run"]: row for row in csv.DictReader(handle)}
 
-    statuses = {}
-    for combo in combos:
-        run_name, status = run_simulation(args, combo, results_dir)
-        statuses[run_name] = status
-        if args.dry_run:
-            continue
+    def record_status(run_name, status, reason=""):
+        append_journal(results_dir, {"event": "finish", "run": run_name, "status": status, "reason": reason})
+        matrix_index[run_name]["status"] = status
+        matrix_index[run_name]["reason"] = reason
+        matrix_index[run_name].update(resource_columns(results_dir / run_name))
+        write_csv_atomic(matrix_path, MATRIX_FIELDS, matrix_rows)
+        row = timing_row(results_dir / run_name)
+        if row is not None:
+            timing_rows[run_name] = row
+            write_csv_atomic(timings_path, TIMING_FIELDS, list(timing_rows.values()))
 
-    if not args.dry_run:
-        with matrix_path.open(errors="ignore") as handle:
-            reader = csv.DictReader(handle)
-            rows = []
-            for row in reader:
-                row["status"] = statuses.get(row["run"], row["status"])
-                rows.append(row)
-        with matrix_path.open("w", newline="") as handle:
-            writer = csv.DictWriter(handle, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows(rows)
+    if not args.dry_run and args.prebuild and args.firmware_cache and not args.clean_build:
+        failures = prebuild_firmware(args, pending, results_dir)
+        if failures:
+            print("Firmware prebuild failed; see:", file=sys.stderr)
+            for log_path in failures:
+                print(f"  {log_path}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.dry_run:
+        for combo in pending:
+            run_simulation(args, combo, results_dir)
+    elif args.jobs == 1:
+        for combo in pending:
+            record_status(*run_simulation(args, combo, results_dir))
+    else:
+        slot_counter = multiprocessing.Value("i", 0)
+        with ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=init_worker,
+            initargs=(results_dir, args.contiki_path, slot_counter),
+        ) as pool:
+            futures = [
+                pool.submit(run_in_worker, args, combo, results_dir) for combo in pending
+            ]
+            for future in as_completed(futures):
+                record_status(*future.result())
 
+    if not args.dry_run:
         summary_cmd = [
             sys.executable,
             str(PROJECT_DIR / "scripts" / "experiment_summary.py"),
             str(results_dir),
             "--matrix",
             str(matrix_path),
+            "--workers",
+            str(args.jobs),
         ]
         subprocess.run(summary_cmd, check=False)
 
+
+def seed_sequence(seeds, count):
+    """--seeds first, then 111111*k style seeds until count are available."""
+    out = list(dict.fromkeys(seeds))
+    k = 1
+    while len(out) < count:
+        if 111111 * k not in out:
+            out.append(111111 * k)
+        k += 1
+    return out[:count]
+
+
+def seed_group(combo):
+    """Key matching experiment_summary's GROUP_DIMS columns."""
+    return (
+        combo["topo_name"],
+        str(combo["attack_rate"]),
+        str(combo["trust"]),
+        "NA" if combo["lambda"] is None else str(combo["lambda"]),
+        "NA" if combo["gamma"] is None else str(combo["gamma"]),
+        "NA" if combo.get("point") is None else str(combo["point"]),
+    )
+
+
+def read_group_ci(aggregate_path):
+    """{group key: (n, ci95_pdr, ci95_e1)} from aggregate_by_group.csv (blank -> None)."""
+    groups = {}
+    if not aggregate_path.exists():
+        return groups
+    with aggregate_path.open(newline="") as handle:
+        for row in csv.DictReader(handle):
+            key = (row["topology"], row["attack_rate"], row["trust"], row["lambda"], row["gamma"], row["point"])
+            groups[key] = (
+                int(row["n"]),
+                float(row["ci95_pdr"]) if row.get("ci95_pdr") else None,
+                float(row["ci95_e1"]) if row.get("ci95_e1") else None,
+            )
+    return groups
+
+
+def seed_state(args, seeds, n, ci_pdr, ci_e1):
+    """'converged', 'capped', 'no_valid_runs' or 'open' (needs more seeds)."""
+    if n == 0:
+        # Every seed was invalid; more of them will not help.
+        return "no_valid_runs"
+    tight = (
+        n >= 2
+        and ci_pdr is not None
+        and ci_pdr <= args.ci_target_pdr
+        and (ci_e1 is None or ci_e1 <= args.ci_target_e1)
+    )
+    if tight:
+        return "converged"
+    if seeds >= args.max_seeds:
+        return "capped"
+    return "open"
+
+
+def run_adaptive_seeds(args, combos, results_dir):
+    """Sequential seed allocation.
+
+    Every (topology, attack_rate, trust, lambda, gamma) group starts with
+    --min-seeds seeds. After each round experiment_summary's ci95_pdr and
+    ci95_e1 decide which groups are still too wide; only those get
+    --seed-step more seeds, up to --max-seeds. All rounds share one results
+    directory, resumed between rounds, so the final summary covers every run.
+    """
+    seeds = seed_sequence(args.seeds, args.max_seeds)
+    templates = {}
+    for combo in combos:
+        templates.setdefault(seed_group(combo), combo)
+    allocated = dict.fromkeys(templates, min(args.min_seeds, args.max_seeds))
+    open_groups = set(templates)
+    batch_args = args
+    round_no = 0
+    while True:
+        scheduled = [
+            {**combo, "seed": seed} for key, combo in templates.items() for seed in seeds[: allocated[key]]
+        ]
+        print(f"Seed round {round_no}: {len(open_groups)} open groups, {len(scheduled)} runs scheduled")
+        run_batch(batch_args, scheduled, results_dir, retry_failed=False)
+        if args.dry_run:
+            print("Dry run: further rounds depend on the first round's results; stopping here.")
+            return
+        batch_args = argparse.Namespace(**{**vars(args), "resume": str(results_dir)})
+
+        ci = read_group_ci(results_dir / "aggregate_by_group.csv")
+        rows = []
+        grow = set()
+        for key in sorted(templates):
+            n, ci_pdr, ci_e1 = ci.get(key, (0, None, None))
+            state = seed_state(args, allocated[key], n, ci_pdr, ci_e1)
+            if state == "open" and key in open_groups:
+                grow.add(key)
+            rows.append(
+                dict(zip(SEED_ALLOCATION_FIELDS, key))
+                | {
+                    "seeds": allocated[key],
+                    "n": n,
+                    "ci95_pdr": "" if ci_pdr is None else f"{ci_pdr:.2f}",
+                    "ci95_e1": "" if ci_e1 is None else f"{ci_e1:.4f}",
+                    "state": state,
+                }
+            )
+        write_csv_atomic(results_dir / SEED_ALLOCATION_NAME, SEED_ALLOCATION_FIELDS, rows)
+        if not grow:
+            return
+        for key in grow:
+            allocated[key] = min(args.max_seeds, allocated[key] + args.seed_step)
+        open_groups = grow
+        round_no += 1
+
+
+def halving_rungs(args):
+    """[(sim_time, seeds)] per rung, cheapest first; the last rung is the full sweep."""
+    rungs = []
+    for rung in range(args.halving_rungs):
+        scale = args.halving_eta ** (args.halving_rungs - 1 - rung)
+        # Keep a few send intervals after warmup so PDR/E1 mean something.
+        floor = args.warmup + 4 * args.send_interval
+        sim_time = min(args.sim_time, max(floor, int(args.sim_time / scale)))
+        n_seeds = 1 if rung == 0 else max(1, math.ceil(len(args.seeds) / scale))
+        rungs.append((sim_time, args.seeds[:n_seeds]))
+    return rungs
+
+
+def config_key(combo):
+    point = combo.get("point")
+    return (
+        combo["topo_name"],
+        str(combo["attack_rate"]),
+        str(combo["lambda"]),
+        str(combo["gamma"]),
+        "NA" if point is None else str(point),
+    )
+
+
+def score_configs(summary_path, keys):
+    """{config key: (runs, mean pdr, mean e1)} from a rung's experiment_summary.csv.
+
+    e1 is the summary's E1 percentage (exposure.csv's e1 column).
+    """
+    values = {key: ([], []) for key in keys}
+    if summary_path.exists():
+        with summary_path.open(newline="") as handle:
+            for row in csv.DictReader(handle):
+                key = (row["topology"], row["attack_rate"], row["lambda"], row["gamma"], row["point"])
+                if key not in values or not row.get("pdr") or not row.get("e1"):
+                    continue
+                values[key][0].append(float(row["pdr"]))
+                values[key][1].append(float(row["e1"]))
+    return {
+        key: (len(pdr), sum(pdr) / len(pdr), sum(e1) / len(e1)) if pdr else (0, None, None)
+        for key, (pdr, e1) in values.items()
+    }
+
+
+def rank_key(score, min_pdr):
+    """Best first: lowest mean E1 (%) among configs meeting min_pdr, then the rest by PDR; unscored last."""
+    runs, pdr, e1 = score
+    if not runs:
+        return (2, 0.0)
+    if pdr >= min_pdr:
+        return (0, e1)
+    return (1, -pdr)
+
+
+def run_halving(args, combos, results_dir):
+    """Successive halving over trust (lambda, gamma) configs.
+
+    Every trust configuration starts at the shortest sim time with one seed;
+    after each rung only the best 1/eta per (topology, attack rate) moves on
+    to a longer sim time and more seeds. Baselines (trust off, normal
+    sanity) only run in the last, full-fidelity rung. Each rung is a normal
+    sweep directory (rung0, rung1, ...); halving.csv records the ranking.
+    """
+    tuned = [c for c in combos if c["trust"] == 1 and c["scenario"] == "attack"]
+    baselines = [c for c in combos if c not in tuned]
+    survivors = sorted({config_key(c) for c in tuned})
+    rungs = halving_rungs(args)
+    halving_path = results_dir / HALVING_NAME
+    halving_rows = []
+    for rung, (sim_time, seeds) in enumerate(rungs):
+        last = rung == len(rungs) - 1
+        rung_args = argparse.Namespace(**{**vars(args), "sim_time": sim_time, "seeds": seeds})
+        rung_combos = [
+            c for c in tuned if config_key(c) in survivors and c["seed"] in seeds
+        ]
+        if last:
+            rung_combos += [c for c in baselines if c["seed"] in seeds]
+        rung_dir = results_dir / f"rung{rung}"
+        rung_dir.mkdir(parents=True, exist_ok=True)
+        print(f"Rung {rung}: {len(survivors)} configs x {len(seeds)} seeds at {sim_time}s -> {rung_dir}")
+        run_batch(rung_args, rung_combos, rung_dir)
+        if args.dry_run:
+            print("Dry run: later rungs depend on rung 0 results; stopping here.")
+            return
+
+        scores = score_configs(rung_dir / "experiment_summary.csv", survivors)
+        groups = {}
+        for key in survivors:
+            groups.setdefault(key[:2], []).append(key)
+        promoted = set()
+        ranks = {}
+        for keys in groups.values():
+            keys.sort(key=lambda k: (rank_key(scores[k], args.halving_min_pdr), k))
+            ranks.update((key, index + 1) for index, key in enumerate(keys))
+            keep = max(1, math.ceil(len(keys) / args.halving_eta))
+            promoted.update(k for k in keys[:keep] if scores[k][0])
+        for key in survivors:
+            runs, pdr, e1 = scores[key]
+            halving_rows.append(
+                {
+                    "rung": rung,
+                    "sim_time": sim_time,
+                    "seeds": len(seeds),
+                    "topology": key[0],
+                    "attack_rate": key[1],
+                    "lambda": key[2],
+                    "gamma": key[3],
+                    "point": key[4],
+                    "runs": runs,
+                    "pdr": "" if pdr is None else f"{pdr:.2f}",
+                    "e1": "" if e1 is None else f"{e1:.4f}",
+                    "rank": ranks[key],
+                    "promoted": int(key in promoted and not last),
+                }
+            )
+        write_csv_atomic(halving_path, HALVING_FIELDS, halving_rows)
+        if not last:
+            survivors = sorted(promoted)
+            if not survivors:
+                print("No configuration produced valid results; stopping.", file=sys.stderr)
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="Only create sweep matrix")
+    parser.add_argument("--include-attack-extremes", action="store_true", help="Add 0/70 attack rates")
+    parser.add_argument("--include-control-topology", action="store_true", help="Include T2_random_15_seed1")
+    parser.add_argument("--include-normal-sanity", action="store_true", help="Run trust-on sanity for attack=0")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[111111, 222222, 333333, 444444, 555555])
+    parser.add_argument("--sim-time", type=int, default=600)
+    parser.add_argument("--timeout", type=int, default=900)
+    parser.add_argument("--send-interval", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=120)
+    parser.add_argument("--clean-build", action="store_true", help="Always recompile motes (bypass firmware cache)")
+    parser.add_argument(
+        "--no-firmware-cache",
+        dest="firmware_cache",
+        action="store_false",
+        help="Do not reuse or populate .firmware_cache",
+    )
+    parser.add_argument("--contiki-path", default=str(PROJECT_DIR / "contiki-ng-brpl"))
+    parser.add_argument("--cooja-path", default="/home/dev/contiki-ng")
+    parser.add_argument("--java-opts", default="-Xmx4G -Xms2G")
+    parser.add_argument(
+        "--no-prebuild",
+        dest="prebuild",
+        action="store_false",
+        help="Skip compiling all firmware variants before the first simulation",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent Cooja+trust_engine runs")
+    parser.add_argument(
+        "--live-interval",
+        type=float,
+        default=30.0,
+        help="Simulated seconds between live_monitor snapshots in each run dir (0 disables)",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RESULTS_DIR",
+        help="Continue an interrupted sweep, rerunning only runs not completed with valid outputs",
+    )
+    parser.add_argument(
+        "--early-stop",
+        action="store_true",
+        help="End a run once windowed PDR/E1 stay within tolerance (needs --live-interval > 0)",
+    )
+    parser.add_argument("--early-stop-windows", type=int, default=3, help="Stable snapshots required")
+    parser.add_argument("--early-stop-pdr-tol", type=float, default=1.0, help="PDR tolerance (percentage points)")
+    parser.add_argument("--early-stop-e1-tol", type=float, default=1.0, help="E1 tolerance (percentage points)")
+    parser.add_argument(
+        "--no-watchdog",
+        dest="watchdog",
+        action="store_false",
+        help="Let doomed runs (tx=0, routing not ready with tx=0/rx=0, stalled log) run to --sim-time",
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=float,
+        default=120.0,
+        help="Wall seconds without testlog growth before the watchdog aborts a run (0 disables)",
+    )
+    parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=300.0,
+        help="Wall seconds from Cooja launch to the first testlog line (firmware build and JVM "
+        "start) before the watchdog aborts a run as startup_stalled; keep it below --timeout "
+        "(0 disables)",
+    )
+    parser.add_argument(
+        "--resource-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between /proc samples of the Cooja JVM and trust_engine (0 disables)",
+    )
+    parser.add_argument(
+        "--halving",
+        action="store_true",
+        help="Successive halving: screen lambda/gamma at short sim times, promote the best to full runs. "
+        "Configs rank by lowest mean E1 (%% of delivered packets that crossed the attacker, "
+        "trust_engine's exposure.csv e1) among those meeting --halving-min-pdr",
+    )
+    parser.add_argument("--halving-rungs", type=int, default=3, help="Fidelity levels, the last at --sim-time")
+    parser.add_argument("--halving-eta", type=int, default=3, help="Keep the best 1/eta configs per rung")
+    parser.add_argument(
+        "--halving-min-pdr",
+        type=float,
+        default=80.0,
+        help="Configs below this mean PDR (%%) rank after all that meet it; the rest rank by lowest E1",
+    )
+    parser.add_argument(
+        "--adaptive-seeds",
+        action="store_true",
+        help="Start each group at --min-seeds and add seeds only while its CI is wider than the targets",
+    )
+    parser.add_argument("--min-seeds", type=int, default=3, help="Seeds every group starts with")
+    parser.add_argument("--max-seeds", type=int, default=10, help="Seed cap per group (extends --seeds)")
+    parser.add_argument("--seed-step", type=int, default=2, help="Seeds added per round to groups still open")
+    parser.add_argument(
+        "--ci-target-pdr",
+        type=float,
+        default=2.0,
+        help="Target ci95_pdr half-width in percentage points",
+    )
+    parser.add_argument(
+        "--ci-target-e1",
+        type=float,
+        default=2.0,
+        help="Target ci95_e1 half-width in percentage points",
+    )
+    parser.add_argument(
+        "--design",
+        choices=sink_design.DESIGNS,
+        help="Sample the continuous sink-trust parameters with a Latin hypercube or Sobol design",
+    )
+    parser.add_argument("--design-points", type=int, default=64, help="Design points per trust scenario")
+    parser.add_argument("--design-seed", type=int, default=1, help="LHS permutation / Sobol shift seed")
+    parser.add_argument(
+        "--design-range",
+        action="append",
+        default=[],
+        metavar="NAME=LOW:HIGH[:log]",
+        help="Override a sink parameter range, e.g. SINK_BETA=0.05:0.3 (repeatable)",
+    )
+    parser.add_argument("--design-lambda", type=int, default=3, help="TRUST_LAMBDA used for design runs")
+    parser.add_argument("--design-gamma", type=int, default=2, help="TRUST_PENALTY_GAMMA used for design runs")
+    parser.add_argument(
+        "--min-exposure",
+        type=float,
+        default=0.0,
+        help="Static predicted exposure (topology_exposure.py) below which a topology is screened out",
+    )
+    parser.add_argument(
+        "--low-exposure",
+        choices=["skip", "reduce"],
+        default="skip",
+        help="Screened topologies are skipped, or reduced to the first seed",
+    )
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be >= 1")
+    if args.early_stop and args.live_interval <= 0:
+        parser.error("--early-stop needs --live-interval > 0")
+    if args.adaptive_seeds and args.halving:
+        parser.error("--adaptive-seeds and --halving are separate modes")
+    if args.adaptive_seeds and (not 1 <= args.min_seeds <= args.max_seeds or args.seed_step < 1):
+        parser.error("--adaptive-seeds needs 1 <= --min-seeds <= --max-seeds and --seed-step >= 1")
+    if args.halving and (args.halving_rungs < 1 or args.halving_eta < 2):
+        parser.error("--halving needs --halving-rungs >= 1 and --halving-eta >= 2")
+
+    topologies = [
+        str(PROJECT_DIR / "configs" / "topologies" / "T3.csc"),
+        str(PROJECT_DIR / "configs" / "topologies" / "T1_S.csc"),
+    ]
+    if args.include_control_topology:
+        topologies.append(str(PROJECT_DIR / "configs" / "topologies" / "T2_random_15_seed1.csc"))
+
+    combos = generate_combos(args, topologies)
+    design = None
+    if args.design:
+        ranges = sink_design.default_ranges()
+        try:
+            for text in args.design_range:
+                sink_design.parse_range(text, ranges)
+        except ValueError as exc:
+            parser.error(str(exc))
+        design = sink_design.design_points(args.design, args.design_points, ranges, args.design_seed)
+        combos = expand_design(args, combos, design)
+    exposure_rows = []
+    if args.min_exposure > 0:
+        combos, exposure_rows = screen_topologies(args, topologies, combos)
+
+    if args.resume:
+        results_dir = Path(args.resume).resolve()
+        if not results_dir.is_dir():
+            parser.error(f"--resume directory not found: {results_dir}")
+    else:
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        results_dir = PROJECT_DIR / "results" / f"experiments-{timestamp}"
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+    if design is not None:
+        sink_design.write_design(results_dir / "design.csv", design)
+    if exposure_rows:
+        write_csv_atomic(
+            results_dir / "topology_exposure.csv", topology_exposure.FIELDS + ["action"], exposure_rows
+        )
+    if args.halving:
+        run_halving(args, combos, results_dir)
+    elif args.adaptive_seeds:
+        run_adaptive_seeds(args, combos, results_dir)
+    else:
+        run_batch(args, combos, results_dir)
+
     print(str(results_dir))
 
 
@@ -86,69 +86,32 @@ SINK_W1=${SINK_W1:-0.5}
 SINK_W2=${SINK_W2:-0.5}
 TRUST_ALPHA=${TRUST_ALPHA:-0.5}
 
-# Replace all placeholders like run_experiments.sh does
-sed -e "s/<randomseed>[0-9]*<\/randomseed>/<randomseed>$SEED<\/randomseed>/g" \
-    -e "s/@SIM_TIME_MS@/${SIM_TIME_MS}/g" \
-    -e "s/@SIM_TIME_SEC@/${SIM_TIME}/g" \
-    -e "s|@TRUST_FEEDBACK_PATH@|${TRUST_FEEDBACK_FILE}|g" \
-    -e "s/BRPL_MODE=[0-9]/BRPL_MODE=$BRPL_MODE/g" \
-    -e "s/TRUST_ENABLED=[0-9]/TRUST_ENABLED=$TRUST_ENABLED/g" \
-    -e "s/TRUST_LAMBDA=[0-9][0-9]*/TRUST_LAMBDA=${TRUST_LAMBDA:-0}/g" \
-    -e "s/TRUST_PENALTY_GAMMA=[0-9][0-9]*/TRUST_PENALTY_GAMMA=${TRUST_PENALTY_GAMMA:-1}/g" \
-    -e "s/TRUST_LAMBDA_CONF=[0-9][0-9]*/TRUST_LAMBDA_CONF=${TRUST_LAMBDA:-0}/g" \
-    -e "s/TRUST_PENALTY_GAMMA_CONF=[0-9][0-9]*/TRUST_PENALTY_GAMMA_CONF=${TRUST_PENALTY_GAMMA:-1}/g" \
-    -e "s/,PROJECT_CONF_PATH=[^,< ]*//g" \
-    -e "s/,PROJECT_CONF_PATH=\\\"[^\\\"]*\\\"//g" \
-    -e "s/TRUST_GAMMA=[0-9][0-9]*/TRUST_GAMMA=${TRUST_GAMMA:-1}/g" \
-    -e "/TRUST_GAMMA=/! s/TRUST_LAMBDA=${TRUST_LAMBDA:-0}/TRUST_LAMBDA=${TRUST_LAMBDA:-0},TRUST_GAMMA=${TRUST_GAMMA:-1}/g" \
-    -e "s/ATTACK_MODE=[0-9][0-9]*/ATTACK_MODE=${ATTACK_MODE}/g" \
-    -e "s/ATTACKER_NODE_ID=[0-9][0-9]*/ATTACKER_NODE_ID=${ATTACKER_NODE_ID}/g" \
-    -e "s/SINKHOLE_RANK_DELTA=[0-9][0-9]*/SINKHOLE_RANK_DELTA=${SINKHOLE_RANK_DELTA}/g" \
-    -e "s/ATTACK_DROP_PCT=[0-9][0-9]*/ATTACK_DROP_PCT=$ATTACK_RATE/g" \
-    -e "/ATTACK_MODE=/! s/ATTACK_DROP_PCT=$ATTACK_RATE/ATTACK_DROP_PCT=$ATTACK_RATE,ATTACK_MODE=${ATTACK_MODE}/g" \
-    "$TOPOLOGY" > "$TEMP_CONFIG"
-python3 - <<PY
-import re
-from pathlib import Path
-
-path = Path("$TEMP_CONFIG")
-text = path.read_text()
-
-def fix_defines(match):
-    defines = match.group(2)
-    if "ATTACK_MODE=" not in defines:
-        defines += f",ATTACK_MODE=${ATTACK_MODE}"
-    if "ATTACKER_NODE_ID=" not in defines:
-        defines += f",ATTACKER_NODE_ID=${ATTACKER_NODE_ID}"
-    return match.group(1) + defines
-
-pattern = re.compile(r'(DEFINES=)([^"<]*)')
-lines = []
-for line in text.splitlines():
-    if "DEFINES=" in line:
-        line = pattern.sub(fix_defines, line, count=1)
-    lines.append(line)
-path.write_text("\\n".join(lines) + "\\n")
-PY
-
-# Disable SerialSocketServer
-awk '
-  $0 ~ /<plugin>/ { in_plugin = 1; plugin_buf = $0; next }
-  in_plugin && $0 ~ /org.contikios.cooja.serialsocket.SerialSocketServer/ { skip = 1 }
-  in_plugin {
-    plugin_buf = plugin_buf "\n" $0
-    if($0 ~ /<\/plugin>/) {
-      if(!skip) { print plugin_buf }
-      in_plugin = 0; skip = 0; plugin_buf = ""
-    }
-    next
-  }
-  { print }
-' "$TEMP_CONFIG" > "${TEMP_CONFIG}.tmp" && mv "${TEMP_CONFIG}.tmp" "$TEMP_CONFIG"
-
-# Clean build
-echo "[1/3] Cleaning build..."
-rm -rf motes/build 2>/dev/null || true
+# Render the config from the template like run_experiments.sh does
+# (SerialSocketServer dropped for headless runs)
+python3 scripts/csc_template.py render \
+    --template "$TOPOLOGY" --out "$TEMP_CONFIG" --seed "$SEED" \
+    --placeholder "SIM_TIME_MS=${SIM_TIME_MS}" \
+    --placeholder "SIM_TIME_SEC=${SIM_TIME}" \
+    --placeholder "TRUST_POLL_MS=${TRUST_POLL_MS:-1000}" \
+    --placeholder "TRUST_FEEDBACK_PATH=${TRUST_FEEDBACK_FILE}" \
+    --set "BRPL_MODE=$BRPL_MODE" \
+    --set "TRUST_ENABLED=$TRUST_ENABLED" \
+    --set "TRUST_LAMBDA=${TRUST_LAMBDA:-0}" \
+    --set "TRUST_PENALTY_GAMMA=${TRUST_PENALTY_GAMMA:-1}" \
+    --set "TRUST_LAMBDA_CONF=${TRUST_LAMBDA:-0}" \
+    --set "TRUST_PENALTY_GAMMA_CONF=${TRUST_PENALTY_GAMMA:-1}" \
+    --set "SINKHOLE_RANK_DELTA=${SINKHOLE_RANK_DELTA}" \
+    --set "ATTACK_DROP_PCT=$ATTACK_RATE" \
+    --add "TRUST_GAMMA=${TRUST_GAMMA:-1}" \
+    --add "ATTACK_MODE=${ATTACK_MODE}" \
+    --add "ATTACKER_NODE_ID=${ATTACKER_NODE_ID}" \
+    --drop PROJECT_CONF_PATH \
+    --drop-plugin org.contikios.cooja.serialsocket.SerialSocketServer
+
+# Reuse cached firmware (clean rebuild only on cache miss)
+echo "[1/3] Restoring firmware cache..."
+python3 scripts/firmware_cache.py restore --config "$TEMP_CONFIG" --build-dir motes/build \
+    || rm -rf motes/build 2>/dev/null || true
 
 # Run
 echo "[2/3] Running simulation (400s, fast DIO for multi-hop)..."
@@ -198,6 +161,9 @@ timeout 800 java --enable-preview ${JAVA_OPTS} \
     "$TEMP_CONFIG" > "$PROJECT_DIR/$RUN_DIR/cooja_output.log" 2>&1
 
 COOJA_EXIT=$?
+if [ $COOJA_EXIT -eq 0 ]; then
+    python3 scripts/firmware_cache.py store --config "$TEMP_CONFIG" --build-dir motes/build || true
+fi
 rm -f "$TEMP_CONFIG"
 rm -f "$TEMP_PROJECT_CONF"
 
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Space-filling designs over the continuous trust_engine sink parameters.
+
+A full grid over the eight sink knobs is unaffordable, so a sweep samples
+them with a Latin hypercube or a Sobol sequence instead. Each design point
+becomes a dict {PARAM: value} that engine_args() turns into trust_engine
+flags. Both designs are pure Python; Sobol uses the Joe-Kuo direction
+numbers and an optional random digital shift.
+
+  python3 scripts/sink_design.py --design sobol --points 64 --out design.csv
+"""
+
+import argparse
+import csv
+import math
+import random
+import sys
+
+
+# name -> (trust_engine flag, default, low, high, log scale). Defaults match
+# run_experiments.sh; ranges are the sweep defaults, overridable per run.
+PARAMS = {
+    "SINK_TAU": ("--sink-tau", 0.0, 0.0, 128.0, False),
+    "SINK_LAMBDA_ADV": ("--sink-lambda-adv", 0.01, 0.001, 0.1, True),
+    "SINK_LAMBDA_STAB": ("--sink-lambda-stab", 0.01, 0.001, 0.1, True),
+    "SINK_BETA": ("--sink-beta", 0.1, 0.02, 0.5, False),
+    "SINK_KAPPA": ("--sink-kappa", 0.0, 0.0, 256.0, False),
+    "SINK_W1": ("--sink-w1", 0.5, 0.0, 1.0, False),
+    "SINK_W2": ("--sink-w2", 0.5, 0.0, 1.0, False),
+    "TRUST_ALPHA": ("--trust-alpha", 0.5, 0.0, 1.0, False),
+}
+DESIGNS = ("lhs", "sobol")
+
+# Joe-Kuo (new-joe-kuo-6.21201) entries for dimensions 2..8: (s, a, m_1..m_s).
+SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+)
+SOBOL_BITS = 32
+
+
+def default_ranges():
+    return {name: (low, high, log) for name, (_flag, _default, low, high, log) in PARAMS.items()}
+
+
+def parse_range(text, ranges):
+    """Apply a NAME=LOW:HIGH[:log] override to ranges (in place)."""
+    try:
+        name, bounds = text.split("=", 1)
+        parts = bounds.split(":")
+        low, high = float(parts[0]), float(parts[1])
+    except (ValueError, IndexError):
+        raise ValueError(f"expected NAME=LOW:HIGH[:log], got {text!r}")
+    name = name.strip().upper()
+    if name not in PARAMS:
+        raise ValueError(f"unknown sink parameter {name}; choose from {', '.join(PARAMS)}")
+    log = len(parts) > 2 and parts[2] == "log"
+    if high < low or (log and low <= 0):
+        raise ValueError(f"bad range for {name}: {bounds}")
+    ranges[name] = (low, high, log)
+    return ranges
+
+
+def latin_hypercube(n, dims, rng):
+    """n points in [0,1)^dims with exactly one point per stratum in every dimension."""
+    columns = []
+    for _ in range(dims):
+        strata = list(range(n))
+        rng.shuffle(strata)
+        columns.append([(s + rng.random()) / n for s in strata])
+    return [list(point) for point in zip(*columns)]
+
+
+def _sobol_vectors(dims):
+    vectors = [[1 << (SOBOL_BITS - k) for k in range(1, SOBOL_BITS + 1)]]
+    for s, a, m in SOBOL_DIRECTIONS[: dims - 1]:
+        v = [m[k] << (SOBOL_BITS - k - 1) for k in range(s)]
+        for k in range(s, SOBOL_BITS):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    value ^= v[k - j]
+            v.append(value)
+        vectors.append(v)
+    return vectors
+
+
+def sobol(n, dims, rng=None):
+    """First n Sobol points in [0,1)^dims (Gray-code order); rng adds a digital shift."""
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol directions only cover {len(SOBOL_DIRECTIONS) + 1} dimensions")
+    vectors = _sobol_vectors(dims)
+    shift = [rng.getrandbits(SOBOL_BITS) if rng else 0 for _ in range(dims)]
+    state = [0] * dims
+    scale = float(1 << SOBOL_BITS)
+    points = []
+    for i in range(n):
+        points.append([(x ^ sh) / scale for x, sh in zip(state, shift)])
+        # Flip the direction number of the lowest zero bit of i.
+        c = (~i & (i + 1)).bit_length() - 1
+        state = [x ^ v[c] for x, v in zip(state, vectors)]
+    return points
+
+
+def scale_point(unit, ranges):
+    point = {}
+    for u, (name, (low, high, log)) in zip(unit, ranges.items()):
+        if log:
+            point[name] = math.exp(math.log(low) + u * (math.log(high) - math.log(low)))
+        else:
+            point[name] = low + u * (high - low)
+    return point
+
+
+def design_points(design, n, ranges=None, seed=None):
+    """List of n {PARAM: value} dicts; seed makes LHS/shifted Sobol reproducible."""
+    ranges = ranges or default_ranges()
+    rng = random.Random(seed) if seed is not None else None
+    if design == "lhs":
+        unit = latin_hypercube(n, len(ranges), rng or random.Random())
+    elif design == "sobol":
+        unit = sobol(n, len(ranges), rng)
+    else:
+        raise ValueError(f"unknown design {design!r}")
+    return [scale_point(u, ranges) for u in unit]
+
+
+def engine_args(point):
+    """trust_engine flags for one design point."""
+    args = []
+    for name, value in point.items():
+        args += [PARAMS[name][0], f"{value:.6g}"]
+    return args
+
+
+def write_design(path, points):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["point"] + list(PARAMS))
+        for index, point in enumerate(points):
+            row = [index]
+            for name, (_flag, default, _low, _high, _log) in PARAMS.items():
+                row.append(f"{point.get(name, default):.6g}")
+            writer.writerow(row)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a space-filling design over the sink-trust parameters.")
+    ap.add_argument("--design", choices=DESIGNS, default="lhs")
+    ap.add_argument("--points", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=1, help="LHS permutation / Sobol shift seed")
+    ap.add_argument("--no-shift", action="store_true", help="Plain (unshifted) Sobol points")
+    ap.add_argument(
+        "--range",
+        action="append",
+        default=[],
+        metavar="NAME=LOW:HIGH[:log]",
+        help="Override a parameter range (repeatable)",
+    )
+    ap.add_argument("--out", help="Write the design CSV here instead of stdout")
+    args = ap.parse_args()
+
+    ranges = default_ranges()
+    try:
+        for text in args.range:
+            parse_range(text, ranges)
+    except ValueError as exc:
+        ap.error(str(exc))
+    seed = None if args.design == "sobol" and args.no_shift else args.seed
+    points = design_points(args.design, args.points, ranges, seed)
+    write_design(args.out or "/dev/stdout", points)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Columnar event store for COOJA.testlog.
+
+Each run's logs/COOJA.testlog is converted once into logs/COOJA.events.npz,
+with one int64 column per event field (tx.node, tx.seq, rx.src_node, rx.key,
+fwd.dropped, parent.parent_node, ...). Node IDs are integers, and packet keys
+are packed as (src << 32) | seq. The archive is a regular NumPy .npz, but it
+is written and read with the standard library, so numpy is not required.
+A store is only used while it matches the size and mtime of its testlog.
+If the text log has been removed (archived sweeps), the store stands in
+for it.
+
+  python3 scripts/testlog_store.py results/experiments-YYYYmmdd-HHMMSS
+"""
+
+import argparse
+import ast
+import json
+import os
+import struct
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+from types import SimpleNamespace
+
+import cooja_testlog as tl
+
+
+STORE_NAME = "COOJA.events.npz"
+STORE_VERSION = 1
+NULL = -(1 << 63)
+
+# CSV record type -> (table, event type, stored columns). Fields not listed
+# (RX src / PARENT parent address strings) come back as None on replay.
+TABLES = {
+    "TX": ("tx", tl.Tx, tl.Tx._fields),
+    "RX": ("rx", tl.Rx, ("line", "root_tagged", "src_node", "seq", "t_recv", "t0", "length")),
+    "DELAY": ("delay", tl.Delay, tl.Delay._fields),
+    "RTT": ("rtt", tl.Rtt, tl.Rtt._fields),
+    "FWD": ("fwd", tl.Fwd, tl.Fwd._fields),
+    "FWD_PKT": ("fwd_pkt", tl.FwdPkt, tl.FwdPkt._fields),
+    "PARENT": ("parent", tl.Parent, ("line", "node", "parent_node")),
+    "ROUTING": ("routing", tl.Routing, ("line", "node", "joined", "parent_node", "rank")),
+    "TRUST": ("trust", tl.Trust, tl.Trust._fields),
+    "TRUST_IN": ("trust_in", tl.TrustIn, tl.TrustIn._fields),
+    "BLACKLIST_ADD": ("blacklist_add", tl.Blacklist, tl.Blacklist._fields),
+    "BLACKLIST_REMOVE": ("blacklist_remove", tl.Blacklist, tl.Blacklist._fields),
+    "PKT_DROP_DEST": ("pkt_drop_dest", tl.PktDrop, tl.PktDrop._fields),
+    "PKT_DROP_SRC": ("pkt_drop_src", tl.PktDrop, tl.PktDrop._fields),
+}
+MARKER_NAMES = tuple(name for _needle, name in tl.MARKERS)
+# Packed (src << 32) | seq keys stored alongside the event columns.
+PACKED_KEYS = {"rx": ("src_node", "seq"), "fwd_pkt": ("src", "seq")}
+
+
+def store_path(log_path):
+    return Path(log_path).with_name(STORE_NAME)
+
+
+def _npy_bytes(column):
+    """Serialize an array('q') as a version 1.0 .npy member."""
+    header = "{'descr': '<i8', 'fortran_order': False, 'shape': (%d,), }" % len(column)
+    # Magic + version + length field + header + newline, padded to 64 bytes.
+    pad = 64 - (10 + len(header) + 1) % 64
+    header = (header + " " * pad + "\n").encode("latin1")
+    if sys.byteorder == "big":
+        column = array("q", column)
+        column.byteswap()
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header + column.tobytes()
+
+
+def _npy_column(data):
+    if data[:6] != b"\x93NUMPY":
+        raise ValueError("not a .npy member")
+    major = data[6]
+    if major == 1:
+        (hlen,), start = struct.unpack("<H", data[8:10]), 10
+    else:
+        (hlen,), start = struct.unpack("<I", data[8:12]), 12
+    header = ast.literal_eval(data[start:start + hlen].decode("latin1"))
+    if header["descr"] != "<i8" or len(header["shape"]) != 1:
+        raise ValueError(f"unsupported column layout: {header}")
+    column = array("q")
+    column.frombytes(data[start + hlen:])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _encode(value):
+    if value is None:
+        return NULL
+    return int(value)
+
+
+def convert(log_path, out_path=None):
+    """Parse log_path once and write its columnar store; returns the store path."""
+    log_path = Path(log_path)
+    out_path = Path(out_path) if out_path else store_path(log_path)
+    columns = {}
+    reader = tl.TestlogReader()
+
+    def consumer(table, fields):
+        cols = [columns.setdefault(f"{table}.{field}", array("q")) for field in fields]
+        pairs = list(zip(cols, fields))
+
+        def callback(ev):
+            for col, field in pairs:
+                col.append(_encode(getattr(ev, field)))
+        return callback
+
+    for kind, (table, _event_type, fields) in TABLES.items():
+        reader.on(kind, consumer(table, fields))
+    marker_line = columns.setdefault("marker.line", array("q"))
+    marker_code = columns.setdefault("marker.code", array("q"))
+
+    def on_marker(ev):
+        marker_line.append(ev.line)
+        marker_code.append(MARKER_NAMES.index(ev.name))
+
+    reader.on("MARKER", on_marker)
+    stat = log_path.stat()
+    reader.read(log_path)
+
+    for table, (src_field, seq_field) in PACKED_KEYS.items():
+        src = columns[f"{table}.{src_field}"]
+        seq = columns[f"{table}.{seq_field}"]
+        columns[f"{table}.key"] = array(
+            "q",
+            (NULL if s == NULL or q == NULL else (s << 32) | (q & 0xFFFFFFFF) for s, q in zip(src, seq)),
+        )
+
+    meta = {
+        "version": STORE_VERSION,
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "lines": reader.line_no,
+        "marker_names": list(MARKER_NAMES),
+    }
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(columns):
+            archive.writestr(f"{name}.npy", _npy_bytes(columns[name]))
+        archive.writestr("meta.json", json.dumps(meta, indent=2))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def load_tables(log_path):
+    """Return {table: {column: array}} plus "meta" for a fresh store, else None."""
+    path = store_path(log_path)
+    try:
+        archive = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile):
+        return None
+    with archive:
+        try:
+            meta = json.loads(archive.read("meta.json"))
+        except (KeyError, ValueError):
+            return None
+        if meta.get("version") != STORE_VERSION:
+            return None
+        try:
+            stat = os.stat(log_path)
+        except FileNotFoundError:
+            stat = None
+        if stat and (stat.st_size, stat.st_mtime_ns) != (meta["source_size"], meta["source_mtime_ns"]):
+            return None
+        tables = {"meta": meta}
+        for name in archive.namelist():
+            if not name.endswith(".npy"):
+                continue
+            table, column = name[:-4].split(".", 1)
+            tables.setdefault(table, {})[column] = _npy_column(archive.read(name))
+    return tables
+
+
+def _decode(value):
+    return None if value == NULL else value
+
+
+def replay(tables, reader):
+    """Feed stored events to a TestlogReader's typed consumers in log order."""
+    wanted = reader.kinds()
+    events = []
+    for kind, (table, event_type, fields) in TABLES.items():
+        if kind not in wanted or table not in tables:
+            continue
+        cols = tables[table]
+        rows = zip(*(cols[field] for field in fields))
+        for row in rows:
+            values = dict.fromkeys(event_type._fields)
+            values.update(zip(fields, map(_decode, row)))
+            if event_type is tl.Rx:
+                values["root_tagged"] = bool(values["root_tagged"])
+            events.append((values["line"], kind, event_type(**values)))
+    if "MARKER" in wanted and "marker" in tables:
+        names = tables["meta"]["marker_names"]
+        marker = tables["marker"]
+        for line, code in zip(marker["line"], marker["code"]):
+            events.append((line, "MARKER", tl.Marker(line, names[code])))
+    events.sort(key=lambda item: item[0])
+    for _line, kind, event in events:
+        reader.emit(kind, event)
+    reader.line_no = tables["meta"]["lines"]
+    return reader
+
+
+def read_events(reader, log_path):
+    """Run reader over log_path, from the columnar store when one is fresh."""
+    if not reader.needs_text():
+        tables = load_tables(log_path)
+        if tables is not None:
+            return replay(tables, reader)
+    return reader.read(log_path)
+
+
+def read_run_stats(log_path):
+    """Same counters as cooja_testlog.read_run_stats, straight from columns when possible."""
+    tables = load_tables(log_path)
+    if tables is None:
+        return tl.read_run_stats(log_path)
+    tx = tables.get("tx", {})
+    rx = tables.get("rx", {})
+    codes = set(tables.get("marker", {}).get("code", ()))
+    names = tables["meta"]["marker_names"]
+    return SimpleNamespace(
+        tx=set(zip(tx.get("node", ()), tx.get("seq", ()))),
+        rx=set(zip(map(_decode, rx.get("src_node", ())), rx.get("seq", ()))),
+        delays=list(tables.get("delay", {}).get("delay", ())),
+        routing_timeout=names.index("ROUTING_WAIT_TIMEOUT") in codes,
+        routing_wait=names.index("ROUTING_WAIT") in codes,
+    )
+
+
+def iter_logs(paths):
+    for path in paths:
+        path = Path(path)
+        if path.is_file():
+            yield path
+        else:
+            yield from sorted(path.rglob("COOJA.testlog"))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert COOJA.testlog files into columnar event stores.")
+    ap.add_argument("paths", nargs="+", help="COOJA.testlog files or directories to search")
+    ap.add_argument("--force", action="store_true", help="Rebuild stores that are already fresh")
+    args = ap.parse_args()
+
+    converted = skipped = 0
+    for log_path in iter_logs(args.paths):
+        if not args.force and load_tables(log_path) is not None:
+            skipped += 1
+            continue
+        convert(log_path)
+        converted += 1
+    print(f"converted={converted} fresh={skipped}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
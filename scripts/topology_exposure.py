@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Static exposure analysis of a Cooja .csc topology, before any simulation.
+
+Reads mote positions, the UDGM transmitting/interference ranges and the
+attacker mote, builds the unit-disk connectivity graph (grid-indexed, so
+large layouts stay cheap) and runs BFS with shortest-path counts from the
+root and from the attacker. For every sender s, the fraction of its shortest
+paths to node 1 that pass through the attacker is
+
+  sigma(s, a) * sigma(a, root) / sigma(s, root)   if d(s, a) + d(a, root) = d(s, root)
+
+The mean of that fraction over senders is the predicted exposure. Layouts
+near 0 (e.g. T2_random_15_seed1) give PDR >= 95 and E1 ~ 0 however long
+they are simulated.
+
+  python3 scripts/topology_exposure.py configs/topologies/*.csc
+"""
+
+import argparse
+import csv
+import math
+import sys
+import xml.etree.ElementTree as ET
+from collections import deque
+
+
+ROOT_ID = 1
+FIELDS = [
+    "topology",
+    "nodes",
+    "attacker_id",
+    "tx_range",
+    "int_range",
+    "reachable",
+    "mean_depth",
+    "max_depth",
+    "attacker_depth",
+    "attacker_degree",
+    "exposure",
+    "exposed_frac",
+    "captive_frac",
+]
+
+
+def _float(text, default=None):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_csc(path):
+    """Return {"positions": {id: (x, y)}, "tx_range", "int_range", "attacker_id"}."""
+    root = ET.parse(path).getroot()
+    medium = root.find("./simulation/radiomedium")
+    tx_range = _float(medium.findtext("transmitting_range")) if medium is not None else None
+    int_range = _float(medium.findtext("interference_range")) if medium is not None else None
+
+    attacker_types = set()
+    for motetype in root.iter("motetype"):
+        ident = (motetype.findtext("identifier") or "").strip()
+        text = " ".join(
+            (motetype.findtext(tag) or "") for tag in ("identifier", "description", "source")
+        ).lower()
+        if "attacker" in text:
+            attacker_types.add(ident)
+
+    positions = {}
+    attacker_id = None
+    for index, mote in enumerate(root.iter("mote"), start=1):
+        node_id = index
+        pos = None
+        for config in mote.findall("interface_config"):
+            kind = (config.text or "").strip()
+            if kind.endswith(".Position"):
+                pos = (_float(config.findtext("x"), 0.0), _float(config.findtext("y"), 0.0))
+            elif kind.endswith("MoteID"):
+                node_id = int(config.findtext("id", str(index)))
+        if pos is None:
+            continue
+        positions[node_id] = pos
+        if (mote.findtext("motetype_identifier") or "").strip() in attacker_types:
+            attacker_id = node_id
+    return {
+        "positions": positions,
+        "tx_range": tx_range,
+        "int_range": int_range,
+        "attacker_id": attacker_id,
+    }
+
+
+def unit_disk_graph(positions, radius):
+    """Adjacency {id: [ids]} of nodes within radius, using a radius-sized cell grid."""
+    grid = {}
+    for node_id, (x, y) in positions.items():
+        grid.setdefault((int(math.floor(x / radius)), int(math.floor(y / radius))), []).append(node_id)
+    r2 = radius * radius
+    adj = {}
+    for node_id, (x, y) in positions.items():
+        cx, cy = int(math.floor(x / radius)), int(math.floor(y / radius))
+        neighbours = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for other in grid.get((gx, gy), ()):
+                    if other == node_id:
+                        continue
+                    ox, oy = positions[other]
+                    if (ox - x) ** 2 + (oy - y) ** 2 <= r2:
+                        neighbours.append(other)
+        adj[node_id] = sorted(neighbours)
+    return adj
+
+
+def bfs_paths(adj, source):
+    """Hop distance and shortest-path count from source; also the BFS order."""
+    dist = {source: 0}
+    sigma = {source: 1}
+    order = []
+    queue = deque([source])
+    while queue:
+        v = queue.popleft()
+        order.append(v)
+        for w in adj[v]:
+            if w not in dist:
+                dist[w] = dist[v] + 1
+                sigma[w] = 0
+                queue.append(w)
+            if dist[w] == dist[v] + 1:
+                sigma[w] += sigma[v]
+    return dist, sigma, order
+
+
+def root_betweenness(adj, root_id=ROOT_ID):
+    """{node: sum over senders s of the fraction of s's shortest paths to root_id through node}.
+
+    One BFS from the root plus Brandes' dependency accumulation, O(V + E).
+    Divided by the number of other senders it is the exposure an attacker
+    at that node would have.
+    """
+    dist, sigma, order = bfs_paths(adj, root_id)
+    delta = dict.fromkeys(dist, 0.0)
+    for w in reversed(order):
+        for v in adj[w]:
+            if dist.get(v) == dist[w] - 1:
+                delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+    delta.pop(root_id, None)
+    return delta
+
+
+def path_fractions(adj, attacker_id, root_id=ROOT_ID):
+    """{sender: fraction of its shortest paths to root_id that traverse attacker_id}."""
+    d_root, s_root, _order = bfs_paths(adj, root_id)
+    d_att, s_att, _order = bfs_paths(adj, attacker_id)
+    out = {}
+    for node in d_root:
+        if node in (root_id, attacker_id):
+            continue
+        if attacker_id in d_root and d_att.get(node, math.inf) + d_root[attacker_id] == d_root[node]:
+            out[node] = s_att[node] * s_root[attacker_id] / s_root[node]
+        else:
+            out[node] = 0.0
+    return out
+
+
+def analyze(path, attacker_id=None, tx_range=None):
+    """One FIELDS row for a .csc; attacker_id/tx_range override what the file says."""
+    topo = parse_csc(path)
+    positions = topo["positions"]
+    attacker_id = attacker_id or topo["attacker_id"]
+    tx_range = tx_range or topo["tx_range"]
+    if not positions or ROOT_ID not in positions or not tx_range:
+        raise ValueError("no root mote or transmitting range")
+    adj = unit_disk_graph(positions, tx_range)
+    depth, _sigma, _order = bfs_paths(adj, ROOT_ID)
+    senders = [n for n in depth if n not in (ROOT_ID, attacker_id)]
+    fractions = path_fractions(adj, attacker_id) if attacker_id in positions else {}
+    values = list(fractions.values())
+    return {
+        "topology": path,
+        "nodes": len(positions),
+        "attacker_id": attacker_id if attacker_id is not None else "",
+        "tx_range": tx_range,
+        "int_range": topo["int_range"] if topo["int_range"] is not None else "",
+        "reachable": len(depth),
+        "mean_depth": f"{sum(depth[n] for n in senders) / len(senders):.2f}" if senders else "",
+        "max_depth": max(depth.values()),
+        "attacker_depth": depth.get(attacker_id, ""),
+        "attacker_degree": len(adj.get(attacker_id, ())),
+        "exposure": f"{sum(values) / len(values):.4f}" if values else "0.0000",
+        "exposed_frac": f"{sum(1 for v in values if v > 0) / len(values):.4f}" if values else "0.0000",
+        "captive_frac": f"{sum(1 for v in values if v >= 1.0 - 1e-12) / len(values):.4f}" if values else "0.0000",
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Predict attacker exposure of .csc topologies without simulating.")
+    ap.add_argument("topologies", nargs="+", help=".csc files")
+    ap.add_argument("--attacker-id", type=int, help="Override the attacker mote id")
+    ap.add_argument("--tx-range", type=float, help="Override the UDGM transmitting range")
+    ap.add_argument("--out", help="Write CSV here instead of stdout")
+    args = ap.parse_args()
+
+    rows = []
+    for path in args.topologies:
+        try:
+            rows.append(analyze(path, args.attacker_id, args.tx_range))
+        except (OSError, ET.ParseError, ValueError) as exc:
+            print(f"[WARN] {path}: skipped ({exc})", file=sys.stderr)
+    handle = open(args.out, "w", newline="") if args.out else sys.stdout
+    writer = csv.DictWriter(handle, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    if args.out:
+        handle.close()
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,9 @@ import sys
 import re
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+import proc_sampler  # noqa: E402
+
 def analyze_crash_log(log_path):
     """JVM 크래시 로그 분석"""
     print("=" * 80)
@@ -70,6 +73,15 @@ def analyze_crash_log(log_path):
             "Enable GC logging: -Xlog:gc*"
         ])
     
+    # run_trust_sweep.py samples the JVM from /proc next to cooja_output.log
+    resources = Path(log_path).parent / proc_sampler.RESOURCES_NAME
+    if resources.exists():
+        java = proc_sampler.summarize(proc_sampler.read_series(resources)).get('java')
+        if java:
+            print(f"  Measured JVM: RSS peak {java['rss_peak_mb']} MB (mean {java['rss_mean_mb']} MB), "
+                  f"CPU mean {java['cpu_mean_pct']}%")
+            results['java_rss_peak_mb'] = java['rss_peak_mb']
+
     if 'SEGV_ACCERR' in content:
         print(f"  ⚠️  Memory access violation (SEGV_ACCERR)")
         print(f"     Native code tried to access protected memory")
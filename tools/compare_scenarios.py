@@ -5,58 +5,58 @@ Compare normal vs attack scenarios and optionally plot summary.
 
 import sys
 import re
-import ipaddress
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from cooja_testlog import TestlogReader  # noqa: E402
+
+LEGACY_TX_RE = re.compile(rb'TX seq=(\d+)')
+LEGACY_ID_RE = re.compile(rb'ID:(\d+)')
 
 
 def parse_log(filename):
     tx_packets = defaultdict(list)
     rx_packets = defaultdict(list)
     delays = []
-    rpl_packets = 0
     pending_tx_seqs = []
-    inferred_sender_id = None
-
-    with open(filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-
-            if 'CSV,RX,' in line:
-                parts = line.split('CSV,RX,')[1].split(',')
-                if len(parts) >= 2:
-                    seq = int(parts[1])
-                    src_ip = parts[0]
-                    try:
-                        ip_obj = ipaddress.ip_address(src_ip)
-                        node_id = int(ip_obj) & 0xffff
-                        rx_packets[node_id].append(seq)
-                        if inferred_sender_id is None:
-                            inferred_sender_id = node_id
-                    except ValueError:
-                        pass
-
-            elif 'CSV,RTT,' in line:
-                parts = line.split('CSV,RTT,')[1].split(',')
-                if len(parts) >= 4:
-                    rtt_ticks = int(parts[3])
-                    delay_ms = rtt_ticks / 2.0
-                    delays.append(delay_ms)
-
-            elif 'TX seq=' in line:
-                match = re.search(r'TX seq=(\d+)', line)
-                if match:
-                    seq = int(match.group(1))
-                    node_match = re.search(r'ID:(\d+)', line)
-                    if node_match:
-                        node_id = int(node_match.group(1))
-                        tx_packets[node_id].append(seq)
-                    elif inferred_sender_id is not None:
-                        tx_packets[inferred_sender_id].append(seq)
-                    else:
-                        pending_tx_seqs.append(seq)
-
-            if 'RPL:' in line or 'DIO' in line or 'DAO' in line:
-                rpl_packets += 1
+    state = {"rpl_packets": 0, "sender": None}
+
+    def on_tx(ev):
+        tx_packets[ev.node].append(ev.seq)
+
+    def on_rx(ev):
+        if ev.src_node is None:
+            return
+        rx_packets[ev.src_node].append(ev.seq)
+        if state["sender"] is None:
+            state["sender"] = ev.src_node
+
+    def on_rtt(ev):
+        delays.append(ev.rtt_ticks / 2.0)
+
+    def on_line(_line_no, line):
+        if b'RPL:' in line or b'DIO' in line or b'DAO' in line:
+            state["rpl_packets"] += 1
+        if b'CSV,' in line or b'TX seq=' not in line:
+            return
+        match = LEGACY_TX_RE.search(line)
+        if match:
+            seq = int(match.group(1))
+            node_match = LEGACY_ID_RE.search(line)
+            if node_match:
+                tx_packets[int(node_match.group(1))].append(seq)
+            elif state["sender"] is not None:
+                tx_packets[state["sender"]].append(seq)
+            else:
+                pending_tx_seqs.append(seq)
+
+    reader = TestlogReader()
+    reader.on("TX", on_tx).on("RX", on_rx).on("RTT", on_rtt)
+    reader.on_line(on_line)
+    reader.read(filename)
+    rpl_packets = state["rpl_packets"]
+    inferred_sender_id = state["sender"]
 
     if inferred_sender_id is not None and pending_tx_seqs:
         tx_packets[inferred_sender_id].extend(pending_tx_seqs)
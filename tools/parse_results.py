@@ -8,117 +8,83 @@ CSV 로그 파서: Cooja 로그에서 성능 지표 추출
 
 import sys
 import re
-import ipaddress
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from cooja_testlog import TestlogReader  # noqa: E402
+
+LEGACY_TX_RE = re.compile(rb'TX seq=(\d+)')
+LEGACY_TX_ID_RE = re.compile(rb'TX id=(\d+)')
 
 def parse_cooja_log(filename):
-    """Cooja 로그 파일에서 CSV 라인 추출 및 분석"""
+    """Cooja 로그 파일에서 CSV 라인 추출 및 분석 (cooja_testlog 단일 패스)"""
     
     # 데이터 저장소
     tx_packets = defaultdict(set)  # {node_id: {seq1, seq2, ...}}
     rx_packets = defaultdict(set)  # {node_id: {seq1, seq2, ...}}
     delays = []  # [(seq, delay_ms), ...]
     pending_tx_seqs = []  # seqs without node id
-    inferred_sender_id = None
-    rx_candidates = []  # [(src_ip, seq, has_root_tag)]
-    seen_root_tagged_rx = False
-    
-    # 제어 패킷 카운터
-    rpl_packets = 0
-    
+    rx_candidates = []  # [(src_node, seq, has_root_tag)]
+    counters = {"rpl_packets": 0}  # 제어 패킷 카운터
+
+    def on_tx(ev):
+        tx_packets[ev.node].add(ev.seq)
+
+    def on_rx(ev):
+        # Do not compute delay from RX timestamps (different mote clocks).
+        rx_candidates.append((ev.src_node, ev.seq, ev.root_tagged))
+
+    def on_rtt(ev):
+        # Cooja clock: 1 tick = 1ms (일반적), RTT의 절반이 one-way delay
+        delays.append((ev.seq, ev.rtt_ticks / 2.0))
+
+    def on_delay(ev):
+        # Legacy delay line (kept for compatibility), 1 tick ~= 1ms in Cooja
+        delays.append((ev.seq, ev.delay))
+
+    def on_line(_line_no, line):
+        # RPL 제어 패킷 카운터
+        if b'RPL:' in line or b'DIO' in line or b'DAO' in line:
+            counters["rpl_packets"] += 1
+        if b'CSV,' in line or b'TX seq=' not in line:
+            return
+        # [INFO: SENDER   ] TX id=<n> seq=<n> ...
+        match = LEGACY_TX_RE.search(line)
+        if match:
+            seq = int(match.group(1))
+            node_match = LEGACY_TX_ID_RE.search(line)
+            if node_match:
+                tx_packets[int(node_match.group(1))].add(seq)
+            else:
+                pending_tx_seqs.append(seq)
+
+    reader = TestlogReader()
+    reader.on("TX", on_tx).on("RX", on_rx).on("RTT", on_rtt).on("DELAY", on_delay)
+    reader.on_line(on_line)
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                
-                # CSV 라인 파싱
-                if 'CSV,RX,' in line:
-                    # CSV,RX,node=1,<src_ip>,<seq>,<t_recv>,<t0>,<len>
-                    # or CSV,RX,<src_ip>,<seq>,<t_recv>,<t0>,<len>
-                    parts = line.split('CSV,RX,')[1].split(',')
-                    if len(parts) >= 2:
-                        has_root_tag = (parts[0].strip() == "node=1")
-                        if has_root_tag and len(parts) >= 3:
-                            src_ip = parts[1]
-                            seq = int(parts[2])
-                        else:
-                            src_ip = parts[0]
-                            seq = int(parts[1])
-                        if has_root_tag:
-                            seen_root_tagged_rx = True
-                        rx_candidates.append((src_ip, seq, has_root_tag))
-                    # Do not compute delay from RX timestamps (different mote clocks).
-                    pass
-                
-                elif 'CSV,RTT,' in line:
-                    # CSV,RTT,<seq>,<t0>,<t_ack>,<rtt_ticks>,<len>
-                    parts = line.split('CSV,RTT,')[1].split(',')
-                    if len(parts) >= 4:
-                        seq = int(parts[0])
-                        rtt_ticks = int(parts[3])
-                        # Cooja clock: 1 tick = 1ms (일반적)
-                        delay_ms = rtt_ticks / 2.0  # RTT의 절반이 one-way delay
-                        delays.append((seq, delay_ms))
-                
-                elif 'CSV,DELAY,' in line:
-                    # Legacy delay line (kept for compatibility)
-                    parts = line.split('CSV,DELAY,')[1].split(',')
-                    if len(parts) >= 2:
-                        seq = int(parts[0])
-                        delay_ticks = int(parts[1])
-                        delay_ms = delay_ticks  # 1 tick ~= 1ms in Cooja
-                        delays.append((seq, delay_ms))
-                
-                # TX 로그 추출 (sender.c에서 출력)
-                elif 'CSV,TX,' in line:
-                    # CSV,TX,<node_id>,<seq>,<t0>,<joined>
-                    parts = line.split('CSV,TX,')[1].split(',')
-                    if len(parts) >= 2:
-                        node_id = int(parts[0])
-                        seq = int(parts[1])
-                        tx_packets[node_id].add(seq)
-
-                elif 'TX seq=' in line:
-                    # [INFO: SENDER   ] TX id=<n> seq=<n> ...
-                    match = re.search(r'TX seq=(\d+)', line)
-                    if match:
-                        seq = int(match.group(1))
-                        node_match = re.search(r'TX id=(\d+)', line)
-                        if node_match:
-                            node_id = int(node_match.group(1))
-                            tx_packets[node_id].add(seq)
-                        elif inferred_sender_id is not None:
-                            tx_packets[inferred_sender_id].add(seq)
-                        else:
-                            pending_tx_seqs.append(seq)
-                
-                # RPL 제어 패킷 카운터
-                if 'RPL:' in line or 'DIO' in line or 'DAO' in line:
-                    rpl_packets += 1
-    
+        reader.read(filename)
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
         sys.exit(1)
 
+    # Apply Rule 1: RX only from root (node=1) when available
+    seen_root_tagged_rx = any(tagged for _, _, tagged in rx_candidates)
+    inferred_sender_id = None
+    for node_id, seq, has_root_tag in rx_candidates:
+        if seen_root_tagged_rx and not has_root_tag:
+            continue
+        if node_id is None:
+            continue
+        rx_packets[node_id].add(seq)
+        if inferred_sender_id is None:
+            inferred_sender_id = node_id
+
     if inferred_sender_id is not None and pending_tx_seqs:
         for seq in pending_tx_seqs:
             tx_packets[inferred_sender_id].add(seq)
 
-    # Apply Rule 1: RX only from root (node=1) when available
-    if rx_candidates:
-        for src_ip, seq, has_root_tag in rx_candidates:
-            if seen_root_tagged_rx and not has_root_tag:
-                continue
-            try:
-                ip_obj = ipaddress.ip_address(src_ip)
-                node_id = int(ip_obj) & 0xffff
-                rx_packets[node_id].add(seq)
-                if inferred_sender_id is None:
-                    inferred_sender_id = node_id
-            except ValueError:
-                pass
-
-    return tx_packets, rx_packets, delays, rpl_packets
+    return tx_packets, rx_packets, delays, counters["rpl_packets"]
 
 
 def calculate_metrics(tx_packets, rx_packets, delays, rpl_packets):
@@ -5,8 +5,12 @@ Tests network-layer packet filtering based on trust values
 """
 
 import sys
-import re
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from cooja_testlog import TestlogReader  # noqa: E402
+from testlog_store import read_events  # noqa: E402
 
 def parse_blacklist_events(log_file):
     """Parse blacklist-related events from log"""
@@ -16,46 +20,35 @@ def parse_blacklist_events(log_file):
         'packet_drops': [],
         'trust_updates': []
     }
-    
-    with open(log_file, 'r') as f:
-        for line_no, line in enumerate(f, 1):
-            # CSV,BLACKLIST_ADD,<node>,<count>
-            match = re.search(r'CSV,BLACKLIST_ADD,(\d+),(\d+)', line)
-            if match:
-                events['blacklist_adds'].append({
-                    'line': line_no,
-                    'node_id': int(match.group(1)),
-                    'count': int(match.group(2))
-                })
-            
-            # CSV,BLACKLIST_REMOVE,<node>,<count>
-            match = re.search(r'CSV,BLACKLIST_REMOVE,(\d+),(\d+)', line)
-            if match:
-                events['blacklist_removes'].append({
-                    'line': line_no,
-                    'node_id': int(match.group(1)),
-                    'count': int(match.group(2))
-                })
-            
-            # CSV,PKT_DROP_DEST or CSV,PKT_DROP_SRC
-            match = re.search(r'CSV,PKT_DROP_(DEST|SRC),(\d+)', line)
-            if match:
-                events['packet_drops'].append({
-                    'line': line_no,
-                    'type': match.group(1),
-                    'node_id': int(match.group(2))
-                })
-            
-            # CSV,TRUST_IN,<self>,<node>,<trust>
-            match = re.search(r'CSV,TRUST_IN,(\d+),(\d+),(\d+)', line)
-            if match:
-                events['trust_updates'].append({
-                    'line': line_no,
-                    'self_id': int(match.group(1)),
-                    'node_id': int(match.group(2)),
-                    'trust': int(match.group(3))
-                })
-    
+
+    def on_membership(key):
+        # CSV,BLACKLIST_ADD|BLACKLIST_REMOVE,<node>,<count>
+        def callback(ev):
+            events[key].append({'line': ev.line, 'node_id': ev.node, 'count': ev.count})
+        return callback
+
+    def on_drop(kind):
+        # CSV,PKT_DROP_DEST or CSV,PKT_DROP_SRC
+        def callback(ev):
+            events['packet_drops'].append({'line': ev.line, 'type': kind, 'node_id': ev.node})
+        return callback
+
+    def on_trust_in(ev):
+        # CSV,TRUST_IN,<self>,<node>,<trust>
+        events['trust_updates'].append({
+            'line': ev.line,
+            'self_id': ev.self_id,
+            'node_id': ev.node,
+            'trust': ev.trust
+        })
+
+    reader = TestlogReader()
+    reader.on("BLACKLIST_ADD", on_membership('blacklist_adds'))
+    reader.on("BLACKLIST_REMOVE", on_membership('blacklist_removes'))
+    reader.on("PKT_DROP_DEST", on_drop('DEST'))
+    reader.on("PKT_DROP_SRC", on_drop('SRC'))
+    reader.on("TRUST_IN", on_trust_in)
+    read_events(reader, log_file)
     return events
 
 def analyze_blacklist_behavior(log_file):
@@ -5,48 +5,34 @@ Verifies that nodes with trust < TRUST_PARENT_MIN are not selected as parents
 """
 
 import sys
-import re
 from collections import defaultdict
+from pathlib import Path
 
-def parse_trust_log(log_file, trust_min=700):
-    """Parse trust values from log and identify low-trust nodes"""
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from cooja_testlog import TestlogReader  # noqa: E402
+from testlog_store import read_events  # noqa: E402
+
+def parse_trust_and_parents(log_file, trust_min=700):
+    """Collect trust values and parent selections in one pass over the log"""
     trust_values = defaultdict(list)
     low_trust_periods = defaultdict(list)
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            # Parse: CSV,TRUST,<node>,<seq>,<missed>,<trust>
-            match = re.search(r'CSV,TRUST,(\d+),(\d+),(\d+),(\d+)', line)
-            if match:
-                node_id = int(match.group(1))
-                seq = int(match.group(2))
-                trust = int(match.group(4))
-                trust_values[node_id].append((seq, trust))
-                
-                if trust < trust_min:
-                    low_trust_periods[node_id].append((seq, trust))
-    
-    return trust_values, low_trust_periods
-
-def parse_parent_selection(log_file):
-    """Parse parent selection from log"""
     parent_selections = []
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            # Parse: CSV,PARENT,<node>,<parent_ip>
-            match = re.search(r'CSV,PARENT,(\d+),(fe80::201:1:1:(\w+)|none)', line)
-            if match:
-                node_id = int(match.group(1))
-                parent_ip = match.group(2)
-                
-                if parent_ip != 'none':
-                    # Extract last byte of IPv6 address (node ID in hex)
-                    parent_hex = match.group(3)
-                    parent_node_id = int(parent_hex, 16)
-                    parent_selections.append((node_id, parent_node_id))
-    
-    return parent_selections
+
+    def on_trust(ev):
+        # CSV,TRUST,<node>,<seq>,<missed>,<trust>
+        trust_values[ev.node].append((ev.seq, ev.trust))
+        if ev.trust < trust_min:
+            low_trust_periods[ev.node].append((ev.seq, ev.trust))
+
+    def on_parent(ev):
+        # CSV,PARENT,<node>,<parent_ip|none>; node ID is the last address group
+        if ev.parent_node is not None:
+            parent_selections.append((ev.node, ev.parent_node))
+
+    reader = TestlogReader()
+    reader.on("TRUST", on_trust).on("PARENT", on_parent)
+    read_events(reader, log_file)
+    return trust_values, low_trust_periods, parent_selections
 
 def validate_trust_parent_exclusion(log_file, trust_min=700):
     """Validate that low-trust nodes are not selected as parents"""
@@ -56,8 +42,8 @@ def validate_trust_parent_exclusion(log_file, trust_min=700):
     print(f"TRUST_PARENT_MIN: {trust_min}")
     print(f"=" * 80)
     
-    # Parse trust values
-    trust_values, low_trust_periods = parse_trust_log(log_file, trust_min)
+    trust_values, low_trust_periods, parent_selections = parse_trust_and_parents(
+        log_file, trust_min)
     
     print(f"\n[1] Trust Statistics:")
     print(f"  - Total nodes with trust values: {len(trust_values)}")
@@ -80,9 +66,6 @@ def validate_trust_parent_exclusion(log_file, trust_min=700):
                 for seq, trust in periods[-2:]:
                     print(f"      seq {seq}: trust = {trust}")
     
-    # Parse parent selections
-    parent_selections = parse_parent_selection(log_file)
-    
     print(f"\n[3] Parent Selection Analysis:")
     print(f"  - Total parent selections logged: {len(parent_selections)}")
     